@@ -0,0 +1,43 @@
+"""Benchmark the parsing of the GetCapabilities document.
+
+Run it from the root of the repository::
+
+    pytest benchmarks/bench_capabilities.py
+"""
+import xmltodict
+
+from meteofrance_publicapi.capabilities import CHUNK_SIZE, iter_coverage_summaries
+
+
+def _chunks(content):
+    return (content[i:i + CHUNK_SIZE] for i in range(0, len(content), CHUNK_SIZE))
+
+
+def test_iter_coverage_summaries(benchmark, server):
+    content = server.capabilities_xml().encode()
+
+    coverage_ids = benchmark(
+        lambda: [summary["CoverageId"] for summary in iter_coverage_summaries(_chunks(content))]
+    )
+    assert coverage_ids == server.coverage_ids
+
+
+def test_xmltodict_capabilities(benchmark, server):
+    """The full parsing of :attr:`.AromeForecast.capabilities`, for comparison."""
+    content = server.capabilities_xml()
+
+    capabilities = benchmark(xmltodict.parse, content)
+    assert len(capabilities["wcs:Capabilities"]["wcs:Contents"]["wcs:CoverageSummary"]) == len(
+        server.coverage_ids
+    )
+
+
+def test_get_capabilities(benchmark, server, tmp_path):
+    from meteofrance_publicapi import AromeForecast
+
+    client = server.client(
+        AromeForecast, cache_dir=tmp_path, capabilities_cache=False, rate_limit=None
+    )
+
+    benchmark(client.get_capabilities, refresh=True)
+    assert client.all_coverageid == server.coverage_ids
@@ -0,0 +1,53 @@
+"""Benchmark the download of the coverages from the fake server.
+
+The coverages are fetched in a new cache directory at each round,
+so that the requests, the streaming to disk and the cache are measured.
+Run it from the root of the repository::
+
+    pytest benchmarks/bench_coverage.py
+"""
+import itertools
+
+import pytest
+
+from meteofrance_publicapi import AromeForecast
+
+pytest.importorskip("rasterio")
+
+LAT = (45.0, 47.0)
+LONG = (1.0, 4.0)
+
+
+@pytest.fixture()
+def new_client(server, tmp_path):
+    counter = itertools.count()
+
+    def new_client():
+        client = server.client(
+            AromeForecast, cache_dir=tmp_path / str(next(counter)),
+            capabilities_cache=False, rate_limit=None,
+        )
+        client.get_capabilities()
+        return (client,), {}
+
+    return new_client
+
+
+def test_get_coverage(benchmark, new_client, server):
+    def get_coverage(client):
+        return client.get_coverage(client.all_coverageid[0], lat=LAT, long=LONG)
+
+    filepath = benchmark.pedantic(get_coverage, setup=new_client, rounds=20)
+    assert filepath.exists()
+
+
+@pytest.mark.parametrize("max_workers", [1, 8])
+def test_get_coverages(benchmark, new_client, server, max_workers):
+    def get_coverages(client):
+        return client.get_coverages(
+            client.all_coverageid[:4], heights=[2, 10], times=[0, 3600, 7200],
+            lat=LAT, long=LONG, max_workers=max_workers,
+        )
+
+    filepaths = benchmark.pedantic(get_coverages, setup=new_client, rounds=5)
+    assert len(filepaths) == 24
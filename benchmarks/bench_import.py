@@ -0,0 +1,47 @@
+"""Benchmark the import time of the package.
+
+Each case is imported in a fresh interpreter, several times, and the best time is kept.
+Run it from the root of the repository::
+
+    python benchmarks/bench_import.py
+"""
+import subprocess
+import sys
+import time
+
+CASES = {
+    "import meteofrance_publicapi": "import meteofrance_publicapi",
+    "AromeForecast": "from meteofrance_publicapi import AromeForecast",
+    "Observations": "from meteofrance_publicapi import Observations",
+    "raster": "import meteofrance_publicapi.raster",
+    "all the clients (eager)": (
+        "from meteofrance_publicapi import AromeForecast, Observations, AsyncAromeForecast"
+    ),
+}
+REPEAT = 5
+
+
+def import_time(statement, repeat=REPEAT):
+    """Return the best time of `statement` in a fresh interpreter, in seconds."""
+    code = (
+        "import time; start = time.perf_counter(); "
+        f"{statement}; print(time.perf_counter() - start)"
+    )
+    times = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", code], check=True, capture_output=True, text=True
+        ).stdout
+        times.append(float(output))
+    return min(times)
+
+
+def main():
+    start = time.perf_counter()
+    for name, statement in CASES.items():
+        print(f"{name:<30} {import_time(statement) * 1000:8.1f} ms")
+    print(f"(benchmark ran in {time.perf_counter() - start:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
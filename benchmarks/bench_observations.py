@@ -0,0 +1,42 @@
+"""Benchmark the parsing of the CSV observations.
+
+Run it from the root of the repository::
+
+    pytest benchmarks/bench_observations.py
+"""
+from meteofrance_publicapi.observations import (
+    NAME_EXPLICIT_EN_HOURLY,
+    STATIONS_SCHEMA,
+    _observations_schema,
+    _read_csv,
+)
+
+
+def test_read_observations_csv(benchmark, server):
+    # the observations of a day, with one header
+    days = [
+        server.observations_csv(server.stations, f"2024-01-01T{hour:02d}:00:00Z").split("\n", 1)
+        for hour in range(24)
+    ]
+    content = (days[0][0] + "\n" + "".join(rows for _, rows in days)).encode()
+    schema = _observations_schema(NAME_EXPLICIT_EN_HOURLY)
+
+    data = benchmark(_read_csv, content, schema)
+    assert len(data) == 24 * len(server.stations)
+    assert data["t"].dtype == "float32"
+
+
+def test_read_stations_csv(benchmark, server):
+    content = server.stations_csv().encode()
+
+    stations = benchmark(_read_csv, content, STATIONS_SCHEMA)
+    assert len(stations) == len(server.stations)
+
+
+def test_get_paquet_stations_horaire(benchmark, server, tmp_path):
+    from meteofrance_publicapi import Observations
+
+    client = server.client(Observations, cache_dir=tmp_path, rate_limit=None)
+
+    data = benchmark(client.get_paquet_stations_horaire, "2024-01-01T00:00:00Z")
+    assert len(data) == len(server.stations)
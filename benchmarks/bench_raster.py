@@ -0,0 +1,46 @@
+"""Benchmark the decoding and the sampling of the rasters.
+
+Run it from the root of the repository::
+
+    pytest benchmarks/bench_raster.py
+"""
+import numpy as np
+import pytest
+
+pytest.importorskip("rasterio")
+
+from meteofrance_publicapi import raster  # noqa: E402
+from meteofrance_publicapi.testing import synthetic_tiff  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def tiff_files(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("rasters")
+    filenames = []
+    for seed in range(12):
+        filename = directory / f"{seed}.tiff"
+        filename.write_bytes(synthetic_tiff((41.0, 51.0), (-5.0, 9.0), 0.01, seed))
+        filenames.append(filename)
+    return filenames
+
+
+def test_open_tiff_file(benchmark, tiff_files):
+    field, _ = benchmark(raster.open_tiff_file, tiff_files[0], use_cache=False)
+    assert field.shape == (1000, 1400)
+
+
+def test_open_tiff_file_cached(benchmark, tiff_files):
+    raster.open_tiff_file(tiff_files[0])
+    field, _ = benchmark(raster.open_tiff_file, tiff_files[0])
+    assert field.shape == (1000, 1400)
+
+
+@pytest.mark.parametrize("method", ["nearest", "bilinear"])
+def test_sample_tiff_files(benchmark, tiff_files, method):
+    rng = np.random.default_rng(0)
+    lat = rng.uniform(42, 50, 2000)
+    lon = rng.uniform(-4, 8, 2000)
+    raster.memory_cache.clear()
+
+    values = benchmark(raster.sample_tiff_files, tiff_files, lat, lon, method=method)
+    assert values.shape == (len(tiff_files), 2000)
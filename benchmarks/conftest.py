@@ -0,0 +1,10 @@
+"""Fixtures of the benchmarks, served by a local fake server."""
+import pytest
+
+from meteofrance_publicapi.testing import FakeMeteoFranceServer
+
+
+@pytest.fixture(scope="session")
+def server():
+    with FakeMeteoFranceServer(n_runs=100, n_stations=2000) as server:
+        yield server
@@ -1,3 +1,39 @@
-from .observations import Observations
-from .forecast import AromeForecast, ArpegeForecast
+"""A wrapper of the portail-api.meteofrance.fr datasets.
+
+The clients are imported on first use, so that ``import meteofrance_publicapi``
+does not load pandas, numpy or httpx: a job that only downloads forecasts
+does not pay for the import of the observations or of the async clients.
+"""
+from importlib import import_module
+from typing import TYPE_CHECKING
+
 __version__ = "0.1.5"
+
+#: The module of each public name.
+_LAZY_IMPORTS = {
+    "Observations": ".observations",
+    "AromeForecast": ".forecast",
+    "ArpegeForecast": ".forecast",
+    "AsyncAromeForecast": ".aio",
+    "AsyncArpegeForecast": ".aio",
+    "AsyncObservations": ".aio",
+}
+
+__all__ = list(_LAZY_IMPORTS)
+
+if TYPE_CHECKING:
+    from .aio import AsyncAromeForecast, AsyncArpegeForecast, AsyncObservations
+    from .forecast import AromeForecast, ArpegeForecast
+    from .observations import Observations
+
+
+def __getattr__(name):
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_LAZY_IMPORTS[name], __name__), name)
+    globals()[name] = value  # the next accesses do not call __getattr__
+    return value
+
+
+def __dir__():
+    return sorted([*globals(), *__all__])
@@ -0,0 +1,766 @@
+"""Asynchronous clients of the meteo-France API.
+
+The classes of this module are the ``asyncio`` counterparts of
+:class:`.MeteoFranceAPI`, :class:`.AromeForecast`, :class:`.ArpegeForecast`
+and :class:`.Observations`.
+They share the token, the error handling and the cache of the synchronous
+clients, but the requests are made with a pooled ``httpx.AsyncClient``,
+so that many requests can be awaited concurrently.
+
+It requires the ``httpx`` package::
+
+    pip install meteofrance-publicapi[async]
+
+Usage
+-----
+
+.. code-block:: python
+
+    import asyncio
+    from meteofrance_publicapi import AsyncAromeForecast
+
+    async def main():
+        async with AsyncAromeForecast(api_key=API_KEY, max_concurrency=20) as client:
+            await client.get_capabilities()
+            return await asyncio.gather(
+                *[client.get_coverage(time=time) for time in range(0, 3600 * 40, 3600)]
+            )
+
+    files = asyncio.run(main())
+"""
+import asyncio
+import logging
+import weakref
+from contextlib import asynccontextmanager
+from functools import partial
+from time import perf_counter
+
+import xmltodict
+
+from .capabilities import CHUNK_SIZE, CapabilitiesCache, CoverageSummaryParser
+from .const import NOT_MODIFIED_CODE, SUCCESS_CODE
+from .core import MeteoFranceAPI
+from .errors import MissingDataError
+from .ratelimit import retry_delay
+from .forecast import (
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_WATCH_INTERVAL,
+    DOWNLOAD_CHUNK_SIZE,
+    POINT_BOX_MARGIN,
+    WATCH_ERRORS,
+    AromeForecast,
+    ArpegeForecast,
+    _check_download,
+    _check_validate,
+    _import_crop_tiff,
+    _points_box,
+    _range_headers,
+    _resume_offset,
+)
+from .observations import (
+    NAME_EXPLICIT_EN_6min,
+    NAME_EXPLICIT_EN_HOURLY,
+    Observations,
+)
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+#: The default number of requests running at the same time.
+DEFAULT_MAX_CONCURRENCY = 10
+#: The default timeout of the requests, in seconds.
+DEFAULT_TIMEOUT = 60
+
+
+def _release_acquired(lock, acquire):
+    """Release `lock` if the thread of `acquire` took it."""
+    if not acquire.cancelled() and acquire.exception() is None:
+        lock.__exit__(None, None, None)
+
+
+class AsyncMeteoFranceAPI(MeteoFranceAPI):
+    """Asynchronous client of the meteo-France API.
+
+    Parameters
+    ----------
+    api_key : str | None, optional
+        The API Key, by default None
+    token : str | None, optional
+        The API Token, by default None
+    application_id : str | None, optional
+        The Application ID, by default None
+    max_concurrency : int, optional
+        The maximum number of requests running at the same time,
+        by default :data:`DEFAULT_MAX_CONCURRENCY`.
+    http2 : bool, optional
+        Use HTTP/2 if the ``h2`` package is installed, by default True.
+    **kwargs
+        Additional parameters of :class:`.MeteoFranceAPI`,
+        such as `rate_limit` and `max_retries`.
+
+    Note
+    ----
+    See :class:`.MeteoFranceAPI` for the parameters `api_key`, `token` and `application_id`.
+
+    The client must be closed with :meth:`aclose`,
+    or used as an asynchronous context manager.
+    """
+
+    def __init__(
+        self,
+        api_key: str | None = None,
+        token: str | None = None,
+        application_id: str | None = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        http2: bool = True,
+        **kwargs,
+    ):
+        super().__init__(api_key, token, application_id, **kwargs)
+        self._setup_async(max_concurrency, http2)
+
+    def _setup_async(self, max_concurrency, http2):
+        """Store the settings of the asynchronous client."""
+        if httpx is None:
+            raise ImportError(
+                "The asynchronous clients require httpx: "
+                "pip install meteofrance-publicapi[async]"
+            )
+        if max_concurrency < 1:
+            raise ValueError("The parameter max_concurrency must be at least 1")
+        self.max_concurrency = max_concurrency
+        self.http2 = http2
+        self._client = None
+        self._semaphore = None
+        self._coverage_locks = weakref.WeakValueDictionary()  # the locks of the downloads, by file
+
+    @property
+    def client(self):
+        """The pooled ``httpx.AsyncClient``, created on first use."""
+        if self._client is None:
+            http2 = self.http2
+            if http2:
+                try:
+                    import h2  # noqa: F401
+                except ImportError:
+                    logger.debug("h2 is not installed, falling back to HTTP/1.1")
+                    http2 = False
+            limits = httpx.Limits(
+                max_connections=self.max_concurrency,
+                max_keepalive_connections=self.max_concurrency,
+            )
+            self._client = httpx.AsyncClient(
+                http2=http2, limits=limits, timeout=DEFAULT_TIMEOUT
+            )
+        return self._client
+
+    @property
+    def semaphore(self):
+        """The semaphore limiting the number of concurrent requests."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def _auth_headers(self):
+        """The authentication headers set by :meth:`connect`."""
+        return {
+            key: value
+            for key, value in self.session.headers.items()
+            if key in ("apikey", "Authorization")
+        }
+
+    async def _get_request(self, url, params=None, headers=None, stream=False):
+        """Make a get request to the API.
+
+        Parameters
+        ----------
+        url : str
+            the url to request
+        params : dict
+            the parameters to pass to the request
+        headers : dict, optional
+            additional headers, for instance for a conditional request
+        stream : bool, optional
+            do not download the body of a successful response at once,
+            so that it can be iterated with ``res.aiter_bytes``.
+            The response must then be closed with ``res.aclose``.
+
+        Returns
+        -------
+        httpx.Response
+            the response of the request
+        """
+        logger.debug(f"GET {url}")
+        for attempt in range(self.max_retries + 1):
+            if self._token_managed:
+                # refresh the token before it expires, out of the event loop if it needs I/O
+                if self.token_manager.needs_refresh():
+                    await asyncio.to_thread(self._refresh_token)
+                else:
+                    self._refresh_token()
+            res = await self._send(url, params, headers, stream, attempt)
+            if self._token_expired(res) and self._uses_token_manager():
+                logger.info("token expired, requesting a new one")
+                await res.aclose()
+                await asyncio.to_thread(self._refresh_token, self.token)
+                res = await self._send(url, params, headers, stream, attempt)
+            if not self._should_retry(res, attempt):
+                break
+            delay = retry_delay(res, attempt, self.backoff_factor)
+            logger.warning(f"error code: {res.status_code}, retrying in {delay:.1f}s")
+            self._emit_retry(url, res, attempt, delay)
+            await res.aclose()
+            await asyncio.sleep(delay)
+        return self._check_response(res)
+
+    async def _send(self, url, params, headers=None, stream=False, attempt=0):
+        """Send one request, within the rate and concurrency limits, and report its response."""
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire_async()
+        request = self.client.build_request(
+            "GET", url, params=params, headers={**self._auth_headers(), **(headers or {})}
+        )
+        async with self.semaphore:
+            start = perf_counter()
+            res = await self.client.send(request, stream=stream)
+        if stream and res.status_code != SUCCESS_CODE:
+            # the body of the errors is small, and needed to check the response
+            await res.aread()
+        self._emit_request(url, res, start, attempt, stream)
+        return res
+
+    async def aclose(self):
+        """Close the underlying HTTP client."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+
+class AsyncAromeForecast(AsyncMeteoFranceAPI, AromeForecast):
+    """Asynchronous access to the AROME numerical Forcast.
+
+    Same parameters as :class:`.AromeForecast`,
+    plus `max_concurrency` and `http2` (see :class:`AsyncMeteoFranceAPI`).
+
+    The methods ``get_capabilities``, ``fetch_capabilities``, ``get_description``,
+    ``describe_coverage``, ``get_coverage``, ``get_coverages``, ``get_point_values`` and
+    ``get_cube`` are coroutines, and ``watch`` is an asynchronous generator.
+    """
+
+    def __init__(
+        self,
+        precision: float = 0.01,
+        territory: str = "FRANCE",
+        api_key: str | None = None,
+        token: str | None = None,
+        application_id: str | None = None,
+        cache_dir: str | None = None,
+        capabilities_cache: bool = True,
+        cache_max_bytes: int | None = None,
+        store=None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        http2: bool = True,
+        **kwargs,
+    ):
+        AromeForecast.__init__(
+            self, precision, territory, api_key, token, application_id, cache_dir,
+            capabilities_cache, cache_max_bytes, store, **kwargs,
+        )
+        self._setup_async(max_concurrency, http2)
+
+    @property
+    def capabilities(self):
+        """The Capabilities of the service, as a dict, fetched by :meth:`fetch_capabilities`."""
+        if self.data_capabilities is None:
+            raise ValueError("The capabilities are not fetched, await fetch_capabilities() first")
+        return self.data_capabilities
+
+    async def fetch_capabilities(self):
+        """Download and parse the full Capabilities document.
+
+        :meth:`get_capabilities` only keeps the coverage IDs:
+        the full document is set to :attr:`capabilities`.
+
+        Returns
+        -------
+        dict
+            the capabilities.
+        """
+        url, params = self._capabilities_request()
+        response = await self._get_request(url, params=params)
+        with self.instrumentation.timed("parse", "capabilities", nbytes=len(response.content)):
+            self.data_capabilities = self._parse_capabilities(response.text)
+        self._set_coverageids(self._coverageids_of(self.data_capabilities))
+        return self.data_capabilities
+
+    async def get_capabilities(self, refresh: bool = False):
+        """Get the capabilities of the service.
+
+        See :meth:`.AromeForecast.get_capabilities`.
+        """
+        entry = self._cached_capabilities(refresh)
+        if entry is not None and CapabilitiesCache.is_fresh(entry) and not refresh:
+            logger.debug("reading capabilities from cache")
+            self._set_coverageids(entry["coverage_ids"])
+            return
+        if self.data_capabilities is not None and not refresh:
+            self._set_coverageids(self._coverageids_of(self.data_capabilities))
+            return
+        url, params = self._capabilities_request()
+        headers = CapabilitiesCache.validators(entry) if entry is not None else None
+        response = await self._get_request(url, params=params, headers=headers, stream=True)
+        coverage_ids = None
+        if response.status_code != NOT_MODIFIED_CODE:
+            # the document is parsed while it is downloaded
+            start = perf_counter()
+            parser = CoverageSummaryParser()
+            coverage_ids = []
+            try:
+                async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                    coverage_ids.extend(summary["CoverageId"] for summary in parser.feed(chunk))
+                coverage_ids.extend(summary["CoverageId"] for summary in parser.close())
+            finally:
+                await response.aclose()
+            self.instrumentation.emit("parse", "capabilities", duration=perf_counter() - start)
+        self._set_coverageids(self._store_capabilities(response, entry, coverage_ids))
+
+    async def get_description(self, coverageid=None):
+        """Get the description of a coverage.
+
+        See :meth:`.AromeForecast.get_description`.
+        """
+        url, params = self._description_request(coverageid)
+        response = await self._get_request(url, params=params)
+        with self.instrumentation.timed("parse", "description", nbytes=len(response.content)):
+            return xmltodict.parse(response.text)
+
+    async def describe_coverage(self, coverageid=None, refresh: bool = False):
+        """Get the parsed description of a coverage.
+
+        See :meth:`.AromeForecast.describe_coverage`.
+        """
+        if coverageid is None:
+            coverageid = self._default_coverageid()
+        description = None if refresh else self._cached_description(coverageid)
+        if description is None:
+            url, params = self._description_request(coverageid)
+            response = await self._get_request(url, params=params)
+            description = self._store_description(response.content)
+        return description
+
+    async def get_coverage(
+        self,
+        coverageid=None,
+        height=2,
+        time=0,
+        lat=(37.5, 55.4),  # roughly the latitudes of France
+        long=(-12, 16),  # roughly the longitudes of France
+        crop_cached: bool = True,
+        validate: str | None = None,
+    ):
+        """Fetch the raster values of the model predictions.
+
+        See :meth:`.AromeForecast.get_coverage`.
+        """
+        _check_validate(validate)
+        if coverageid is None:
+            coverageid = self._default_coverageid()
+        if validate is not None:
+            description = await self.describe_coverage(coverageid)
+            height, time, lat, long = description.validate(
+                height, time, lat, long, clamp=validate == "clamp"
+            )
+        filepath = self._coverage_filepath(coverageid, height, time, lat, long)
+        logger.debug(f"{filepath=}")
+        if self._coverage_cached(await asyncio.to_thread(self.coverage_cache.get, filepath)):
+            return filepath
+        async with self._coverage_lock(filepath):
+            if filepath.exists():
+                # fetched by another task or process while waiting for the lock
+                await asyncio.to_thread(
+                    self.coverage_cache.register, filepath, coverageid, height, time, lat, long
+                )
+                return filepath
+            source = None
+            crop_tiff = _import_crop_tiff() if crop_cached else None
+            if crop_tiff is not None:
+                source = await asyncio.to_thread(
+                    self.coverage_cache.find_containing, coverageid, height, time, lat, long
+                )
+            if source is not None:
+                logger.debug(f"Cropping the cached file {source}")
+                content = await asyncio.to_thread(crop_tiff, source, lat, long)
+                await asyncio.to_thread(
+                    self.coverage_cache.put, filepath, content, coverageid, height, time, lat, long
+                )
+            else:
+                logger.debug("File not found in Cache, fetching data")
+                part_path = await self._download_coverage(coverageid, height, time, lat, long, filepath)
+                await asyncio.to_thread(
+                    self.coverage_cache.commit, part_path, filepath, coverageid, height, time, lat, long
+                )
+        await asyncio.to_thread(self._store_coverage, filepath, coverageid, height, time)
+        return filepath
+
+    @asynccontextmanager
+    async def _coverage_lock(self, filepath):
+        """Hold the lock of a coverage file, see :meth:`.CoverageCache.lock`.
+
+        The tasks of the client wait on an ``asyncio.Lock``, so that at most one thread
+        per file waits for the lock of the other processes.
+        If the task is cancelled while the thread waits, the lock is released
+        as soon as the thread gets it.
+        """
+        task_lock = self._coverage_locks.setdefault(filepath, asyncio.Lock())
+        async with task_lock:
+            lock = self.coverage_cache.lock(filepath)
+            acquire = asyncio.ensure_future(asyncio.to_thread(lock.__enter__))
+            try:
+                await asyncio.shield(acquire)
+            except asyncio.CancelledError:
+                acquire.add_done_callback(partial(_release_acquired, lock))
+                raise
+            try:
+                yield
+            finally:
+                lock.__exit__(None, None, None)
+
+    async def _download_coverage(self, coverageid, height, time, lat, long, filepath):
+        """Stream a coverage to the partial file of `filepath`, and return its path.
+
+        See :meth:`.AromeForecast._download_coverage`.
+        """
+        url, params = self._coverage_request(coverageid, height, time, lat, long)
+        part_path = self.coverage_cache.part_path(filepath)
+        part_path.parent.mkdir(parents=True, exist_ok=True)
+        start = perf_counter()
+        for attempt in range(self.max_retries + 1):
+            offset = part_path.stat().st_size if part_path.exists() else 0
+            res = await self._get_request(
+                url, params=params, headers=_range_headers(offset), stream=True
+            )
+            try:
+                offset, size = _resume_offset(res, offset)
+                if offset is None:
+                    logger.debug(f"discarding the partial download of {filepath.name}")
+                    part_path.unlink()
+                    continue
+                with open(part_path, "r+b" if offset else "wb") as f:
+                    f.truncate(offset)
+                    f.seek(offset)
+                    async for chunk in res.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                        await asyncio.to_thread(f.write, chunk)
+            except httpx.TransportError as e:
+                logger.warning(f"download of {filepath.name} interrupted: {e}")
+                continue
+            finally:
+                await res.aclose()
+            if await asyncio.to_thread(_check_download, part_path, size, coverageid):
+                self._emit_download(coverageid, part_path, start)
+                return part_path
+            logger.warning(f"download of {filepath.name} incomplete, resuming")
+        raise ValueError(f"The download of {coverageid} failed after {self.max_retries + 1} attempts")
+
+
+    async def get_coverages(
+        self,
+        coverageids=None,
+        heights=2,
+        times=0,
+        lat=(37.5, 55.4),  # roughly the latitudes of France
+        long=(-12, 16),  # roughly the longitudes of France
+        validate: str | None = None,
+    ):
+        """Fetch many coverages at once.
+
+        The number of concurrent requests is bounded by `max_concurrency`.
+        See :meth:`.AromeForecast.get_coverages`.
+        """
+        _check_validate(validate)
+        coverageids = self._coverageid_list(coverageids)
+        if self._needs_descriptions(heights, times, validate):
+            await asyncio.gather(*[self.describe_coverage(coverageid) for coverageid in coverageids])
+        items, lat, long = self._checked_items(coverageids, heights, times, lat, long, validate)
+        results = await asyncio.gather(
+            *[self.get_coverage(*item, lat, long) for item in items],
+            return_exceptions=True,
+        )
+        filepaths = {}
+        for item, result in zip(items, results):
+            if isinstance(result, MissingDataError):
+                logger.warning(f"Missing data for {item}: {result}")
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                filepaths[item] = result
+        return filepaths
+
+    async def get_point_values(
+        self,
+        lat,
+        lon,
+        coverageid=None,
+        height=2,
+        times=0,
+        method="nearest",
+        margin: float = POINT_BOX_MARGIN,
+    ):
+        """Get the forecast values at many locations.
+
+        The files are sampled out of the event loop.
+        See :meth:`.AromeForecast.get_point_values`.
+        """
+        box_lat, box_long = _points_box(lat, lon, margin)
+        filepaths = await self.get_coverages(coverageid, height, times, box_lat, box_long)
+        return await asyncio.to_thread(
+            self._sample_points, coverageid, height, times, filepaths, lat, lon, method
+        )
+
+    async def get_cube(
+        self,
+        coverageid=None,
+        height=2,
+        times=range(0, 49 * 3600, 3600),
+        lat=(37.5, 55.4),  # roughly the latitudes of France
+        long=(-12, 16),  # roughly the longitudes of France
+        chunks: int = DEFAULT_CHUNK_SIZE,
+    ):
+        """Get the forecast of a coverage over many forecast times, as a lazy cube.
+
+        The cube is assembled out of the event loop.
+        See :meth:`.AromeForecast.get_cube`.
+        """
+        from .cube import build_cube
+
+        if coverageid is None:
+            coverageid = self._default_coverageid()
+        filepaths = await self.get_coverages(coverageid, height, times, lat, long)
+        return await asyncio.to_thread(
+            build_cube,
+            list(filepaths.values()),
+            [time for _, _, time in filepaths],
+            chunks=chunks,
+            name=coverageid,
+        )
+
+    async def watch(
+        self,
+        names=None,
+        interval: float = DEFAULT_WATCH_INTERVAL,
+        seen=None,
+        download: bool = False,
+        heights=2,
+        times=0,
+        lat=(37.5, 55.4),  # roughly the latitudes of France
+        long=(-12, 16),  # roughly the longitudes of France
+        polls: int | None = None,
+    ):
+        """Poll the capabilities, and yield the newly published coverage IDs.
+
+        An asynchronous generator, see :meth:`.AromeForecast.watch`.
+        """
+        loop = asyncio.get_running_loop()
+        seen = None if seen is None else set(seen)
+        poll = 0
+        while polls is None or poll < polls:
+            next_poll = loop.time() + interval
+            poll += 1
+            try:
+                await self.get_capabilities(refresh=True)
+                new, current = self._new_coverageids(seen, names)
+                filepaths = {}
+                if new and download:
+                    filepaths = await self.get_coverages(new, heights, times, lat, long)
+            except (*WATCH_ERRORS, httpx.TransportError) as e:
+                logger.warning(f"Polling the coverages failed: {e}")
+            else:
+                seen = current
+                if new:
+                    logger.info(f"{len(new)} new coverage IDs")
+                    yield new, filepaths
+            if polls is None or poll < polls:
+                await asyncio.sleep(max(next_poll - loop.time(), 0))
+
+
+class AsyncArpegeForecast(AsyncAromeForecast, ArpegeForecast):
+    """Asynchronous access to the ARPEGE numerical Forcast.
+
+    Same parameters as :class:`.ArpegeForecast`,
+    plus `max_concurrency` and `http2` (see :class:`AsyncMeteoFranceAPI`).
+    """
+
+    def __init__(
+        self,
+        territory: str = "EUROPE",
+        api_key: str | None = None,
+        token: str | None = None,
+        application_id: str | None = None,
+        cache_dir: str | None = None,
+        capabilities_cache: bool = True,
+        cache_max_bytes: int | None = None,
+        store=None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        http2: bool = True,
+        **kwargs,
+    ):
+        ArpegeForecast.__init__(
+            self, territory, api_key, token, application_id, cache_dir,
+            capabilities_cache, cache_max_bytes, store, **kwargs,
+        )
+        self._setup_async(max_concurrency, http2)
+
+
+class AsyncObservations(AsyncMeteoFranceAPI, Observations):
+    """Asynchronous access to the observational data.
+
+    Same parameters as :class:`.Observations`,
+    plus `max_concurrency` and `http2` (see :class:`AsyncMeteoFranceAPI`).
+    """
+
+    async def list_stations(self, refresh: bool = False):
+        """Liste the available stations.
+
+        See :meth:`.Observations.list_stations`.
+        """
+        content = None if refresh else self._cached_stations()
+        if content is None:
+            url = self.base_url + self.version + "/liste-stations"
+            res = await self._get_request(url)
+            content = res.content
+            self._store_stations(content)
+        return self._parse_stations(content)
+
+    async def get_station_catalog(self, refresh: bool = False):
+        """Return the spatial index of the stations.
+
+        See :meth:`.Observations.get_station_catalog`.
+        """
+        from .stations import StationCatalog
+
+        if self.station_catalog is None or refresh:
+            self.station_catalog = StationCatalog(await self.list_stations(refresh))
+        return self.station_catalog
+
+    async def get_station_horaire(self,
+                                  station_id: str,
+                                  datetime: str | None = None,
+                                  rename_columns: bool = True):
+        """Get the hourly data for a given station.
+
+        See :meth:`.Observations.get_station_horaire`.
+        """
+        url, params = self._station_request("horaire", station_id, datetime)
+        req = await self._get_request(url, params=params)
+        return self._parse_station_csv(req.content, NAME_EXPLICIT_EN_HOURLY, rename_columns)
+
+    async def get_station_6min(self,
+                               station_id: str,
+                               datetime: str | None = None,
+                               rename_columns: bool = True):
+        """Get the 6min data for a given station.
+
+        See :meth:`.Observations.get_station_6min`.
+        """
+        url, params = self._station_request("infrahoraire-6m", station_id, datetime)
+        req = await self._get_request(url, params=params)
+        return self._parse_station_csv(req.content, NAME_EXPLICIT_EN_6min, rename_columns)
+
+    async def get_paquet_horaire(self,
+                                 departement: int,
+                                 stations=None,
+                                 rename_columns: bool = True):
+        """Get the hourly data of all the stations of a department, in one request.
+
+        See :meth:`.Observations.get_paquet_horaire`.
+        """
+        url, params = self._paquet_request("horaire", departement=departement)
+        req = await self._get_request(url, params=params)
+        data = self._parse_station_csv(req.content, NAME_EXPLICIT_EN_HOURLY, rename_columns)
+        return self._filter_stations(data, stations)
+
+    async def get_paquet_6min(self,
+                              departement: int,
+                              stations=None,
+                              rename_columns: bool = True):
+        """Get the 6min data of all the stations of a department, in one request.
+
+        See :meth:`.Observations.get_paquet_6min`.
+        """
+        url, params = self._paquet_request("infrahoraire-6m", departement=departement)
+        req = await self._get_request(url, params=params)
+        data = self._parse_station_csv(req.content, NAME_EXPLICIT_EN_6min, rename_columns)
+        return self._filter_stations(data, stations)
+
+    async def get_paquet_stations_horaire(self,
+                                          datetime: str | None = None,
+                                          stations=None,
+                                          rename_columns: bool = True):
+        """Get the hourly data of all the stations, in one request.
+
+        See :meth:`.Observations.get_paquet_stations_horaire`.
+        """
+        url, params = self._paquet_request("stations/horaire", datetime=datetime)
+        req = await self._get_request(url, params=params)
+        data = self._parse_station_csv(req.content, NAME_EXPLICIT_EN_HOURLY, rename_columns)
+        return self._filter_stations(data, stations)
+
+    async def get_paquet_stations_6min(self,
+                                       datetime: str | None = None,
+                                       stations=None,
+                                       rename_columns: bool = True):
+        """Get the 6min data of all the stations, in one request.
+
+        See :meth:`.Observations.get_paquet_stations_6min`.
+        """
+        url, params = self._paquet_request("stations/infrahoraire-6m", datetime=datetime)
+        req = await self._get_request(url, params=params)
+        data = self._parse_station_csv(req.content, NAME_EXPLICIT_EN_6min, rename_columns)
+        return self._filter_stations(data, stations)
+
+    async def get_stations(self,
+                           station_ids,
+                           datetimes=None,
+                           frequency: str = "horaire",
+                           rename_columns: bool = True):
+        """Get the data of many stations, with concurrent requests.
+
+        The number of concurrent requests is bounded by `max_concurrency`.
+        See :meth:`.Observations.get_stations`.
+        """
+        items = self._station_items(station_ids, datetimes)
+        return await self._get_station_items(items, frequency, rename_columns)
+
+    async def _get_station_items(self, items, frequency, rename_columns=True):
+        """Fetch the ``(station_id, datetime)`` items concurrently, see :meth:`get_stations`."""
+        get_station = self._station_getter(frequency)
+        results = await asyncio.gather(
+            *[get_station(station_id, datetime, rename_columns) for station_id, datetime in items],
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, BaseException) and not isinstance(result, Exception):
+                raise result
+        return self._merge_stations(items, results)
+
+    async def sync_store(self, store, station_ids, start, end):
+        """Fetch the observations missing in a local store, and append them to it.
+
+        The store is read and written out of the event loop.
+        See :meth:`.Observations.sync_store`.
+        """
+        items = await asyncio.to_thread(self._missing_items, store, station_ids, start, end)
+        if not items:
+            return {}
+        data, errors = await self._get_station_items(items, store.frequency)
+        if len(data):
+            await asyncio.to_thread(store.append, data.reset_index(drop=True))
+        return errors
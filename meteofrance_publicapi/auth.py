@@ -0,0 +1,198 @@
+"""Tokens of the meteo-France API, shared by the clients and the processes.
+
+A token is requested with the application ID, and lasts one hour.
+Requesting a new token invalidates the previous one: if each client requested
+its own token, the clients would invalidate each other's.
+The :class:`TokenManager` therefore stores the token in a backend shared by
+all the clients of the same application ID:
+
+- :class:`FileTokenBackend`, the default, a JSON file shared by the processes
+  of the machine, guarded by a file lock,
+- :class:`MemoryTokenBackend`, shared by the clients of one process.
+
+Only one refresh runs at a time: the other requesters wait for the lock,
+and then use the token it stored.
+The token is refreshed :data:`REFRESH_MARGIN` seconds before its expiry,
+so that the requests do not fail with an expired token.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import requests
+
+from .cache import KeyLocks
+from .const import SUCCESS_CODE
+
+logger = logging.getLogger(__name__)
+
+#: The url of the token requests.
+TOKEN_URL = "https://portail-api.meteofrance.fr/token"
+#: The lifetime of a token, in seconds, when the response does not tell it.
+TOKEN_DURATION = 3600
+#: The number of seconds before the expiry of a token when it is refreshed.
+REFRESH_MARGIN = 300
+
+
+class MemoryTokenBackend:
+    """Store the tokens in memory, shared by the clients of a process."""
+
+    _entries = {}
+    _locks = {}
+    _locks_lock = threading.Lock()
+
+    def load(self, key):
+        """Return the entry of `key`, or None."""
+        return self._entries.get(key)
+
+    def save(self, key, entry):
+        """Store the entry of `key`."""
+        self._entries[key] = entry
+
+    @contextmanager
+    def lock(self, key):
+        """Hold the lock of `key`."""
+        with self._locks_lock:
+            lock = self._locks.setdefault(key, threading.Lock())
+        with lock:
+            yield
+
+
+class FileTokenBackend:
+    """Store the tokens in JSON files, shared by the processes of the machine.
+
+    The files are only readable by their owner.
+
+    Parameters
+    ----------
+    directory : str | pathlib.Path, optional
+        the directory of the files. By default, ``meteofrance`` in the temporary directory.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = Path(directory or Path(tempfile.gettempdir()) / "meteofrance")
+        self._locks = KeyLocks(self.directory)
+
+    def _path(self, key):
+        return self.directory / f"token-{key}.json"
+
+    def load(self, key):
+        """Return the entry of `key`, or None."""
+        try:
+            with open(self._path(key)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring the invalid token file {self._path(key)}: {e}")
+            return None
+
+    def save(self, key, entry):
+        """Store the entry of `key`."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+
+    def lock(self, key):
+        """Hold the lock of `key`, between the threads and the processes."""
+        return self._locks.lock(key)
+
+
+class TokenManager:
+    """Request, share and refresh the token of an application.
+
+    Parameters
+    ----------
+    application_id : str
+        the application ID, used to request the tokens.
+    backend : FileTokenBackend | MemoryTokenBackend, optional
+        where the token is shared. By default, a :class:`FileTokenBackend`.
+    token_url : str, optional
+        the url of the token requests.
+    refresh_margin : float, optional
+        the number of seconds before the expiry of a token when it is refreshed.
+    """
+
+    def __init__(
+        self,
+        application_id: str,
+        backend=None,
+        token_url: str = TOKEN_URL,
+        refresh_margin: float = REFRESH_MARGIN,
+    ):
+        self.application_id = application_id
+        self.backend = backend if backend is not None else FileTokenBackend()
+        self.token_url = token_url
+        self.refresh_margin = refresh_margin
+        # the key of the application in the backend, without the secret itself
+        self.key = hashlib.sha256(f"{token_url} {application_id}".encode()).hexdigest()[:16]
+        self.refreshes = 0  # the number of tokens requested by this manager
+        self._entry = None
+
+    def _is_valid(self, entry, invalid_token=None):
+        return (
+            entry is not None
+            and entry["token"] != invalid_token
+            and time.time() < entry["expires_at"] - self.refresh_margin
+        )
+
+    def needs_refresh(self, invalid_token=None):
+        """Whether :meth:`get_token` would read the backend or request a token."""
+        return not self._is_valid(self._entry, invalid_token)
+
+    def get_token(self, invalid_token: str | None = None):
+        """Return a valid token.
+
+        The token is read from the backend, and requested only if it is missing,
+        about to expire, or equal to `invalid_token`.
+
+        Parameters
+        ----------
+        invalid_token : str, optional
+            a token rejected by the API. If another requester already replaced it,
+            its replacement is used, else a new token is requested.
+
+        Returns
+        -------
+        str
+            the token.
+        """
+        if self._is_valid(self._entry, invalid_token):
+            return self._entry["token"]
+        entry = self.backend.load(self.key)
+        if not self._is_valid(entry, invalid_token):
+            with self.backend.lock(self.key):
+                # another requester may have refreshed the token while waiting for the lock
+                entry = self.backend.load(self.key)
+                if not self._is_valid(entry, invalid_token):
+                    entry = self._request_token()
+                    self.refreshes += 1
+                    self.backend.save(self.key, entry)
+        self._entry = entry
+        return entry["token"]
+
+    def _request_token(self):
+        """Request a new token to the API."""
+        logger.info("requesting a new token")
+        res = requests.post(
+            self.token_url,
+            data={"grant_type": "client_credentials"},
+            headers={"Authorization": "Basic " + self.application_id},
+        )
+        if res.status_code != SUCCESS_CODE:
+            raise ValueError(f"Could not get a token, error code: {res.status_code}")
+        data = res.json()
+        return {
+            "token": data["access_token"],
+            "expires_at": time.time() + float(data.get("expires_in", TOKEN_DURATION)),
+        }
@@ -0,0 +1,385 @@
+"""Size-bounded cache of the downloaded coverages.
+
+The coverages are stored as GeoTIFF files in ``cache_dir/coverageid/filename.tiff``,
+where the filename is built from the subset of the request
+(see :meth:`.AromeForecast.get_coverage`).
+The :class:`CoverageCache` adds to this layout:
+
+- an index of the cached files, in a SQLite database shared by all the processes
+  using the same directory,
+- atomic writes: the files are written to a temporary file, then renamed,
+  so that an interrupted download never leaves a truncated file in the cache,
+- locks, so that the threads and processes sharing the directory do not
+  download the same coverage at the same time,
+- the extent of each file, so that a request for a box contained in a cached file
+  can be answered by cropping it locally (see :meth:`CoverageCache.find_containing`),
+- an optional byte budget: when exceeded, the files of the oldest model runs,
+  and then the least recently used files, are evicted,
+- hit and miss statistics.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+
+from .catalog import parse_coverageid
+
+try:
+    import fcntl
+except ImportError:  # Windows: the locks only hold between threads
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILENAME = "index.sqlite"
+LOCK_FILENAME = "index.lock"
+#: The number of byte ranges of the lock file, used to lock the keys between processes.
+LOCK_SLOTS = 2**20
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS coverages (
+    path TEXT PRIMARY KEY,
+    coverageid TEXT,
+    height INTEGER,
+    time INTEGER,
+    lat_min REAL,
+    lat_max REAL,
+    long_min REAL,
+    long_max REAL,
+    run_time TEXT,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS coverages_extent
+ON coverages (coverageid, height, time, lat_min, lat_max, long_min, long_max);
+"""
+
+
+_lock_files = {}  # the lock files opened by the process, and the locks of their slots
+_lock_files_lock = threading.Lock()
+
+
+def _slot_lock(path, slot):
+    """Return the lock file of `path`, and the ``threading.Lock`` of one of its slots.
+
+    Each lock file is opened once per process and never closed:
+    the ``fcntl`` locks belong to the process, and closing any descriptor of the file
+    would release all of them, including the slots held by the other threads.
+    For the same reason, a slot is held by one thread of the process at a time.
+    """
+    path = os.path.abspath(path)
+    with _lock_files_lock:
+        if path not in _lock_files:
+            _lock_files[path] = (open(path, "a+b"), {})
+        f, slot_locks = _lock_files[path]
+        return f, slot_locks.setdefault(slot, threading.Lock())
+
+
+class KeyLocks:
+    """Locks on string keys, held between the threads and the processes.
+
+    Each key is mapped to a byte of a lock file of `directory`, chosen by hashing the key.
+    The threads of a process are synchronized by one ``threading.Lock`` per byte,
+    and the processes by a ``fcntl`` lock on the byte.
+    The keys mapped to the same byte are locked together.
+
+    Parameters
+    ----------
+    directory : pathlib.Path
+        the directory of the lock file.
+    filename : str, optional
+        the name of the lock file, by default :data:`LOCK_FILENAME`.
+    """
+
+    def __init__(self, directory, filename: str = LOCK_FILENAME):
+        self.directory = Path(directory)
+        self.filename = filename
+
+    @contextmanager
+    def lock(self, key):
+        """Hold the lock of `key`."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        slot = zlib.crc32(key.encode()) % LOCK_SLOTS
+        f, thread_lock = _slot_lock(self.directory / self.filename, slot)
+        with thread_lock:
+            if fcntl is None:
+                yield
+                return
+            fcntl.lockf(f, fcntl.LOCK_EX, 1, slot)
+            try:
+                yield
+            finally:
+                fcntl.lockf(f, fcntl.LOCK_UN, 1, slot)
+
+
+class CoverageCache:
+    """Index, locks and eviction of the coverage files of a cache directory.
+
+    Parameters
+    ----------
+    cache_dir : str | pathlib.Path
+        the cache directory.
+    max_bytes : int | None, optional
+        the maximum size of the cached coverages, in bytes.
+        If None, the default, the cache is not bounded.
+    """
+
+    def __init__(self, cache_dir, max_bytes: int | None = None):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._key_locks = KeyLocks(self.cache_dir)
+        self._index_ready = False
+
+    @property
+    def index_path(self):
+        """The path of the SQLite index."""
+        return self.cache_dir / INDEX_FILENAME
+
+    @contextmanager
+    def _index(self):
+        """Open a transaction on the index, creating it if needed."""
+        if not self._index_ready:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.index_path, timeout=30)
+        try:
+            if not self._index_ready:
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.executescript(_SCHEMA)
+                connection.commit()
+                self._index_ready = True
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def _key(self, path):
+        return str(Path(path).relative_to(self.cache_dir))
+
+    def get(self, path):
+        """Return whether `path` is cached, and mark it as used.
+
+        The files written before the index existed are added to it.
+
+        Parameters
+        ----------
+        path : pathlib.Path
+            the path of the coverage file, in the cache directory.
+
+        Returns
+        -------
+        bool
+            True if the file is cached.
+        """
+        path = Path(path)
+        key = self._key(path)
+        now = time.time()
+        with self._index() as connection:
+            updated = connection.execute(
+                "UPDATE coverages SET accessed = ? WHERE path = ?", (now, key)
+            ).rowcount
+            if updated and not path.exists():
+                connection.execute("DELETE FROM coverages WHERE path = ?", (key,))
+                updated = 0
+            elif not updated and path.exists():
+                self._insert(connection, key, path.stat().st_size, now)
+                updated = 1
+        if updated:
+            self.hits += 1
+            logger.debug(f"cache hit: {key}")
+            return True
+        self.misses += 1
+        logger.debug(f"cache miss: {key}")
+        return False
+
+    def put(self, path, content, coverageid=None, height=None, time=None, lat=None, long=None):
+        """Write a coverage to the cache.
+
+        The content is written to a temporary file, which is then renamed to `path`.
+        The files of the oldest runs are evicted if the cache exceeds its byte budget.
+
+        Parameters
+        ----------
+        path : pathlib.Path
+            the path of the coverage file, in the cache directory.
+        content : bytes
+            the content of the file.
+        coverageid, height, time, lat, long : optional
+            the parameters of the request, stored in the index.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+        self.register(path, coverageid, height, time, lat, long)
+
+    @staticmethod
+    def part_path(path):
+        """Return the path of the partial download of `path`.
+
+        The partial file is kept when a download is interrupted, so that it can be resumed.
+        """
+        path = Path(path)
+        return path.with_name(f".{path.name}.part")
+
+    def commit(self, part_path, path, coverageid=None, height=None, time=None, lat=None, long=None):
+        """Move a completed download to `path`, and add it to the cache.
+
+        See :meth:`put` for the parameters.
+        """
+        os.replace(part_path, path)
+        self.register(path, coverageid, height, time, lat, long)
+
+    def register(self, path, coverageid=None, height=None, time=None, lat=None, long=None):
+        """Add a file already written in the cache directory to the index.
+
+        See :meth:`put` for the parameters.
+        """
+        path = Path(path)
+        key = self._key(path)
+        with self._index() as connection:
+            self._insert(
+                connection, key, path.stat().st_size, _now(),
+                coverageid, height, time, lat, long,
+            )
+        if self.max_bytes is not None:
+            # the file just added is returned to the caller, even if it is of an old run
+            self.evict(self.max_bytes, keep=key)
+
+    @staticmethod
+    def _insert(connection, key, size, now, coverageid=None, height=None, time=None, lat=None, long=None):
+        if coverageid is None:
+            coverageid = Path(key).parent.name
+        lat = lat or (None, None)
+        long = long or (None, None)
+        connection.execute(
+            "INSERT OR REPLACE INTO coverages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                key, coverageid, height, time, lat[0], lat[1], long[0], long[1],
+                parse_coverageid(coverageid).run_time, size, now, now,
+            ),
+        )
+
+    def find_containing(self, coverageid, height, time, lat, long):
+        """Return a cached file containing the box of a request, if any.
+
+        Parameters
+        ----------
+        coverageid, height, time:
+            the coverage ID, height and forecast time of the request.
+        lat : tuple[float]
+            the min and max latitude of the request.
+        long : tuple[float]
+            the min and max longitude of the request.
+
+        Returns
+        -------
+        pathlib.Path | None
+            the smallest cached file which extent contains the box, or None.
+        """
+        with self._index() as connection:
+            rows = connection.execute(
+                """
+                SELECT path FROM coverages
+                WHERE coverageid = ? AND height = ? AND time = ?
+                AND lat_min <= ? AND lat_max >= ? AND long_min <= ? AND long_max >= ?
+                ORDER BY (lat_max - lat_min) * (long_max - long_min)
+                """,
+                (coverageid, height, time, lat[0], lat[1], long[0], long[1]),
+            ).fetchall()
+        for (key,) in rows:
+            path = self.cache_dir / key
+            if path.exists():
+                return path
+        return None
+
+    def evict(self, max_bytes, keep=None):
+        """Remove files until the cache holds at most `max_bytes`.
+
+        The files of the oldest model runs are removed first,
+        and then the least recently used ones.
+
+        Parameters
+        ----------
+        max_bytes : int
+            the byte budget of the cache.
+        keep : str, optional
+            the key of a file which is never removed.
+
+        Returns
+        -------
+        int
+            the number of removed files.
+        """
+        removed = 0
+        with self._index() as connection:
+            total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM coverages").fetchone()[0]
+            if total <= max_bytes:
+                return 0
+            rows = connection.execute(
+                "SELECT path, size FROM coverages WHERE path IS NOT ? ORDER BY run_time, accessed",
+                (keep,),
+            ).fetchall()
+            for key, size in rows:
+                if total <= max_bytes:
+                    break
+                try:
+                    (self.cache_dir / key).unlink()
+                except FileNotFoundError:
+                    pass
+                connection.execute("DELETE FROM coverages WHERE path = ?", (key,))
+                total -= size
+                removed += 1
+        self.evictions += removed
+        logger.debug(f"evicted {removed} files from the cache")
+        return removed
+
+    def oldest_run(self):
+        """Return the run time of the oldest cached coverage, or None if the cache is empty."""
+        with self._index() as connection:
+            return connection.execute("SELECT MIN(run_time) FROM coverages").fetchone()[0]
+
+    def lock(self, path):
+        """Lock `path` between the threads and the processes using the cache.
+
+        Use it around the download of a coverage, so that it is downloaded once.
+        """
+        return self._key_locks.lock(self._key(path))
+
+    def stats(self):
+        """Return the statistics of the cache.
+
+        Returns
+        -------
+        dict
+            the number of ``hits``, ``misses`` and ``evictions`` of this instance,
+            and the number of ``files`` and ``bytes`` in the cache.
+        """
+        with self._index() as connection:
+            files, size = connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM coverages"
+            ).fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "files": files,
+            "bytes": size,
+        }
+
+
+def _now():
+    return time.time()
@@ -0,0 +1,214 @@
+"""Parsing and persistent cache of the WCS capabilities.
+
+The GetCapabilities document of a model lists thousands of coverages.
+It is parsed incrementally by :class:`CoverageSummaryParser`, while it is downloaded,
+so that only the coverage summaries are kept in memory.
+
+Fetching and parsing the document still takes seconds.
+The list of coverage IDs is therefore stored on disk, as JSON, and reused
+until the next run of the model is expected to be published.
+After that, the document is revalidated with the ``ETag`` and ``Last-Modified``
+headers of the previous response, when the server provides them.
+"""
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from xml.etree.ElementTree import XMLPullParser
+
+logger = logging.getLogger(__name__)
+
+HOUR = 3600
+#: The size of the chunks of the streamed GetCapabilities responses, in bytes.
+CHUNK_SIZE = 64 * 1024
+
+
+def _local_name(tag):
+    """Remove the namespace of an XML tag."""
+    return tag.rsplit("}", 1)[-1]
+
+
+class CoverageSummaryParser:
+    """Incremental parser of the ``wcs:CoverageSummary`` of a GetCapabilities document.
+
+    The document is fed by chunks with :meth:`feed`, which returns the coverage summaries
+    completed by the chunk. Each summary is a dict of its child elements,
+    without namespace, for instance
+    ``{"CoverageId": "TEMPERATURE__...", "CoverageSubtype": "ReferenceableGridCoverage"}``.
+    The parsed elements are discarded, so that the memory stays flat
+    whatever the size of the document.
+    """
+
+    def __init__(self):
+        self._parser = XMLPullParser(events=("start", "end"))
+        self._stack = []
+
+    def feed(self, chunk):
+        """Parse a chunk of the document.
+
+        Parameters
+        ----------
+        chunk : bytes
+            the next bytes of the document.
+
+        Returns
+        -------
+        list[dict]
+            the coverage summaries completed by the chunk.
+        """
+        self._parser.feed(chunk)
+        return self._read_events()
+
+    def close(self):
+        """Finish the parsing, and return the last coverage summaries."""
+        self._parser.close()
+        return self._read_events()
+
+    def _read_events(self):
+        summaries = []
+        for event, elem in self._parser.read_events():
+            if event == "start":
+                self._stack.append(elem)
+                continue
+            self._stack.pop()
+            if _local_name(elem.tag) == "CoverageSummary":
+                summaries.append(
+                    {_local_name(child.tag): child.text for child in elem}
+                )
+                if self._stack:
+                    self._stack[-1].remove(elem)
+        return summaries
+
+
+def iter_coverage_summaries(chunks):
+    """Yield the coverage summaries of a GetCapabilities document.
+
+    Parameters
+    ----------
+    chunks : Iterable[bytes]
+        the document, by chunks. For instance ``response.iter_content(CHUNK_SIZE)``.
+
+    Yields
+    ------
+    dict
+        the coverage summaries, see :class:`CoverageSummaryParser`.
+    """
+    parser = CoverageSummaryParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+def next_run_publication(run_interval_hours, publication_delay_hours, now=None):
+    """Return the timestamp of the next expected publication of a model run.
+
+    The runs of a model start every `run_interval_hours` from 00 UTC,
+    and are published `publication_delay_hours` later.
+
+    Parameters
+    ----------
+    run_interval_hours : float
+        the number of hours between two runs.
+    publication_delay_hours : float
+        the number of hours between the start of a run and its publication.
+    now : float, optional
+        the current timestamp, in seconds. By default, the current time.
+
+    Returns
+    -------
+    float
+        the timestamp of the next publication.
+    """
+    now = time.time() if now is None else now
+    interval = run_interval_hours * HOUR
+    delay = publication_delay_hours * HOUR
+    return ((now - delay) // interval + 1) * interval + delay
+
+
+class CapabilitiesCache:
+    """On-disk cache of the coverage IDs listed by the GetCapabilities requests.
+
+    Each entry is a JSON file named after its key, for instance
+    ``MF-NWP-HIGHRES-AROME-001-FRANCE-WCS.json``, containing:
+
+    - ``coverage_ids``: the list of coverage IDs,
+    - ``fetched_at``: the timestamp of the last (re)validation,
+    - ``expires_at``: the timestamp after which the entry must be revalidated,
+    - ``etag`` and ``last_modified``: the validators of the response, if any.
+
+    Parameters
+    ----------
+    cache_dir : str | pathlib.Path
+        the directory of the cache.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir)
+
+    def _path(self, key):
+        return self.cache_dir / f"{key}.json"
+
+    def load(self, key):
+        """Return the entry of `key`, or None if it is not cached."""
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring the invalid capabilities cache {path}: {e}")
+            return None
+
+    def save(self, key, coverage_ids, expires_at, etag=None, last_modified=None):
+        """Store the coverage IDs of `key`.
+
+        Parameters
+        ----------
+        key : str
+            the key of the entry.
+        coverage_ids : list[str]
+            the coverage IDs.
+        expires_at : float
+            the timestamp after which the entry must be revalidated.
+        etag : str, optional
+            the ``ETag`` header of the response.
+        last_modified : str, optional
+            the ``Last-Modified`` header of the response.
+
+        Returns
+        -------
+        dict
+            the stored entry.
+        """
+        entry = {
+            "coverage_ids": coverage_ids,
+            "fetched_at": time.time(),
+            "expires_at": expires_at,
+            "etag": etag,
+            "last_modified": last_modified,
+        }
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(entry, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+        return entry
+
+    @staticmethod
+    def is_fresh(entry, now=None):
+        """Whether the entry can be used without revalidation."""
+        now = time.time() if now is None else now
+        return now < entry["expires_at"]
+
+    @staticmethod
+    def validators(entry):
+        """The headers of a conditional request revalidating the entry."""
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
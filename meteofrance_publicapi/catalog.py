@@ -0,0 +1,183 @@
+"""Indexed catalog of the coverage IDs of a forecast service.
+
+A coverage ID is made of the parameter name, the level type, the run time of
+the model and, for the cumulated parameters, the accumulation period.
+For instance::
+
+    TEMPERATURE__SPECIFIC_HEIGHT_LEVEL_ABOVE_GROUND___2024-03-20T06.00.00Z
+    TOTAL_PRECIPITATION__GROUND_OR_WATER_SURFACE___2024-03-20T06.00.00Z_PT1H
+
+The :class:`CoverageCatalog` parses the IDs once, and indexes them by name and by run time.
+"""
+from bisect import bisect_left
+from typing import NamedTuple
+
+
+class CoverageID(NamedTuple):
+    """The parts of a coverage ID."""
+
+    #: the full coverage ID
+    coverage_id: str
+    #: the name of the coverage, that is the prefix before the run time.
+    #: For instance "TEMPERATURE__SPECIFIC_HEIGHT_LEVEL_ABOVE_GROUND".
+    name: str
+    #: the parameter, for instance "TEMPERATURE"
+    parameter: str
+    #: the level type, for instance "SPECIFIC_HEIGHT_LEVEL_ABOVE_GROUND"
+    level_type: str
+    #: the run time of the model, for instance "2024-03-20T06.00.00Z"
+    run_time: str
+    #: the accumulation period, for instance "PT1H", or "" if any.
+    period: str
+
+
+def parse_coverageid(coverage_id):
+    """Split a coverage ID into its parts.
+
+    Parameters
+    ----------
+    coverage_id : str
+        the coverage ID.
+
+    Returns
+    -------
+    CoverageID
+        the parts of the coverage ID.
+    """
+    name, _, run = coverage_id.partition("___")
+    run_time, _, period = run.partition("_")
+    parameter, _, level_type = name.partition("__")
+    return CoverageID(coverage_id, name, parameter, level_type, run_time, period)
+
+
+class CoverageCatalog:
+    """The coverage IDs of a service, indexed by name and by run time.
+
+    Parameters
+    ----------
+    coverage_ids : Iterable[str]
+        the coverage IDs listed by the capabilities.
+
+    Notes
+    -----
+    The run times are ISO 8601 strings, hence their alphabetical order is
+    the chronological order.
+    """
+
+    def __init__(self, coverage_ids):
+        self.coverage_ids = list(coverage_ids)
+        self._by_name = {}  # name -> sorted coverage IDs
+        self._runs_by_name = {}  # name -> sorted run times
+        self._by_run = {}  # run time -> name -> coverage IDs
+        for coverage_id in self.coverage_ids:
+            parts = parse_coverageid(coverage_id)
+            self._by_name.setdefault(parts.name, []).append(coverage_id)
+            self._runs_by_name.setdefault(parts.name, set()).add(parts.run_time)
+            self._by_run.setdefault(parts.run_time, {}).setdefault(parts.name, []).append(coverage_id)
+        for coverage_ids_of_name in self._by_name.values():
+            coverage_ids_of_name.sort()
+        self._runs_by_name = {name: sorted(runs) for name, runs in self._runs_by_name.items()}
+        #: the sorted names of the coverages
+        self.names = sorted(self._by_name)
+        #: the sorted run times
+        self.run_times = sorted(self._by_run)
+
+    def __len__(self):
+        return len(self.coverage_ids)
+
+    def __contains__(self, coverage_id):
+        parts = parse_coverageid(coverage_id)
+        return coverage_id in self._by_run.get(parts.run_time, {}).get(parts.name, ())
+
+    def names_with_prefix(self, prefix):
+        """Return the sorted names starting with `prefix`."""
+        start = bisect_left(self.names, prefix)
+        names = []
+        for name in self.names[start:]:
+            if not name.startswith(prefix):
+                break
+            names.append(name)
+        return names
+
+    def coverageids_of_name(self, coverage_name):
+        """Return the sorted coverage IDs starting with `coverage_name`.
+
+        Parameters
+        ----------
+        coverage_name : str
+            the name of the coverage, or a prefix of the coverage IDs.
+
+        Returns
+        -------
+        list[str]
+            the coverage IDs, sorted. Empty if none matches.
+        """
+        if coverage_name in self._by_name:
+            return list(self._by_name[coverage_name])
+        if "___" in coverage_name:
+            name = coverage_name.partition("___")[0]
+            return [
+                coverage_id
+                for coverage_id in self._by_name.get(name, ())
+                if coverage_id.startswith(coverage_name)
+            ]
+        return sorted(
+            coverage_id
+            for name in self.names_with_prefix(coverage_name)
+            for coverage_id in self._by_name[name]
+        )
+
+    def runs(self, name):
+        """Return the sorted run times available for the coverage `name`."""
+        return list(self._runs_by_name.get(name, ()))
+
+    def latest_run(self, name=None):
+        """Return the latest run time, of the coverage `name` if given.
+
+        Raises
+        ------
+        ValueError
+            if no run is available.
+        """
+        runs = self.run_times if name is None else self._runs_by_name.get(name)
+        if not runs:
+            raise ValueError(f"No run found for {name}")
+        return runs[-1]
+
+    def latest(self, name):
+        """Return the coverage ID of the latest run of the coverage `name`.
+
+        Raises
+        ------
+        ValueError
+            if no coverage ID is found.
+        """
+        coverage_ids = self._by_run.get(self.latest_run(name), {}).get(name)
+        if not coverage_ids:
+            raise ValueError(f"No coverage ID found for {name}")
+        return max(coverage_ids)
+
+    def coverageid(self, name, run_time):
+        """Return the coverage ID of the coverage `name` for a run.
+
+        Raises
+        ------
+        ValueError
+            if no coverage ID is found.
+        """
+        coverage_ids = self._by_run.get(run_time, {}).get(name)
+        if not coverage_ids:
+            raise ValueError(f"No coverage ID found for {name} at {run_time}")
+        return max(coverage_ids)
+
+    def names_of_run(self, run_time):
+        """Return the sorted names of the coverages available for a run."""
+        return sorted(self._by_run.get(run_time, {}))
+
+    def coverageids_of_run(self, run_time):
+        """Return the sorted coverage IDs of a run."""
+        return sorted(
+            coverage_id
+            for coverage_ids in self._by_run.get(run_time, {}).values()
+            for coverage_id in coverage_ids
+        )
@@ -1,5 +1,7 @@
 EXPIRED_TOKEN_CODE = 401
 SUCCESS_CODE = 200
+PARTIAL_CONTENT_CODE = 206
+NOT_MODIFIED_CODE = 304
 PARAMETER_ERROR_CODE = 400
 INVALID_TOKEN_CODE = 401
 FORBIDDEN_CODE = 403
@@ -8,3 +10,4 @@ INTERNAL_ERROR_CODE = 500
 UNUVAILABLE_CODE = 503
 BACKEND_ERROR_CODE = 504
 MISSING_DATA_CODE = 404
+RANGE_NOT_SATISFIABLE_CODE = 416
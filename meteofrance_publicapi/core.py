@@ -1,24 +1,91 @@
 """Core module for the meteofranceapi package."""
-from pathlib import Path
 import time
 import requests
+from requests.adapters import HTTPAdapter
 import logging
-from .const import EXPIRED_TOKEN_CODE, SUCCESS_CODE, PARAMETER_ERROR_CODE, MISSING_DATA_CODE
-from .errors import MissingParameterError, MissingDataError
+from .const import (
+    EXPIRED_TOKEN_CODE,
+    SUCCESS_CODE,
+    NOT_MODIFIED_CODE,
+    PARTIAL_CONTENT_CODE,
+    RANGE_NOT_SATISFIABLE_CODE,
+    PARAMETER_ERROR_CODE,
+    MISSING_DATA_CODE,
+    THROTTLED_CODE,
+)
+from .auth import TOKEN_URL, TokenManager
+from .instrumentation import endpoint_name, make_instrumentation
+from .errors import MissingParameterError, MissingDataError, ThrottledError, ServerError
+from .ratelimit import (
+    DEFAULT_BACKOFF_FACTOR,
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_RATE_LIMIT,
+    RETRY_CODES,
+    make_rate_limiter,
+    retry_delay,
+)
 logger = logging.getLogger(__name__)
 
+#: The maximum number of connections kept alive by the session,
+#: so that the session can be shared by a pool of threads.
+POOL_MAXSIZE = 32
+
 class MeteoFranceAPI:
+    #: The url of the token requests.
+    token_url = TOKEN_URL
+
     def __init__(self,
                  api_key: str | None = None,
                  token: str | None = None,
                  application_id: str | None = None,
+                 rate_limit=DEFAULT_RATE_LIMIT,
+                 max_retries: int = DEFAULT_MAX_RETRIES,
+                 backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+                 token_manager: TokenManager | None = None,
+                 instrumentation=None,
                  ):
         """Init the MeteoFranceAPI object.
+
+        Parameters
+        ----------
+        api_key : str | None, optional
+            The API Key, by default None
+        token : str | None, optional
+            The API Token, by default None
+        application_id : str | None, optional
+            The Application ID, by default None
+        rate_limit : float | RateLimiter | None, optional
+            The maximum number of requests per minute,
+            by default :data:`.DEFAULT_RATE_LIMIT` (the quota of the portal).
+            A :class:`.RateLimiter` can be given to share the quota between clients.
+            If None, the requests are not limited.
+        max_retries : int, optional
+            The number of retries of the throttled (429) or failed (500, 503, 504) requests,
+            by default :data:`.DEFAULT_MAX_RETRIES`.
+        backoff_factor : float, optional
+            The base delay of the exponential backoff between retries, in seconds.
+        token_manager : TokenManager | None, optional
+            The manager of the tokens of `application_id`.
+            By default, a :class:`.TokenManager` sharing the token in a file
+            with the other clients and processes of the machine.
+        instrumentation : Instrumentation | Callable | Iterable[Callable] | None, optional
+            The :class:`.Instrumentation` the requests and the cache lookups are reported to,
+            or its callbacks. By default, an instrumentation without callback.
         """
         self.api_key = api_key
         self.token = token
         self.application_id = application_id
+        if token_manager is None and application_id is not None:
+            token_manager = TokenManager(application_id, token_url=self.token_url)
+        self.token_manager = token_manager
+        self._token_managed = False  # whether self.token comes from the token manager
+        self.rate_limiter = make_rate_limiter(rate_limit)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.instrumentation = make_instrumentation(instrumentation)
         self.session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=POOL_MAXSIZE)
+        self.session.mount("https://", adapter)
         self.connect()
 
     def connect(self):
@@ -43,42 +110,36 @@ class MeteoFranceAPI:
         """request a token from the meteo-France API.
 
         The token lasts 1 hour, and is used to authenticate the user.
-        If a new token is requested before the previous one expires, the previous one is invalidated.
-        A local cache is used to avoid requesting a new token at each run of the script.
+        If a new token is requested before the previous one expires, the previous one is invalidated:
+        the token is therefore shared with the other clients by the :attr:`token_manager`,
+        and only requested when it is about to expire.
         """
-        # cache the token for 1 hour
-        TOKEN_DURATION_S = 3600
-        local_tmp_cache = Path("/tmp/meteofrance/arome/")
-        cache_filename = local_tmp_cache / "token.txt"
-        cache_time_filename = local_tmp_cache / "token_time.txt"
-
-        if cache_filename.exists() and cache_time_filename.exists():
-            logger.debug("reading token from cache")
-            with open(cache_time_filename) as f:
-                cache_time = float(f.read())
-            if cache_time >= (time.time() - TOKEN_DURATION_S ):
-                with open(cache_filename) as f:
-                    token = f.read()
-                return token
-
-        token_entrypoint = " https://portail-api.meteofrance.fr/token"
-        params = {"grant_type": "client_credentials"}
-        header = {"Authorization": "Basic " + self.application_id}
-        res = requests.post(token_entrypoint,
-                                   params=params,
-                                   headers=header
-                                   )
-        self.token = res.json()["access_token"]
-        # save token to file
-        local_tmp_cache.mkdir(parents=True, exist_ok=True)
-        with open(cache_filename, "w") as f:
-            f.write(self.token)
-        with open(cache_time_filename, "w") as f:
-            f.write(str(time.time()))
+        if self.token_manager is None:
+            raise ValueError("application_id must be provided to get a token")
+        self._refresh_token()
         return self.token
 
+    def _refresh_token(self, invalid_token=None):
+        """Get a valid token from the token manager, and authenticate the session with it.
+
+        A token event is only emitted if the token manager requested a new token,
+        not if it reused the shared one.
+        """
+        start = time.perf_counter()
+        refreshes = self.token_manager.refreshes
+        token = self.token_manager.get_token(invalid_token)
+        self._token_managed = True
+        if self.token_manager.refreshes != refreshes:
+            self.instrumentation.emit("token", "refresh", duration=time.perf_counter() - start)
+        if token != self.token:
+            self.token = token
+            self.session.headers.update({"Authorization": "Bearer " + token})
 
-    def _get_request(self, url, params=None):
+    def _uses_token_manager(self):
+        """Whether the requests are authenticated with a token of the token manager."""
+        return self.api_key is None and self.token_manager is not None
+
+    def _get_request(self, url, params=None, headers=None, stream=False):
         """Make a get request to the API.
 
         Parameters
@@ -87,6 +148,11 @@ class MeteoFranceAPI:
             the url to request
         params : dict
             the parameters to pass to the request
+        headers : dict, optional
+            additional headers, for instance for a conditional request
+        stream : bool, optional
+            do not download the body of a successful response at once,
+            so that it can be iterated with ``res.iter_content``.
 
         Returns
         -------
@@ -94,23 +160,100 @@ class MeteoFranceAPI:
             the response of the request
         """
         logger.debug(f"GET {url}")
-        res = self.session.get(url, params=params)
-        if self._token_expired(res):
-            logger.info("token expired, requesting a new one")
-            self.get_token()
-            self.connect()
-            res = self.session.get(url, params=params)
+        for attempt in range(self.max_retries + 1):
+            if self._token_managed:
+                # refresh the token before it expires
+                self._refresh_token()
+            res = self._send(url, params, headers, stream, attempt)
+            if self._token_expired(res) and self._uses_token_manager():
+                logger.info("token expired, requesting a new one")
+                res.close()
+                self._refresh_token(invalid_token=self.token)
+                res = self._send(url, params, headers, stream, attempt)
+            if not self._should_retry(res, attempt):
+                break
+            delay = retry_delay(res, attempt, self.backoff_factor)
+            logger.warning(f"error code: {res.status_code}, retrying in {delay:.1f}s")
+            self._emit_retry(url, res, attempt, delay)
+            res.close()
+            time.sleep(delay)
+        return self._check_response(res)
+
+    def _send(self, url, params, headers=None, stream=False, attempt=0):
+        """Send one request, within the rate limit, and report its response."""
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        start = time.perf_counter()
+        res = self.session.get(url, params=params, headers=headers, stream=stream)
+        self._emit_request(url, res, start, attempt, stream)
+        return res
+
+    def _emit_request(self, url, res, start, attempt, stream):
+        """Report a response to the instrumentation.
+
+        The size of a streamed response is its ``Content-Length``, if any.
+        Shared by the synchronous and asynchronous clients.
+        """
+        if not self.instrumentation.enabled:
+            return
+        duration = time.perf_counter() - start
+        nbytes = res.headers.get("Content-Length")
+        if not stream:
+            nbytes = len(res.content)
+        self.instrumentation.emit(
+            "request", endpoint_name(url), duration=duration, status=res.status_code,
+            nbytes=None if nbytes is None else int(nbytes), attempt=attempt,
+        )
+
+    def _emit_retry(self, url, res, attempt, delay):
+        """Report a retried request to the instrumentation."""
+        self.instrumentation.emit(
+            "retry", endpoint_name(url), duration=delay, status=res.status_code, attempt=attempt
+        )
+
+    def _should_retry(self, res, attempt):
+        """Whether a throttled or failed request should be retried."""
+        return res.status_code in RETRY_CODES and attempt < self.max_retries
+
+    def _check_response(self, res):
+        """Map the status code of a response to the package errors.
+
+        Shared by the synchronous and asynchronous clients.
+
+        Parameters
+        ----------
+        res : requests.Response | httpx.Response
+            the response to check
+
+        Returns
+        -------
+        requests.Response | httpx.Response
+            the response, if successful
+        """
         if self._token_expired(res):
             raise ValueError("token expired but could not get a new one")
         error_code = res.status_code
         if error_code == SUCCESS_CODE:
             logger.debug("request successful")
+        if error_code == NOT_MODIFIED_CODE:
+            logger.debug("resource not modified")
+            return res
+        if error_code in (PARTIAL_CONTENT_CODE, RANGE_NOT_SATISFIABLE_CODE):
+            # the answers of a range request, handled by the caller
+            logger.debug(f"range request answered with {error_code}")
+            return res
         if error_code == PARAMETER_ERROR_CODE:
             logger.error("parameter error")
             raise MissingParameterError(res.text)
         if error_code == MISSING_DATA_CODE:
             logger.error("missing data")
             raise MissingDataError(res.text)
+        if error_code == THROTTLED_CODE:
+            logger.error("too many requests")
+            raise ThrottledError(res.text)
+        if error_code in RETRY_CODES:
+            logger.error(f"server error code: {error_code}")
+            raise ServerError(error_code, res.text)
         if error_code != SUCCESS_CODE:
             # Quick and dirty error handling
             # TODO: implement a proper error handling
@@ -130,9 +273,12 @@ class MeteoFranceAPI:
         """
         status = res.status_code
         if status == EXPIRED_TOKEN_CODE:
-            if "application/json" in res.headers["Content-Type"]:
-                data = res.text()
-                if "Invalid JWT token" in data["description"]:
+            if "application/json" in res.headers.get("Content-Type", ""):
+                try:
+                    data = res.json()
+                except ValueError:
+                    return False
+                if "Invalid JWT token" in str(data.get("description", "")):
                     return True
         return False
 
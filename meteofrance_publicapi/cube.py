@@ -0,0 +1,102 @@
+"""Lazy (time, lat, lon) cubes of forecast rasters.
+
+Each forecast time of a coverage is a separate tiff file.
+:func:`build_cube` assembles them in a ``xarray.DataArray`` backed by a chunked
+``dask`` array: nothing is decoded until a computation needs it,
+and then only the blocks of the files covered by the needed chunks are read.
+
+It requires the ``xarray`` and ``dask`` packages::
+
+    pip install meteofrance-publicapi[cube]
+"""
+import numpy as np
+import rasterio
+from rasterio.windows import Window
+
+from .forecast import DEFAULT_CHUNK_SIZE
+
+
+class TiffArray:
+    """Read-only array view of the first band of a tiff file.
+
+    Indexing it with slices reads only the corresponding window of the file.
+    The masked values are NaN.
+
+    Parameters
+    ----------
+    filename : pathlib.Path
+        the tiff file.
+    """
+
+    ndim = 2
+
+    def __init__(self, filename):
+        self.filename = filename
+        with rasterio.open(filename) as src:
+            self.shape = src.shape
+            self.dtype = np.result_type(src.dtypes[0], np.float32)
+            self.transform = src.transform
+
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            key = (key,)
+        key = key + (slice(None),) * (self.ndim - len(key))
+        (row_start, row_stop, _), (col_start, col_stop, _) = (
+            index.indices(size) for index, size in zip(key, self.shape)
+        )
+        window = Window(col_start, row_start, max(col_stop - col_start, 0), max(row_stop - row_start, 0))
+        with rasterio.open(self.filename) as src:
+            field = src.read(1, window=window, masked=True)
+        return np.ma.filled(field.astype(self.dtype), np.nan)
+
+
+def build_cube(filenames, times, chunks=DEFAULT_CHUNK_SIZE, name=None):
+    """Assemble tiff files sharing the same grid in a lazy (time, lat, lon) cube.
+
+    Parameters
+    ----------
+    filenames : list[pathlib.Path]
+        the tiff files, one per forecast time.
+    times : list[int]
+        the forecast time of each file, in seconds.
+    chunks : int, optional
+        the size of the spatial chunks, in pixels. Each time is a separate chunk.
+    name : str, optional
+        the name of the DataArray.
+
+    Returns
+    -------
+    xarray.DataArray
+        the cube, with the coordinates ``time`` (in seconds), ``lat`` and ``lon``
+        (the centers of the pixels).
+    """
+    try:
+        import dask.array as da
+        import xarray as xr
+    except ImportError as e:
+        raise ImportError(
+            "The forecast cubes require xarray and dask: "
+            "pip install meteofrance-publicapi[cube]"
+        ) from e
+    if len(filenames) != len(times):
+        raise ValueError("filenames and times must have the same length")
+    if not filenames:
+        raise ValueError("No file to assemble")
+    arrays = [TiffArray(filename) for filename in filenames]
+    reference = arrays[0]
+    for array in arrays[1:]:
+        if array.shape != reference.shape or array.transform != reference.transform:
+            raise ValueError(f"{array.filename} is not on the grid of {reference.filename}")
+    data = da.stack(
+        [da.from_array(array, chunks=chunks, asarray=True, name=False) for array in arrays]
+    )
+    transform = reference.transform
+    height, width = reference.shape
+    lon = transform.c + transform.a * (np.arange(width) + 0.5)
+    lat = transform.f + transform.e * (np.arange(height) + 0.5)
+    return xr.DataArray(
+        data,
+        dims=("time", "lat", "lon"),
+        coords={"time": list(times), "lat": lat, "lon": lon},
+        name=name,
+    )
@@ -0,0 +1,383 @@
+"""Parsed descriptions of the coverages, and validation of the coverage requests.
+
+The DescribeCoverage document of a coverage gives its grid: the box and the
+resolution of the rasters, and the heights and forecast times of the slices.
+:func:`parse_description` reads it into a :class:`CoverageDescription`,
+which checks the ``(height, time, lat, long)`` of a GetCoverage request before it is sent,
+and lists the available slices of a bulk download.
+
+A coverage ID belongs to one model run, so its description never changes:
+the descriptions are stored on disk by :class:`DescriptionCache`, as JSON,
+until their run is older than the coverages kept in the cache directory.
+"""
+import json
+import logging
+import os
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import NamedTuple
+from xml.etree import ElementTree
+
+from .capabilities import _local_name
+from .catalog import parse_coverageid
+
+logger = logging.getLogger(__name__)
+
+#: The ways of checking a request, see :meth:`CoverageDescription.validate`.
+VALIDATE_MODES = ("raise", "clamp")
+#: The default number of descriptions kept in memory by :class:`DescriptionCache`.
+DEFAULT_MAX_DESCRIPTIONS = 256
+
+
+def _nearest(values, value):
+    """Return the item of the sorted `values` the nearest to `value`."""
+    i = bisect_left(values, value)
+    candidates = values[max(i - 1, 0):i + 1]
+    return min(candidates, key=lambda candidate: abs(candidate - value))
+
+
+def _number(value):
+    """Convert a coordinate to an int if it is integral."""
+    return int(value) if float(value).is_integer() else value
+
+
+def _timestamp(text):
+    """Convert an ISO 8601 time, such as "2024-03-20T06:00:00Z", to a UTC timestamp."""
+    time = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    if time.tzinfo is None:
+        time = time.replace(tzinfo=timezone.utc)
+    return time.timestamp()
+
+
+def _run_timestamp(coverage_id):
+    """Return the UTC timestamp of the run time of a coverage ID."""
+    date, _, hour = parse_coverageid(coverage_id).run_time.partition("T")
+    return _timestamp(f"{date}T{hour.replace('.', ':')}")
+
+
+def _crs_name(srs_name):
+    """Shorten a CRS URI, such as "http://www.opengis.net/def/crs/EPSG/0/4326", to "EPSG:4326"."""
+    parts = srs_name.rstrip("/").split("/")
+    if len(parts) >= 3 and parts[-3] == "EPSG":
+        return f"EPSG:{parts[-1]}"
+    return srs_name
+
+
+class CoverageDescription(NamedTuple):
+    """The grid of a coverage."""
+
+    #: the coverage ID
+    coverage_id: str
+    #: the CRS of the coordinates, for instance "EPSG:4326"
+    crs: str
+    #: the min and max latitude of the coverage
+    lat: tuple
+    #: the min and max longitude of the coverage
+    long: tuple
+    #: the size of the pixels along the latitude and the longitude, in degrees
+    resolution: tuple
+    #: the sorted heights of the slices, in meters. Empty if the coverage has no height axis.
+    heights: tuple
+    #: the sorted forecast times of the slices, in seconds after the run time
+    times: tuple
+
+    def check_slice(self, height, time, clamp: bool = False):
+        """Check the height and the forecast time of a slice.
+
+        Parameters
+        ----------
+        height : int | None
+            the height, in meters. Ignored if the coverage has no height axis.
+        time : int
+            the forecast time, in seconds.
+        clamp : bool, optional
+            replace the unavailable values by the nearest available ones,
+            instead of raising a ValueError. By default False.
+
+        Returns
+        -------
+        tuple[int | None, int]
+            the height (None if the coverage has no height axis) and the forecast time.
+        """
+        if not self.heights:
+            height = None
+        elif height not in self.heights:
+            if not clamp:
+                raise ValueError(
+                    f"The height {height} is not available for {self.coverage_id}, "
+                    f"use one of {list(self.heights)}"
+                )
+            height = _nearest(self.heights, height)
+        if time not in self.times:
+            if not clamp or not self.times:
+                raise ValueError(
+                    f"The time {time} is not available for {self.coverage_id}, "
+                    f"use one of {list(self.times)}"
+                )
+            time = _nearest(self.times, time)
+        return height, time
+
+    def check_box(self, lat, long, clamp: bool = False):
+        """Check that a box is within the coverage.
+
+        Parameters
+        ----------
+        lat, long : tuple[float]
+            the min and max latitude and longitude of the box.
+        clamp : bool, optional
+            crop the box to the coverage, instead of raising a ValueError.
+            A box outside of the coverage always raises a ValueError.
+
+        Returns
+        -------
+        tuple[tuple[float], tuple[float]]
+            the latitudes and the longitudes of the box.
+        """
+        box = []
+        for name, (low, high), (min_value, max_value) in (
+            ("latitudes", lat, self.lat), ("longitudes", long, self.long),
+        ):
+            if low > high:
+                raise ValueError(f"The {name} {(low, high)} are not sorted")
+            if high <= min_value or low >= max_value:
+                raise ValueError(
+                    f"The {name} {(low, high)} are outside of {self.coverage_id}, "
+                    f"within {(min_value, max_value)}"
+                )
+            if low < min_value or high > max_value:
+                if not clamp:
+                    raise ValueError(
+                        f"The {name} {(low, high)} exceed the coverage {self.coverage_id}, "
+                        f"within {(min_value, max_value)}"
+                    )
+                low, high = max(low, min_value), min(high, max_value)
+            box.append((low, high))
+        return tuple(box)
+
+    def validate(self, height, time, lat, long, clamp: bool = False):
+        """Check the parameters of a GetCoverage request.
+
+        See :meth:`check_slice` and :meth:`check_box`.
+
+        Returns
+        -------
+        tuple
+            the ``(height, time, lat, long)`` of the request.
+        """
+        height, time = self.check_slice(height, time, clamp)
+        lat, long = self.check_box(lat, long, clamp)
+        return height, time, lat, long
+
+    def slices(self, heights=None, times=None, clamp: bool = False):
+        """List the ``(height, time)`` slices of a bulk request.
+
+        Parameters
+        ----------
+        heights, times : int | Iterable[int], optional
+            the requested heights and forecast times. By default, all the available ones.
+        clamp : bool, optional
+            replace the unavailable values by the nearest available ones,
+            instead of raising a ValueError.
+
+        Returns
+        -------
+        list[tuple[int | None, int]]
+            the slices, without duplicates, in the order of the requests.
+        """
+        if heights is None:
+            heights = self.heights or (None,)
+        elif isinstance(heights, int):
+            heights = [heights]
+        if times is None:
+            times = self.times
+        elif isinstance(times, int):
+            times = [times]
+        slices = (self.check_slice(height, time, clamp) for height in heights for time in times)
+        return list(dict.fromkeys(slices))
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a description from its :meth:`_asdict`, for instance read from JSON."""
+        return cls(**{
+            field: tuple(value) if isinstance(value, list) else value
+            for field, value in data.items()
+        })
+
+
+def parse_description(xml):
+    """Parse a DescribeCoverage document.
+
+    The lat and long axes must be regular. The heights and the forecast times
+    are read from the coefficients of their axes, or from their offset vector.
+    The forecast times given as dates are converted to seconds after the run time
+    of the coverage.
+
+    Parameters
+    ----------
+    xml : str | bytes
+        the document.
+
+    Returns
+    -------
+    CoverageDescription
+        the description of the (first) coverage of the document.
+    """
+    root = ElementTree.fromstring(xml)
+    description = next(
+        (element for element in root.iter() if _local_name(element.tag) == "CoverageDescription"),
+        root,
+    )
+    elements = {}
+    for element in description.iter():
+        elements.setdefault(_local_name(element.tag), element)
+    coverage_id = elements["CoverageId"].text.strip()
+    envelope = elements.get("EnvelopeWithTimePeriod", elements.get("Envelope"))
+    labels = envelope.get("axisLabels").split()
+    lower = envelope.find("{*}lowerCorner").text.split()
+    upper = envelope.find("{*}upperCorner").text.split()
+    extent = {label: (low, high) for label, low, high in zip(labels, lower, upper)}
+
+    grid_labels = elements["axisLabels"].text.split()
+    low = [int(value) for value in elements["low"].text.split()]
+    high = [int(value) for value in elements["high"].text.split()]
+    origin = elements["pos"].text.split()
+    axes = {}
+    for axis in description.iter():
+        if _local_name(axis.tag) != "GeneralGridAxis":
+            continue
+        label = axis.find("{*}gridAxesSpanned").text.strip()
+        offset = [float(value) for value in axis.find("{*}offsetVector").text.split()]
+        coefficients = axis.find("{*}coefficients")
+        axes[label] = (offset, (coefficients.text or "").split() if coefficients is not None else [])
+
+    run_time = _run_timestamp(coverage_id)
+
+    def coordinate(label, text):
+        """Convert a coordinate to a number, the dates to seconds after the run time."""
+        if label == "time" and "T" in text:
+            return _timestamp(text) - run_time
+        return float(text)
+
+    def axis_values(label):
+        """The sorted coordinates of an axis: origin + coefficient * offset, or the dates."""
+        i = grid_labels.index(label)
+        offset, coefficients = axes.get(label, ([], []))
+        step = offset[i] if i < len(offset) else 0.0
+        start = coordinate(label, origin[i])
+        if coefficients:
+            values = [
+                coordinate(label, value) if "T" in value or not step
+                else start + float(value) * step
+                for value in coefficients
+            ]
+        elif step:
+            values = [start + k * step for k in range(high[i] - low[i] + 1)]
+        else:
+            values = [start]
+        return tuple(sorted({_number(round(value, 6)) for value in values}))
+
+    resolution = []
+    for label in ("lat", "long"):
+        i = grid_labels.index(label)
+        offset = axes[label][0] if label in axes else [0.0]
+        step = abs(offset[i]) if i < len(offset) else 0.0
+        if not step:
+            # no offset vector: the pixels of the box
+            step = abs(float(extent[label][1]) - float(extent[label][0])) / (high[i] - low[i] + 1)
+        resolution.append(step)
+    return CoverageDescription(
+        coverage_id=coverage_id,
+        crs=_crs_name(envelope.get("srsName", "")),
+        lat=tuple(float(value) for value in extent["lat"]),
+        long=tuple(float(value) for value in extent["long"]),
+        resolution=tuple(resolution),
+        heights=axis_values("height") if "height" in grid_labels else (),
+        times=axis_values("time") if "time" in grid_labels else (),
+    )
+
+
+class DescriptionCache:
+    """Cache of the parsed descriptions, one JSON file per coverage ID.
+
+    The most recently used descriptions are also kept in memory.
+
+    Parameters
+    ----------
+    cache_dir : str | pathlib.Path
+        the directory of the cache.
+    max_items : int, optional
+        the number of descriptions kept in memory, by default :data:`DEFAULT_MAX_DESCRIPTIONS`.
+    """
+
+    def __init__(self, cache_dir, max_items: int = DEFAULT_MAX_DESCRIPTIONS):
+        self.cache_dir = Path(cache_dir)
+        self.max_items = max_items
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, coverage_id):
+        return self.cache_dir / f"{coverage_id}.json"
+
+    def _remember(self, description):
+        with self._lock:
+            self._items[description.coverage_id] = description
+            self._items.move_to_end(description.coverage_id)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def load(self, coverage_id):
+        """Return the description of `coverage_id`, or None if it is not cached."""
+        with self._lock:
+            description = self._items.get(coverage_id)
+            if description is not None:
+                self._items.move_to_end(coverage_id)
+                return description
+        path = self._path(coverage_id)
+        try:
+            with open(path) as f:
+                description = CoverageDescription.from_dict(json.load(f))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"Ignoring the invalid description cache {path}: {e}")
+            return None
+        self._remember(description)
+        return description
+
+    def save(self, description):
+        """Store a description."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(description.coverage_id)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(description._asdict(), f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+        self._remember(description)
+
+    def expire(self, oldest_run):
+        """Remove the descriptions of the runs older than `oldest_run`.
+
+        Parameters
+        ----------
+        oldest_run : str
+            a run time, such as "2024-03-20T06.00.00Z".
+
+        Returns
+        -------
+        int
+            the number of removed files.
+        """
+        with self._lock:
+            for coverage_id in list(self._items):
+                if parse_coverageid(coverage_id).run_time < oldest_run:
+                    del self._items[coverage_id]
+        removed = 0
+        for path in self.cache_dir.glob("*.json"):
+            if parse_coverageid(path.stem).run_time < oldest_run:
+                path.unlink(missing_ok=True)
+                removed += 1
+        logger.debug(f"removed {removed} descriptions older than {oldest_run}")
+        return removed
@@ -25,3 +25,16 @@ class MissingDataError(Exception):
             message = text
         self.message = message
         super().__init__(self.message)
+
+class ThrottledError(ValueError):
+    """The quota of requests of the API is exceeded (error code 429)."""
+    def __init__(self, text: str):
+        self.message = f"Too many requests: {text}"
+        super().__init__(self.message)
+
+class ServerError(ValueError):
+    """The API failed to answer (error codes 500, 503 and 504)."""
+    def __init__(self, status_code: int, text: str):
+        self.status_code = status_code
+        self.message = f"error code: {status_code}\n {text}"
+        super().__init__(self.message)
@@ -1,8 +1,21 @@
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from time import monotonic, perf_counter, sleep
+import requests
 import xmltodict
-from .errors import MissingDataError
+from .errors import MissingDataError, ServerError, ThrottledError
 import logging
+from .cache import CoverageCache
+from .capabilities import (
+    CHUNK_SIZE,
+    CapabilitiesCache,
+    iter_coverage_summaries,
+    next_run_publication,
+)
+from .catalog import CoverageCatalog, parse_coverageid
+from .const import NOT_MODIFIED_CODE, PARTIAL_CONTENT_CODE, RANGE_NOT_SATISFIABLE_CODE
 from .core import MeteoFranceAPI
+from .description import VALIDATE_MODES, DescriptionCache, parse_description
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +37,96 @@ RELATION_TERRITORY_TO_PREC_ARPEGE = {"EUROPE": 0.1,
 
 precision_float_to_str = {0.25: "025", 0.1: "01", 0.05: "005", 0.01: "001", 0.025: "0025"}
 
+#: The default number of threads used by :meth:`AromeForecast.get_coverages`.
+DEFAULT_MAX_WORKERS = 8
+#: The default size of the spatial chunks of :meth:`AromeForecast.get_cube`, in pixels.
+DEFAULT_CHUNK_SIZE = 512
+#: The default number of seconds between two polls of :meth:`AromeForecast.watch`.
+DEFAULT_WATCH_INTERVAL = 600
+#: The margin around the locations of :meth:`AromeForecast.get_point_values`, in degrees.
+POINT_BOX_MARGIN = 0.1
+#: The errors of a poll which do not stop :meth:`AromeForecast.watch`.
+WATCH_ERRORS = (ServerError, ThrottledError, MissingDataError, requests.exceptions.RequestException)
+#: The size of the chunks of the streamed coverage downloads, in bytes.
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+#: The first bytes of the TIFF and BigTIFF files.
+TIFF_MAGIC = (b"II*\x00", b"MM\x00*", b"II+\x00", b"MM\x00+")
+
+
+def _range_headers(offset):
+    """The headers of a request resuming a download at `offset`."""
+    return {"Range": f"bytes={offset}-"} if offset else None
+
+
+def _resume_offset(res, offset):
+    """Return where to write the body of a (range) response, and the expected file size.
+
+    The offset is 0 if the server ignored the range, and None if the partial file
+    must be discarded (the range is not satisfiable). The size is None if unknown.
+    """
+    if res.status_code == RANGE_NOT_SATISFIABLE_CODE:
+        return None, None
+    if res.status_code == PARTIAL_CONTENT_CODE:
+        # Content-Range: bytes start-end/total
+        content_range = res.headers.get("Content-Range", "")
+        start, _, total = content_range.removeprefix("bytes ").partition("/")
+        start = start.partition("-")[0]
+        if start.isdigit() and int(start) == offset:
+            return offset, int(total) if total.isdigit() else None
+        return None, None
+    length = res.headers.get("Content-Length")
+    return 0, int(length) if length and length.isdigit() else None
+
+
+def _points_box(lat, lon, margin):
+    """Return the box containing locations, with a margin, rounded outward to 0.01 degree."""
+    import numpy as np
+
+    def bounds(values):
+        values = np.asarray(values, dtype="float64")
+        # rounded first, so that 2.3 - 0.1 is not floored to 2.19
+        low = np.floor(round((np.nanmin(values) - margin) * 100, 6)) / 100
+        high = np.ceil(round((np.nanmax(values) + margin) * 100, 6)) / 100
+        return round(float(low), 2), round(float(high), 2)
+
+    return bounds(lat), bounds(lon)
+
+
+def _import_crop_tiff():
+    """Return :func:`.raster.crop_tiff`, or None if rasterio is not installed."""
+    try:
+        from .raster import crop_tiff
+    except ImportError:
+        logger.debug("rasterio is not installed, the cached rasters are not cropped")
+        return None
+    return crop_tiff
+
+
+def _check_validate(validate):
+    """Check the `validate` parameter of the coverage requests."""
+    if validate is not None and validate not in VALIDATE_MODES:
+        raise ValueError(f"The parameter validate must be None or in {VALIDATE_MODES}")
+
+
+def _check_download(part_path, size, coverageid):
+    """Return whether a partial download is complete.
+
+    Raises
+    ------
+    ValueError
+        if the content is not a TIFF file, or is longer than expected.
+    """
+    with open(part_path, "rb") as f:
+        magic = f.read(4)
+    actual_size = part_path.stat().st_size
+    complete = size is None or actual_size == size
+    # an incomplete file shorter than the signature is resumed
+    invalid_magic = magic not in TIFF_MAGIC and (len(magic) == len(TIFF_MAGIC[0]) or complete)
+    if invalid_magic or (size is not None and actual_size > size):
+        part_path.unlink()
+        raise ValueError(f"The download of {coverageid} is not a valid TIFF file")
+    return complete
+
 
 
 class AromeForecast(MeteoFranceAPI):
@@ -44,6 +147,19 @@ class AromeForecast(MeteoFranceAPI):
     cache_dir : str | None, optional
         The path to the caching directory, by default None.
         If None, the cache directory is set to "/tmp/cache".
+    capabilities_cache : bool, optional
+        Cache the coverage IDs of the capabilities in the caching directory,
+        until the next run of the model is published. By default True.
+    cache_max_bytes : int | None, optional
+        The maximum size of the cached coverages, in bytes.
+        The files of the oldest model runs are evicted first.
+        By default None, the cache is not bounded.
+    store : ZarrRunStore | None, optional
+        A :class:`.ZarrRunStore` the fetched coverages are appended to,
+        by default None.
+    **kwargs
+        Additional parameters of :class:`.MeteoFranceAPI`,
+        such as `rate_limit` and `max_retries`.
 
     Note
     ----
@@ -71,6 +187,10 @@ class AromeForecast(MeteoFranceAPI):
 
     api_version = "1.0"
     base_url = "https://public-api.meteofrance.fr/public/arome/" + api_version
+    #: The hours between two runs of the model.
+    run_interval_hours = 3
+    #: The hours between the start of a run and its publication.
+    publication_delay_hours = 2
 
     def __init__(
         self,
@@ -80,6 +200,10 @@ class AromeForecast(MeteoFranceAPI):
         token: str | None = None,
         application_id: str | None = None,
         cache_dir: str | None = None,
+        capabilities_cache: bool = True,
+        cache_max_bytes: int | None = None,
+        store=None,
+        **kwargs,
     ):
         """Init the AromeForecast object.
 
@@ -98,6 +222,19 @@ class AromeForecast(MeteoFranceAPI):
         cache_dir : str | None, optional
             The path to the caching directory, by default None.
             If None, the cache directory is set to "/tmp/cache".
+        capabilities_cache : bool, optional
+            Cache the coverage IDs of the capabilities in the caching directory,
+            until the next run of the model is published. By default True.
+        cache_max_bytes : int | None, optional
+            The maximum size of the cached coverages, in bytes.
+            The files of the oldest model runs are evicted first.
+            By default None, the cache is not bounded.
+        store : ZarrRunStore | None, optional
+            A :class:`.ZarrRunStore` the fetched coverages are appended to,
+            by default None.
+        **kwargs
+            Additional parameters of :class:`.MeteoFranceAPI`,
+            such as `rate_limit` and `max_retries`.
 
         Note
         ----
@@ -106,15 +243,26 @@ class AromeForecast(MeteoFranceAPI):
         The available territories are listed in :data:`.AVAILABLE_TERRITORY`.
 
         """
-        super().__init__(api_key, token, application_id)
+        super().__init__(api_key, token, application_id, **kwargs)
         cache_dir = cache_dir or "/tmp/cache"
         self.cache_dir = Path(cache_dir)
+        self.capabilities_cache = (
+            CapabilitiesCache(self.cache_dir / "capabilities") if capabilities_cache else None
+        )
+        self.coverage_cache = CoverageCache(self.cache_dir, max_bytes=cache_max_bytes)
+        self._expired_evictions = 0  # the coverage evictions when the descriptions were expired
+        self.store = store  # the Zarr store the fetched coverages are appended to
         self.precision = precision  # the precision of the AROME model, in Degrees. Can be 0.01 or 0.025
         self.territory = territory  # the territory of the forecast. Can be "FRANCE" or "ANTIL" or others (see the API documentation)
         self.data_capabilities = None
         self.all_coverageid_prefix = None # the list of all coverage ID prefix
         self.all_coverageid = None # the list of all coverage ID
+        self.catalog = None # the coverage IDs indexed by name and run time
         self._validate_parameters()
+        # the coverage IDs of the services are the same, the descriptions are not
+        self.description_cache = DescriptionCache(
+            self.cache_dir / "descriptions" / self.capabilities_key
+        )
 
     def _validate_parameters(self):
         """Assert the parameters are valid."""
@@ -147,14 +295,13 @@ class AromeForecast(MeteoFranceAPI):
 
     @property
     def capabilities(self):
-        """The Capabilities of the AROME service."""
+        """The Capabilities of the AROME service, as a dict.
+
+        The full document is downloaded and parsed on first access.
+        Use :meth:`get_capabilities` to only list the coverage IDs.
+        """
         if self.data_capabilities is None:
-            url = f"{self.base_url}/{self.entry_point_capabilities}"
-            params = {
-                "service": "WCS",
-                "version": "2.0.1",
-                "language": "eng",
-            }
+            url, params = self._capabilities_request()
             try :
                 response = self._get_request(url, params=params)
             except MissingDataError as e:
@@ -162,22 +309,115 @@ class AromeForecast(MeteoFranceAPI):
                 logging.error(f"URL: {url}")
                 logging.error(f"Params: {params}")
                 raise e
-            xml = response.text
-            try:
-                self.data_capabilities = xmltodict.parse(xml)
-            except MissingDataError as e:
-                logger.error(f"Error parsing the XML response: {e}")
-                logger.error(f"Response: {xml}")
-                raise e
+            with self.instrumentation.timed("parse", "capabilities", nbytes=len(response.content)):
+                self.data_capabilities = self._parse_capabilities(response.text)
         return self.data_capabilities
 
-    def get_capabilities(self):
+    def _capabilities_request(self):
+        """Return the url and the parameters of the GetCapabilities request."""
+        url = f"{self.base_url}/{self.entry_point_capabilities}"
+        params = {
+            "service": "WCS",
+            "version": "2.0.1",
+            "language": "eng",
+        }
+        return url, params
+
+    def _parse_capabilities(self, xml):
+        """Parse the XML response of the GetCapabilities request."""
+        try:
+            return xmltodict.parse(xml)
+        except MissingDataError as e:
+            logger.error(f"Error parsing the XML response: {e}")
+            logger.error(f"Response: {xml}")
+            raise e
+
+    @property
+    def capabilities_key(self):
+        """The key of the service in the capabilities cache."""
+        return self.entry_point.split("/")[-1]
+
+    def get_capabilities(self, refresh: bool = False):
         """Get the capabilities of the service.
         In particular, lists the available coverages IDs,
-        that is a mandatory parameter for the get_coverage request."""
-        list_capabilities = self.capabilities["wcs:Capabilities"]["wcs:Contents"]["wcs:CoverageSummary"]
-        self.all_coverageid = [capabiltity["wcs:CoverageId"] for capabiltity in list_capabilities]
-        self.all_coverageid_prefix = list({coverageid.split("___")[0] for coverageid in self.all_coverageid})
+        that is a mandatory parameter for the get_coverage request.
+
+        The document is parsed while it is downloaded,
+        and only the coverage IDs are kept: the full document is available
+        in :attr:`capabilities`.
+        The coverage IDs are cached on disk until the next run of the model is published,
+        and then revalidated (see :class:`.CapabilitiesCache`).
+
+        Parameters
+        ----------
+        refresh : bool, optional
+            fetch the capabilities even if the cached ones are not expired.
+        """
+        entry = self._cached_capabilities(refresh)
+        if entry is not None and CapabilitiesCache.is_fresh(entry) and not refresh:
+            logger.debug("reading capabilities from cache")
+            self._set_coverageids(entry["coverage_ids"])
+            return
+        if self.data_capabilities is not None and not refresh:
+            self._set_coverageids(self._coverageids_of(self.data_capabilities))
+            return
+        url, params = self._capabilities_request()
+        headers = CapabilitiesCache.validators(entry) if entry is not None else None
+        response = self._get_request(url, params=params, headers=headers, stream=True)
+        coverage_ids = None
+        if response.status_code != NOT_MODIFIED_CODE:
+            # the document is parsed while it is downloaded
+            with response, self.instrumentation.timed("parse", "capabilities"):
+                coverage_ids = [
+                    summary["CoverageId"]
+                    for summary in iter_coverage_summaries(response.iter_content(CHUNK_SIZE))
+                ]
+        self._set_coverageids(self._store_capabilities(response, entry, coverage_ids))
+
+    def _cached_capabilities(self, refresh=False):
+        """Return the cached capabilities entry, if any."""
+        if refresh:
+            self.data_capabilities = None
+        if self.capabilities_cache is None:
+            return None
+        entry = self.capabilities_cache.load(self.capabilities_key)
+        if not refresh:
+            hit = entry is not None and CapabilitiesCache.is_fresh(entry)
+            self.instrumentation.emit("cache", "capabilities", hit=hit)
+        return entry
+
+    def _store_capabilities(self, response, entry, coverage_ids):
+        """Store the coverage IDs of a (conditional) GetCapabilities response
+        in the capabilities cache, and return them.
+
+        If the response is "304 Not Modified", the coverage IDs of the cached `entry` are used.
+        """
+        if response.status_code == NOT_MODIFIED_CODE:
+            logger.debug("capabilities not modified")
+            coverage_ids = entry["coverage_ids"]
+            etag = response.headers.get("ETag", entry["etag"])
+            last_modified = response.headers.get("Last-Modified", entry["last_modified"])
+        else:
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+        if self.capabilities_cache is not None:
+            expires_at = next_run_publication(self.run_interval_hours, self.publication_delay_hours)
+            self.capabilities_cache.save(
+                self.capabilities_key, coverage_ids, expires_at, etag, last_modified
+            )
+        return coverage_ids
+
+    @staticmethod
+    def _coverageids_of(capabilities):
+        """List the coverage IDs of the parsed capabilities."""
+        list_capabilities = capabilities["wcs:Capabilities"]["wcs:Contents"]["wcs:CoverageSummary"]
+        return [capabiltity["wcs:CoverageId"] for capabiltity in list_capabilities]
+
+    def _set_coverageids(self, coverage_ids):
+        """Store the available coverage IDs."""
+        self.all_coverageid = coverage_ids
+        self.catalog = CoverageCatalog(coverage_ids)
+        self.all_coverageid_prefix = self.catalog.names
 
     def all_coverageid_of_name(self, coverage_name):
         """Return the list of all coverage ID of a given name.
@@ -192,24 +432,25 @@ class AromeForecast(MeteoFranceAPI):
         -------
         list[str]
             the list of all coverage ID of the given name.
+
+        See Also
+        --------
+        :class:`.CoverageCatalog` : the index of the coverage IDs, in :attr:`catalog`.
         """
-        coverage_ids = [
-            coverageid
-            for coverageid in self.all_coverageid
-            if coverageid.startswith(coverage_name)
-        ]
+        if self.catalog is None:
+            raise ValueError("The capabilities are not fetched, call get_capabilities() first")
+        coverage_ids = self.catalog.coverageids_of_name(coverage_name)
         if not coverage_ids:
             raise ValueError(f"No coverage ID found for {coverage_name}")
-        return sorted(coverage_ids)
+        return coverage_ids
 
     def get_description(self, coverageid=None):
         """Get the description of a coverage.
 
         .. warning::
             The return value is the raw XML data.
-            Not yet parsed to be usable.
-            In the future, it should be possible to use it to
-            get the available heights, times, latitudes and longitudes of the forecast.
+            Use :meth:`describe_coverage` to get the available heights, times,
+            latitudes and longitudes of the forecast.
 
         Parameters
         ----------
@@ -222,20 +463,73 @@ class AromeForecast(MeteoFranceAPI):
         description : dict
             the description of the coverage.
         """
+        url, params = self._description_request(coverageid)
+        response = self._get_request(url, params=params)
+        with self.instrumentation.timed("parse", "description", nbytes=len(response.content)):
+            description = xmltodict.parse(response.text)
+        return description
+
+    def describe_coverage(self, coverageid=None, refresh: bool = False):
+        """Get the parsed description of a coverage.
+
+        A coverage ID belongs to one run of the model, so its description is only
+        requested once, and then kept in :attr:`description_cache`.
+        The descriptions of the runs evicted from the coverage cache are removed.
+
+        Parameters
+        ----------
+        coverageid: str, optional
+            the Coverage ID. By default use the latest temperature coverage ID.
+        refresh: bool, optional
+            request the description even if it is cached.
+
+        Returns
+        -------
+        description : CoverageDescription
+            the heights, forecast times, box, resolution and CRS of the coverage.
+        """
         if coverageid is None:
-            coverageid_prefix_temperature = (
-                "TEMPERATURE__SPECIFIC_HEIGHT_LEVEL_ABOVE_GROUND"
-            )
-            coverageid = self.all_coverageid_of_name(coverageid_prefix_temperature)[-1]
+            coverageid = self._default_coverageid()
+        description = None if refresh else self._cached_description(coverageid)
+        if description is None:
+            url, params = self._description_request(coverageid)
+            response = self._get_request(url, params=params)
+            description = self._store_description(response.content)
+        return description
+
+    def _cached_description(self, coverageid):
+        """Return the cached description of a coverage, if any."""
+        description = self.description_cache.load(coverageid)
+        self.instrumentation.emit("cache", "description", hit=description is not None)
+        return description
+
+    def _store_description(self, content):
+        """Parse a DescribeCoverage document, and cache the description."""
+        with self.instrumentation.timed("parse", "description", nbytes=len(content)):
+            description = parse_description(content)
+        self.description_cache.save(description)
+        return description
+
+    def _default_coverageid(self):
+        """Return the latest temperature coverage ID."""
+        coverageid_prefix_temperature = (
+            "TEMPERATURE__SPECIFIC_HEIGHT_LEVEL_ABOVE_GROUND"
+        )
+        if self.catalog is None:
+            raise ValueError("The capabilities are not fetched, call get_capabilities() first")
+        return self.catalog.latest(coverageid_prefix_temperature)
+
+    def _description_request(self, coverageid=None):
+        """Return the url and the parameters of the DescribeCoverage request."""
+        if coverageid is None:
+            coverageid = self._default_coverageid()
         url = f"{self.base_url}/{self.entry_point_describecoverage}"
         params = {
             "service": "WCS",
             "version": "2.0.1",
             "coverageid": coverageid,
         }
-        response = self._get_request(url, params=params)
-        description = xmltodict.parse(response.text)
-        return description
+        return url, params
 
     def get_coverage(
         self,
@@ -244,29 +538,44 @@ class AromeForecast(MeteoFranceAPI):
         time=0,
         lat=(37.5, 55.4),  # roughly the latitudes of France
         long=(-12, 16),  # roughly the longitudes of France
+        crop_cached: bool = True,
+        validate: str | None = None,
     ):
         """Fetch the raster values of the model predictions.
 
         The raster is saved to a file in the cache directory.
+        If a cached raster of the same coverage, height and time contains
+        the requested box, it is cropped locally instead of being fetched.
+        The new files are also appended to the Zarr store of the client, if any.
 
         Parameters
         ----------
         coverageid: str, optional
             the Coverage ID. Use :meth:`get_coverage` to access the available coverage ids.
             By default use the latest temperature coverage ID.
-        height: int, optional
+        height: int | None, optional
             the height in meters of the model. By default 2 meters above ground.
-            The available height could be accessed from the API but it is not implemented yet.
+            The available heights are given by :meth:`describe_coverage`,
+            None for the coverages without height axis.
         time: int, optional
             the forecast time (how much in the future).
             By default 0s in the future.
-            The available forecast time can be known (not implemented yet)
+            The available forecast times are given by :meth:`describe_coverage`.
         lat: tuple[float], optional
             The min et max latitude to return.
             By default, the France latitudes
         long: tuple[float], optional
             the min and max longitude to return.
             By default, the France longitude.
+        crop_cached: bool, optional
+            crop a cached raster containing the requested box, if any.
+            By default True. Ignored if rasterio is not installed.
+        validate: {None, "raise", "clamp"}, optional
+            check the parameters against the description of the coverage
+            before the request: "raise" raises a ValueError if the height or the time
+            is not available or if the box exceeds the coverage, "clamp" uses the nearest
+            available height and time and crops the box to the coverage.
+            By default None, the parameters are sent as is.
 
         Returns
         -------
@@ -276,41 +585,467 @@ class AromeForecast(MeteoFranceAPI):
         .. see-also::
            :func:`.aster.plot_tiff_file` to plot the file.
         """
+        _check_validate(validate)
         if coverageid is None:
-            coverageid_prefix_temperature = (
-                "TEMPERATURE__SPECIFIC_HEIGHT_LEVEL_ABOVE_GROUND"
+            coverageid = self._default_coverageid()
+        if validate is not None:
+            height, time, lat, long = self.describe_coverage(coverageid).validate(
+                height, time, lat, long, clamp=validate == "clamp"
             )
-            coverageid = self.all_coverageid_of_name(coverageid_prefix_temperature)[-1]
-        filename = f"{height}m_{time}Z_{lat[0]}-{lat[1]}_{long[0]}-{long[1]}.tiff"
-        filepath = self.cache_dir / coverageid / filename
+        filepath = self._coverage_filepath(coverageid, height, time, lat, long)
         logger.debug(f"{filepath=}")
-        if not filepath.exists():
-            logger.debug("File not found in Cache, fetching data")
-            url = f"{self.base_url}/{self.entry_point_getcoverage}"
-            params = {
-                "service": "WCS",
-                "version": "2.0.1",
-                "coverageid": coverageid,
-                "format": "image/tiff",
-                "subset": [
-                    f"height({height})",  # the height of the forecast, in meters
-                    f"time({time})",  # the initial time of the forecast
-                    f"lat({lat[0]},{lat[1]})",
-                    f"long({long[0]},{long[1]})",
-                ],
-                "geotiff:compression": "DEFLATE",  # compression of the tiff file
-            }
-            response = self._get_request(url, params=params)
-            # save res.text to tiff file
-            filepath.parent.mkdir(parents=True, exist_ok=True)
-            with open(filepath, "wb") as f:
-                f.write(response.content)
+        if self._coverage_cached(self.coverage_cache.get(filepath)):
+            return filepath
+        return self._fetch_coverage(coverageid, height, time, lat, long, filepath, crop_cached)
+
+    def _fetch_coverage(self, coverageid, height, time, lat, long, filepath, crop_cached=True):
+        """Fetch a coverage missing in the cache to `filepath`, see :meth:`get_coverage`."""
+        with self.coverage_cache.lock(filepath):
+            if filepath.exists():
+                # fetched by another thread or process while waiting for the lock
+                self.coverage_cache.register(filepath, coverageid, height, time, lat, long)
+                return filepath
+            source = None
+            crop_tiff = _import_crop_tiff() if crop_cached else None
+            if crop_tiff is not None:
+                source = self.coverage_cache.find_containing(coverageid, height, time, lat, long)
+            if source is not None:
+                logger.debug(f"Cropping the cached file {source}")
+                content = crop_tiff(source, lat, long)
+                self.coverage_cache.put(filepath, content, coverageid, height, time, lat, long)
+            else:
+                logger.debug("File not found in Cache, fetching data")
+                part_path = self._download_coverage(coverageid, height, time, lat, long, filepath)
+                self.coverage_cache.commit(part_path, filepath, coverageid, height, time, lat, long)
+        self._store_coverage(filepath, coverageid, height, time)
         return filepath
 
+    def _download_coverage(self, coverageid, height, time, lat, long, filepath):
+        """Stream a coverage to the partial file of `filepath`, and return its path.
+
+        The response is written by chunks of :data:`DOWNLOAD_CHUNK_SIZE` bytes.
+        An interrupted download is resumed with a range request, if the server supports it.
+        """
+        url, params = self._coverage_request(coverageid, height, time, lat, long)
+        part_path = self.coverage_cache.part_path(filepath)
+        part_path.parent.mkdir(parents=True, exist_ok=True)
+        start = perf_counter()
+        for attempt in range(self.max_retries + 1):
+            offset = part_path.stat().st_size if part_path.exists() else 0
+            res = self._get_request(url, params=params, headers=_range_headers(offset), stream=True)
+            with res:
+                offset, size = _resume_offset(res, offset)
+                if offset is None:
+                    logger.debug(f"discarding the partial download of {filepath.name}")
+                    part_path.unlink()
+                    continue
+                try:
+                    with open(part_path, "r+b" if offset else "wb") as f:
+                        f.truncate(offset)
+                        f.seek(offset)
+                        for chunk in res.iter_content(DOWNLOAD_CHUNK_SIZE):
+                            f.write(chunk)
+                except requests.exceptions.RequestException as e:
+                    logger.warning(f"download of {filepath.name} interrupted: {e}")
+                    continue
+            if _check_download(part_path, size, coverageid):
+                self._emit_download(coverageid, part_path, start)
+                return part_path
+            logger.warning(f"download of {filepath.name} incomplete, resuming")
+        raise ValueError(f"The download of {coverageid} failed after {self.max_retries + 1} attempts")
+
+    def _coverage_cached(self, hit):
+        """Report a lookup in the coverage cache, and return whether it is a hit."""
+        self.instrumentation.emit("cache", "coverage", hit=hit)
+        return hit
+
+    def _emit_download(self, coverageid, part_path, start):
+        """Report a complete download to the instrumentation."""
+        if self.instrumentation.enabled:
+            self.instrumentation.emit(
+                "download", parse_coverageid(coverageid).name,
+                duration=perf_counter() - start, nbytes=part_path.stat().st_size,
+            )
+
+    def _store_coverage(self, filepath, coverageid, height, time):
+        """Append a newly written coverage file to the store, if any.
+
+        If the coverage cache evicted files, the descriptions of the runs
+        older than the cached ones are removed.
+        """
+        if self.store is not None:
+            self.store.append(coverageid, height, time, filepath)
+        evictions = self.coverage_cache.evictions
+        if evictions != self._expired_evictions:
+            self._expired_evictions = evictions
+            oldest_run = self.coverage_cache.oldest_run()
+            if oldest_run is not None:
+                self.description_cache.expire(oldest_run)
+
+    def get_coverages(
+        self,
+        coverageids=None,
+        heights=2,
+        times=0,
+        lat=(37.5, 55.4),  # roughly the latitudes of France
+        long=(-12, 16),  # roughly the longitudes of France
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        validate: str | None = None,
+    ):
+        """Fetch many coverages at once.
+
+        The coverages already in the cache directory are not fetched again,
+        the others are fetched by a pool of threads sharing the session.
+
+        Parameters
+        ----------
+        coverageids: str | list[str], optional
+            the Coverage ID(s). By default use the latest temperature coverage ID.
+        heights: int | list[int] | range | None, optional
+            the height(s) in meters of the model. By default 2 meters above ground.
+            If None, all the available heights of each coverage (see :meth:`describe_coverage`).
+        times: int | list[int] | range | None, optional
+            the forecast time(s). For instance ``range(0, 52 * 3600, 3600)``.
+            By default 0s in the future.
+            If None, all the available forecast times of each coverage.
+        lat: tuple[float], optional
+            The min et max latitude to return.
+            By default, the France latitudes
+        long: tuple[float], optional
+            the min and max longitude to return.
+            By default, the France longitude.
+        max_workers: int, optional
+            the maximum number of requests running at the same time,
+            by default :data:`DEFAULT_MAX_WORKERS`.
+        validate: {None, "raise", "clamp"}, optional
+            check all the slices and the box before the first request,
+            see :meth:`get_coverage`. When clamping, the box is cropped to all the coverages.
+
+        Returns
+        -------
+        filepaths : dict[tuple[str, int, int], pathlib.Path]
+            the path to the Tiff file of each ``(coverageid, height, time)``,
+            in the order of the requests.
+            The items that failed with a :class:`.MissingDataError` are logged and left out.
+        """
+        _check_validate(validate)
+        coverageids = self._coverageid_list(coverageids)
+        if self._needs_descriptions(heights, times, validate):
+            for coverageid in coverageids:
+                self.describe_coverage(coverageid)
+        items, lat, long = self._checked_items(coverageids, heights, times, lat, long, validate)
+        filepaths = {}
+        to_fetch = []
+        for item in items:
+            filepath = self._coverage_filepath(*item, lat, long)
+            if self._coverage_cached(self.coverage_cache.get(filepath)):
+                filepaths[item] = filepath
+            else:
+                to_fetch.append((item, filepath))
+        logger.debug(f"{len(filepaths)} coverages found in cache, {len(to_fetch)} to fetch")
+        if to_fetch:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                # the items are looked up in the cache once, above
+                futures = {
+                    item: executor.submit(self._fetch_coverage, *item, lat, long, filepath)
+                    for item, filepath in to_fetch
+                }
+                for item, future in futures.items():
+                    try:
+                        filepaths[item] = future.result()
+                    except MissingDataError as e:
+                        logger.warning(f"Missing data for {item}: {e}")
+        return {item: filepaths[item] for item in items if item in filepaths}
+
+    def get_point_values(
+        self,
+        lat,
+        lon,
+        coverageid=None,
+        height=2,
+        times=0,
+        method="nearest",
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        margin: float = POINT_BOX_MARGIN,
+    ):
+        """Get the forecast values at many locations.
+
+        The coverages are fetched with :meth:`get_coverages` on the box of the locations,
+        and then sampled in one vectorized pass with :func:`.raster.sample_tiff_files`.
+
+        Parameters
+        ----------
+        lat : array_like
+            the latitudes of the N locations.
+        lon : array_like
+            the longitudes of the N locations.
+        coverageid: str, optional
+            the Coverage ID. By default use the latest temperature coverage ID.
+        height: int, optional
+            the height in meters of the model. By default 2 meters above ground.
+        times: int | list[int] | range, optional
+            the forecast time(s). By default 0s in the future.
+        method : {"nearest", "bilinear"}, optional
+            the interpolation method, by default "nearest".
+        max_workers: int, optional
+            the maximum number of requests running at the same time.
+        margin: float, optional
+            the margin of the box around the locations, in degrees,
+            by default :data:`POINT_BOX_MARGIN`.
+
+        Returns
+        -------
+        numpy.ndarray
+            the values, of shape (len(times), N). NaN where the data is missing.
+        """
+        box_lat, box_long = _points_box(lat, lon, margin)
+        filepaths = self.get_coverages(
+            coverageid, height, times, box_lat, box_long, max_workers=max_workers
+        )
+        return self._sample_points(coverageid, height, times, filepaths, lat, lon, method)
+
+    def _sample_points(self, coverageid, height, times, filepaths, lat, lon, method):
+        """Sample the files of :meth:`get_point_values` at the locations."""
+        import numpy as np
+
+        from .raster import sample_tiff_files
+
+        items = self._coverage_items(coverageid, height, times)
+        values = np.full((len(items), np.size(lat)), np.nan)
+        fetched = [i for i, item in enumerate(items) if item in filepaths]
+        if fetched:
+            values[fetched] = sample_tiff_files(
+                [filepaths[items[i]] for i in fetched], lat, lon, method=method
+            )
+        return values
+
+    def get_cube(
+        self,
+        coverageid=None,
+        height=2,
+        times=range(0, 49 * 3600, 3600),
+        lat=(37.5, 55.4),  # roughly the latitudes of France
+        long=(-12, 16),  # roughly the longitudes of France
+        chunks: int = DEFAULT_CHUNK_SIZE,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+    ):
+        """Get the forecast of a coverage over many forecast times, as a lazy cube.
+
+        The missing rasters are fetched in parallel with :meth:`get_coverages`,
+        and assembled with :func:`.cube.build_cube`: the values are only read
+        from the files when a computation needs them.
+        It requires the ``xarray`` and ``dask`` packages.
+
+        Parameters
+        ----------
+        coverageid: str, optional
+            the Coverage ID. By default use the latest temperature coverage ID.
+        height: int, optional
+            the height in meters of the model. By default 2 meters above ground.
+        times: list[int] | range, optional
+            the forecast times, in seconds. By default every hour of the next 48 hours.
+        lat: tuple[float], optional
+            The min et max latitude to return.
+        long: tuple[float], optional
+            the min and max longitude to return.
+        chunks: int, optional
+            the size of the spatial chunks, in pixels.
+        max_workers: int, optional
+            the maximum number of requests running at the same time.
+
+        Returns
+        -------
+        xarray.DataArray
+            the (time, lat, lon) cube. The times with missing data are left out.
+        """
+        from .cube import build_cube
+
+        if coverageid is None:
+            coverageid = self._default_coverageid()
+        filepaths = self.get_coverages(coverageid, height, times, lat, long, max_workers=max_workers)
+        return build_cube(
+            list(filepaths.values()),
+            [time for _, _, time in filepaths],
+            chunks=chunks,
+            name=coverageid,
+        )
+
+    def watch(
+        self,
+        names=None,
+        interval: float = DEFAULT_WATCH_INTERVAL,
+        seen=None,
+        download: bool = False,
+        heights=2,
+        times=0,
+        lat=(37.5, 55.4),  # roughly the latitudes of France
+        long=(-12, 16),  # roughly the longitudes of France
+        polls: int | None = None,
+    ):
+        """Poll the capabilities, and yield the newly published coverage IDs.
+
+        Every `interval` seconds, the capabilities are revalidated
+        (a conditional request, see :meth:`get_capabilities`), and the coverage IDs
+        are compared with the ones already seen.
+        A poll failing with one of :data:`WATCH_ERRORS` is logged, and its new coverage IDs
+        are retried at the next poll.
+
+        Parameters
+        ----------
+        names: str | list[str], optional
+            the names (or prefixes) of the coverages to watch,
+            for instance "TEMPERATURE__SPECIFIC_HEIGHT_LEVEL_ABOVE_GROUND".
+            By default, all the coverages.
+        interval: float, optional
+            the number of seconds between two polls, by default :data:`DEFAULT_WATCH_INTERVAL`.
+        seen: Iterable[str], optional
+            the coverage IDs already held, which are not yielded.
+            By default, the coverage IDs available at the first poll.
+            Use an empty list to also get those.
+        download: bool, optional
+            fetch the new coverages with :meth:`get_coverages` before yielding them.
+        heights, times, lat, long: optional
+            the parameters of the downloads, see :meth:`get_coverages`.
+        polls: int, optional
+            the number of polls, by default unlimited.
+
+        Yields
+        ------
+        coverage_ids : list[str]
+            the sorted new coverage IDs.
+        filepaths : dict[tuple[str, int, int], pathlib.Path]
+            the downloaded files, see :meth:`get_coverages`. Empty if `download` is False.
+        """
+        seen = None if seen is None else set(seen)
+        poll = 0
+        while polls is None or poll < polls:
+            next_poll = monotonic() + interval
+            poll += 1
+            try:
+                self.get_capabilities(refresh=True)
+                new, current = self._new_coverageids(seen, names)
+                filepaths = {}
+                if new and download:
+                    filepaths = self.get_coverages(new, heights, times, lat, long)
+            except WATCH_ERRORS as e:
+                logger.warning(f"Polling the coverages failed: {e}")
+            else:
+                seen = current
+                if new:
+                    logger.info(f"{len(new)} new coverage IDs")
+                    yield new, filepaths
+            if polls is None or poll < polls:
+                sleep(max(next_poll - monotonic(), 0))
+
+    def _new_coverageids(self, seen, names=None):
+        """Return the sorted coverage IDs of `names` not in `seen`, and the updated `seen`.
+
+        If `seen` is None, all the current coverage IDs are considered seen.
+        The updated `seen` only holds the current coverage IDs, so that it does not grow.
+        """
+        if isinstance(names, str):
+            names = [names]
+        coverage_ids = self.catalog.coverage_ids
+        if names is not None:
+            coverage_ids = [
+                coverage_id for coverage_id in coverage_ids if coverage_id.startswith(tuple(names))
+            ]
+        if seen is None:
+            return [], set(coverage_ids)
+        coverage_ids = set(coverage_ids)
+        return sorted(coverage_ids - seen), coverage_ids
+
+    def _coverageid_list(self, coverageids):
+        """Return the coverage IDs of a bulk request, as a list."""
+        if coverageids is None:
+            coverageids = self._default_coverageid()
+        if isinstance(coverageids, str):
+            coverageids = [coverageids]
+        return coverageids
+
+    @staticmethod
+    def _needs_descriptions(heights, times, validate):
+        """Whether a bulk request needs the descriptions of its coverages."""
+        return heights is None or times is None or validate is not None
+
+    def _checked_items(self, coverageids, heights, times, lat, long, validate=None):
+        """List the items of a bulk request, checked against the descriptions if needed.
+
+        The descriptions must already be cached, see :meth:`describe_coverage`.
+
+        Returns
+        -------
+        tuple
+            the ``(coverageid, height, time)`` items, and the box of the request.
+        """
+        if not self._needs_descriptions(heights, times, validate):
+            return self._coverage_items(coverageids, heights, times), lat, long
+        clamp = validate == "clamp"
+        items = []
+        for coverageid in coverageids:
+            description = self.description_cache.load(coverageid)
+            if validate is None:
+                # only replace None by the available values, as if they were requested
+                items += self._coverage_items(
+                    coverageid,
+                    (description.heights or [None]) if heights is None else heights,
+                    description.times if times is None else times,
+                )
+            else:
+                lat, long = description.check_box(lat, long, clamp)
+                items += [
+                    (coverageid, height, time)
+                    for height, time in description.slices(heights, times, clamp)
+                ]
+        return list(dict.fromkeys(items)), lat, long
+
+    def _coverage_items(self, coverageids, heights, times):
+        """List the ``(coverageid, height, time)`` of a bulk request."""
+        coverageids = self._coverageid_list(coverageids)
+        if isinstance(heights, int):
+            heights = [heights]
+        if isinstance(times, int):
+            times = [times]
+        return [
+            (coverageid, height, time)
+            for coverageid in coverageids
+            for height in heights
+            for time in times
+        ]
+
+    def _coverage_filepath(self, coverageid, height, time, lat, long):
+        """Return the path of the cached file of a coverage."""
+        height = "" if height is None else f"{height}m_"
+        filename = f"{height}{time}Z_{lat[0]}-{lat[1]}_{long[0]}-{long[1]}.tiff"
+        return self.cache_dir / coverageid / filename
+
+    def _coverage_request(self, coverageid, height, time, lat, long):
+        """Return the url and the parameters of the GetCoverage request."""
+        url = f"{self.base_url}/{self.entry_point_getcoverage}"
+        params = {
+            "service": "WCS",
+            "version": "2.0.1",
+            "coverageid": coverageid,
+            "format": "image/tiff",
+            "subset": [
+                f"height({height})",  # the height of the forecast, in meters
+                f"time({time})",  # the initial time of the forecast
+                f"lat({lat[0]},{lat[1]})",
+                f"long({long[0]},{long[1]})",
+            ],
+            "geotiff:compression": "DEFLATE",  # compression of the tiff file
+        }
+        if height is None:
+            # a coverage without height axis, see :meth:`describe_coverage`
+            del params["subset"][0]
+        return url, params
+
 
 class ArpegeForecast(AromeForecast):
     api_version = "1.0"
     base_url = "https://public-api.meteofrance.fr/public/arpege/" + api_version
+    run_interval_hours = 6
+    publication_delay_hours = 4
 
     def __init__(
         self,
@@ -319,6 +1054,10 @@ class ArpegeForecast(AromeForecast):
         token: str | None = None,
         application_id: str | None = None,
         cache_dir: str | None = None,
+        capabilities_cache: bool = True,
+        cache_max_bytes: int | None = None,
+        store=None,
+        **kwargs,
     ):
         """Init the ArpegeForecast object.
 
@@ -335,6 +1074,19 @@ class ArpegeForecast(AromeForecast):
         cache_dir : str | None, optional
             The path to the caching directory, by default None.
             If None, the cache directory is set to "/tmp/cache".
+        capabilities_cache : bool, optional
+            Cache the coverage IDs of the capabilities in the caching directory,
+            until the next run of the model is published. By default True.
+        cache_max_bytes : int | None, optional
+            The maximum size of the cached coverages, in bytes.
+            The files of the oldest model runs are evicted first.
+            By default None, the cache is not bounded.
+        store : ZarrRunStore | None, optional
+            A :class:`.ZarrRunStore` the fetched coverages are appended to,
+            by default None.
+        **kwargs
+            Additional parameters of :class:`.MeteoFranceAPI`,
+            such as `rate_limit` and `max_retries`.
 
         Note
         ----
@@ -343,15 +1095,26 @@ class ArpegeForecast(AromeForecast):
         The available territories are listed in :data:`.AVAILABLE_TERRITORY`.
 
         """
-        super(AromeForecast, self).__init__(api_key, token, application_id)
+        super(AromeForecast, self).__init__(api_key, token, application_id, **kwargs)
         cache_dir = cache_dir or "/tmp/cache"
         self.cache_dir = Path(cache_dir)
+        self.capabilities_cache = (
+            CapabilitiesCache(self.cache_dir / "capabilities") if capabilities_cache else None
+        )
+        self.coverage_cache = CoverageCache(self.cache_dir, max_bytes=cache_max_bytes)
+        self._expired_evictions = 0  # the coverage evictions when the descriptions were expired
+        self.store = store  # the Zarr store the fetched coverages are appended to
         self.precision = RELATION_TERRITORY_TO_PREC_ARPEGE[territory]  # the precision of the ARPEGE model, in Degrees.
         self.territory = territory  # the territory of the forecast.
         self.data_capabilities = None
         self.all_coverageid_prefix = None # the list of all coverage ID prefix
         self.all_coverageid = None # the list of all coverage ID
+        self.catalog = None # the coverage IDs indexed by name and run time
         self._validate_parameters()
+        # the coverage IDs of the services are the same, the descriptions are not
+        self.description_cache = DescriptionCache(
+            self.cache_dir / "descriptions" / self.capabilities_key
+        )
 
     def _validate_parameters(self):
         """Assert the parameters are valid."""
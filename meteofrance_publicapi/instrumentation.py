@@ -0,0 +1,285 @@
+"""Instrumentation of the requests and the caches of the clients.
+
+The clients report what they do as :class:`Event` to the callbacks of their
+:class:`Instrumentation`:
+
+- ``request``: a response of the API, with its latency, status code and size,
+- ``retry``: a throttled or failed request, retried after ``duration`` seconds,
+- ``token``: a token refresh, with its duration,
+- ``cache``: a lookup in a cache (``coverage``, ``capabilities`` or ``stations``), hit or miss,
+- ``parse``: the parsing of a document, with its duration and size,
+- ``download``: a coverage streamed to disk, with its duration and size.
+
+The events of the requests are named after the endpoint, for instance
+``MF-NWP-HIGHRES-AROME-001-FRANCE-WCS/GetCoverage`` or ``station/horaire``.
+Without callback, the events are not even created.
+
+Usage
+-----
+
+.. code-block:: python
+
+    from meteofrance_publicapi import AromeForecast
+    from meteofrance_publicapi.instrumentation import PrometheusExporter
+
+    client = AromeForecast(application_id=..., instrumentation=print)
+    client.instrumentation.add_callback(PrometheusExporter())
+
+The same :class:`Instrumentation` can be shared by several clients.
+The exporters require ``prometheus_client`` or ``opentelemetry-api``::
+
+    pip install meteofrance-publicapi[prometheus]
+    pip install meteofrance-publicapi[opentelemetry]
+"""
+import logging
+import time
+from contextlib import contextmanager
+from typing import NamedTuple
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+#: The kinds of events.
+EVENT_KINDS = ("request", "retry", "token", "cache", "parse", "download")
+
+
+class Event(NamedTuple):
+    """An event reported by a client."""
+
+    #: the kind of event, see :data:`EVENT_KINDS`
+    kind: str
+    #: the endpoint of a request, or the name of a cache or of a parsed document
+    name: str
+    #: the duration, in seconds
+    duration: float | None = None
+    #: the status code of a response
+    status: int | None = None
+    #: the number of bytes received or parsed
+    nbytes: int | None = None
+    #: the attempt of a request, from 0
+    attempt: int | None = None
+    #: whether a cache lookup is a hit
+    hit: bool | None = None
+
+
+def endpoint_name(url):
+    """Return the last two parts of the path of an url, for instance "station/horaire"."""
+    return "/".join(urlsplit(url).path.rstrip("/").split("/")[-2:])
+
+
+class Instrumentation:
+    """Send the events of the clients to callbacks.
+
+    An exception raised by a callback is logged, and does not interrupt the client.
+
+    Parameters
+    ----------
+    callbacks : Iterable[Callable[[Event], None]], optional
+        the functions called with each event.
+    """
+
+    def __init__(self, callbacks=()):
+        self.callbacks = list(callbacks)
+
+    @property
+    def enabled(self):
+        """Whether there is any callback."""
+        return bool(self.callbacks)
+
+    def add_callback(self, callback):
+        """Add a callback, and return it, so that it can be used as a decorator."""
+        self.callbacks.append(callback)
+        return callback
+
+    def remove_callback(self, callback):
+        """Remove a callback."""
+        self.callbacks.remove(callback)
+
+    def emit(self, kind, name, **fields):
+        """Send an event to the callbacks.
+
+        Parameters
+        ----------
+        kind : str
+            the kind of event, see :data:`EVENT_KINDS`.
+        name : str
+            the endpoint, cache or document of the event.
+        **fields
+            the other fields of the :class:`Event`.
+        """
+        if not self.callbacks:
+            return
+        event = Event(kind, name, **fields)
+        for callback in self.callbacks:
+            try:
+                callback(event)
+            except Exception:
+                logger.exception(f"instrumentation callback {callback!r} failed")
+
+    @contextmanager
+    def timed(self, kind, name, **fields):
+        """Measure the duration of a block, and send it as an event.
+
+        The block can set the other fields of the event in the yielded dict.
+        No event is sent if the block raises an exception.
+        """
+        start = time.perf_counter()
+        yield fields
+        self.emit(kind, name, duration=time.perf_counter() - start, **fields)
+
+
+def make_instrumentation(instrumentation):
+    """Build the :class:`Instrumentation` of a client.
+
+    Parameters
+    ----------
+    instrumentation : Instrumentation | Callable | Iterable[Callable] | None
+        an instrumentation, shared as is, or its callbacks.
+        If None, an instrumentation without callback.
+
+    Returns
+    -------
+    Instrumentation
+    """
+    if instrumentation is None:
+        return Instrumentation()
+    if isinstance(instrumentation, Instrumentation):
+        return instrumentation
+    if callable(instrumentation):
+        return Instrumentation([instrumentation])
+    return Instrumentation(instrumentation)
+
+
+class PrometheusExporter:
+    """Record the events in Prometheus metrics.
+
+    The metrics are prefixed by `namespace`:
+
+    - ``requests_total`` and ``request_duration_seconds``, by endpoint (and status),
+    - ``received_bytes_total``, by endpoint,
+    - ``retries_total``, by endpoint and status,
+    - ``token_refreshes_total``,
+    - ``cache_lookups_total``, by cache and result ("hit" or "miss"),
+    - ``parse_duration_seconds``, by document,
+    - ``download_duration_seconds``, by coverage name.
+
+    Parameters
+    ----------
+    registry : prometheus_client.CollectorRegistry, optional
+        the registry of the metrics, by default the global registry.
+    namespace : str, optional
+        the prefix of the metrics, by default "meteofrance".
+    """
+
+    def __init__(self, registry=None, namespace: str = "meteofrance"):
+        try:
+            import prometheus_client
+        except ImportError as e:
+            raise ImportError(
+                "The Prometheus exporter requires prometheus_client: "
+                "pip install meteofrance-publicapi[prometheus]"
+            ) from e
+        Counter, Histogram = prometheus_client.Counter, prometheus_client.Histogram
+        registry = registry if registry is not None else prometheus_client.REGISTRY
+        options = {"namespace": namespace, "registry": registry}
+        self.requests = Counter(
+            "requests", "Responses of the API.", ["endpoint", "status"], **options
+        )
+        self.request_duration = Histogram(
+            "request_duration_seconds", "Latency of the requests.", ["endpoint"], **options
+        )
+        self.received_bytes = Counter(
+            "received_bytes", "Bytes received from the API.", ["endpoint"], **options
+        )
+        self.retries = Counter(
+            "retries", "Retried requests.", ["endpoint", "status"], **options
+        )
+        self.token_refreshes = Counter("token_refreshes", "Token refreshes.", **options)
+        self.cache_lookups = Counter(
+            "cache_lookups", "Lookups in the caches.", ["cache", "result"], **options
+        )
+        self.parse_duration = Histogram(
+            "parse_duration_seconds", "Duration of the parsing.", ["document"], **options
+        )
+        self.download_duration = Histogram(
+            "download_duration_seconds", "Duration of the coverage downloads.", ["coverage"],
+            **options,
+        )
+
+    def __call__(self, event):
+        if event.kind == "request":
+            self.requests.labels(event.name, str(event.status)).inc()
+            self.request_duration.labels(event.name).observe(event.duration)
+            if event.nbytes:
+                self.received_bytes.labels(event.name).inc(event.nbytes)
+        elif event.kind == "retry":
+            self.retries.labels(event.name, str(event.status)).inc()
+        elif event.kind == "token":
+            self.token_refreshes.inc()
+        elif event.kind == "cache":
+            self.cache_lookups.labels(event.name, "hit" if event.hit else "miss").inc()
+        elif event.kind == "parse":
+            self.parse_duration.labels(event.name).observe(event.duration)
+        elif event.kind == "download":
+            self.download_duration.labels(event.name).observe(event.duration)
+
+
+class OpenTelemetryExporter:
+    """Record the events in OpenTelemetry metrics.
+
+    The instruments are those of :class:`PrometheusExporter`,
+    prefixed by ``meteofrance.``, and their labels are attributes.
+
+    Parameters
+    ----------
+    meter : opentelemetry.metrics.Meter, optional
+        the meter of the instruments. By default, the meter of this module
+        from the global meter provider.
+    """
+
+    def __init__(self, meter=None):
+        try:
+            from opentelemetry import metrics
+        except ImportError as e:
+            raise ImportError(
+                "The OpenTelemetry exporter requires opentelemetry-api: "
+                "pip install meteofrance-publicapi[opentelemetry]"
+            ) from e
+        meter = meter if meter is not None else metrics.get_meter(__name__)
+        self.requests = meter.create_counter("meteofrance.requests", description="Responses of the API.")
+        self.request_duration = meter.create_histogram(
+            "meteofrance.request.duration", unit="s", description="Latency of the requests."
+        )
+        self.received_bytes = meter.create_counter(
+            "meteofrance.received", unit="By", description="Bytes received from the API."
+        )
+        self.retries = meter.create_counter("meteofrance.retries", description="Retried requests.")
+        self.token_refreshes = meter.create_counter(
+            "meteofrance.token.refreshes", description="Token refreshes."
+        )
+        self.cache_lookups = meter.create_counter(
+            "meteofrance.cache.lookups", description="Lookups in the caches."
+        )
+        self.parse_duration = meter.create_histogram(
+            "meteofrance.parse.duration", unit="s", description="Duration of the parsing."
+        )
+        self.download_duration = meter.create_histogram(
+            "meteofrance.download.duration", unit="s", description="Duration of the coverage downloads."
+        )
+
+    def __call__(self, event):
+        if event.kind == "request":
+            self.requests.add(1, {"endpoint": event.name, "status": event.status})
+            self.request_duration.record(event.duration, {"endpoint": event.name})
+            if event.nbytes:
+                self.received_bytes.add(event.nbytes, {"endpoint": event.name})
+        elif event.kind == "retry":
+            self.retries.add(1, {"endpoint": event.name, "status": event.status})
+        elif event.kind == "token":
+            self.token_refreshes.add(1)
+        elif event.kind == "cache":
+            self.cache_lookups.add(1, {"cache": event.name, "result": "hit" if event.hit else "miss"})
+        elif event.kind == "parse":
+            self.parse_duration.record(event.duration, {"document": event.name})
+        elif event.kind == "download":
+            self.download_duration.record(event.duration, {"coverage": event.name})
@@ -0,0 +1,227 @@
+"""Local store of the observations of the stations.
+
+An :class:`ObservationStore` keeps the observations fetched by :class:`.Observations`
+in Parquet files, partitioned by station and by day (hive layout)::
+
+    path/
+        geo_id_insee=01014002/
+            day=2024-01-01/
+                part-<uuid>-0.parquet
+
+The rows are only appended: each append writes new files,
+without the ``(station, validity_time)`` slots already stored.
+The queries of :meth:`ObservationStore.read` only open the partitions of the
+requested stations and days, and filter the rows on the statistics of the files.
+:meth:`ObservationStore.missing` lists the slots to fetch,
+see :meth:`.Observations.sync_store`.
+
+It requires the ``pyarrow`` package::
+
+    pip install meteofrance-publicapi[arrow]
+"""
+import logging
+import uuid
+from pathlib import Path
+
+import pandas as pd
+
+from .cache import LOCK_FILENAME, KeyLocks
+from .observations import STATION_ID_COLUMN
+
+logger = logging.getLogger(__name__)
+
+#: The column of the observation times.
+TIME_COLUMN = "validity_time"
+#: The time steps of the observations, by frequency.
+FREQUENCIES = {"horaire": "1h", "6min": "6min"}
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+    except ImportError as e:
+        raise ImportError(
+            "The observation store requires pyarrow: pip install meteofrance-publicapi[arrow]"
+        ) from e
+    return pa, ds
+
+
+def _utc(time):
+    """Convert a time to a UTC timestamp, the naive times being in UTC."""
+    time = pd.Timestamp(time)
+    if time.tzinfo is None:
+        return time.tz_localize("UTC")
+    return time.tz_convert("UTC")
+
+
+class ObservationStore:
+    """Append-only Parquet store of observations, partitioned by station and day.
+
+    Parameters
+    ----------
+    path : str | pathlib.Path
+        the directory of the store.
+    frequency : {"horaire", "6min"}, optional
+        the frequency of the stored observations, by default "horaire".
+    """
+
+    def __init__(self, path, frequency: str = "horaire"):
+        if frequency not in FREQUENCIES:
+            raise ValueError(f"Unknown frequency {frequency}, use 'horaire' or '6min'")
+        self.path = Path(path)
+        self.frequency = frequency
+        self._locks = KeyLocks(self.path)
+
+    def _partitioning(self):
+        pa, ds = _import_pyarrow()
+        return ds.partitioning(
+            pa.schema([(STATION_ID_COLUMN, pa.string()), ("day", pa.string())]), flavor="hive"
+        )
+
+    def _dataset(self):
+        """Open the store as a ``pyarrow.dataset``, or return None if it is empty."""
+        _, ds = _import_pyarrow()
+        if not self.path.exists():
+            return None
+        dataset = ds.dataset(
+            self.path, format="parquet", partitioning=self._partitioning(),
+            ignore_prefixes=[".", "_", LOCK_FILENAME],
+        )
+        if not dataset.files:
+            return None
+        return dataset
+
+    def _filter(self, stations=None, start=None, end=None):
+        """Build the filter of a query, on the partitions and on the times."""
+        _, ds = _import_pyarrow()
+        conditions = []
+        if stations is not None:
+            if isinstance(stations, str):
+                stations = [stations]
+            conditions.append(ds.field(STATION_ID_COLUMN).isin(list(stations)))
+        if start is not None:
+            start = _utc(start)
+            conditions.append(ds.field("day") >= start.strftime("%Y-%m-%d"))
+            conditions.append(ds.field(TIME_COLUMN) >= start)
+        if end is not None:
+            end = _utc(end)
+            conditions.append(ds.field("day") <= end.strftime("%Y-%m-%d"))
+            conditions.append(ds.field(TIME_COLUMN) <= end)
+        condition = None
+        for other in conditions:
+            condition = other if condition is None else condition & other
+        return condition
+
+    def read(self, stations=None, start=None, end=None, columns=None):
+        """Read the stored observations.
+
+        Parameters
+        ----------
+        stations : str | Iterable[str], optional
+            the station IDs. By default, all the stations.
+        start, end : str | pd.Timestamp, optional
+            the first and last observation times, in UTC. By default, unbounded.
+        columns : list[str], optional
+            the columns to read. By default, all the columns.
+
+        Returns
+        -------
+        pd.DataFrame
+            the observations, sorted by station and time.
+        """
+        pa, ds = _import_pyarrow()
+        dataset = self._dataset()
+        if dataset is None:
+            return pd.DataFrame(columns=[STATION_ID_COLUMN, TIME_COLUMN])
+        condition = self._filter(stations, start, end)
+        fragments = list(dataset.get_fragments(filter=condition))
+        if not fragments:
+            return pd.DataFrame(columns=[STATION_ID_COLUMN, TIME_COLUMN])
+        # the files may have different columns: read them with their union
+        schema = pa.unify_schemas(
+            [dataset.partitioning.schema] + [fragment.physical_schema for fragment in fragments]
+        )
+        dataset = ds.dataset(
+            [fragment.path for fragment in fragments], schema=schema, format="parquet",
+            partitioning=self._partitioning(), partition_base_dir=str(self.path),
+        )
+        if columns is not None:
+            columns = list(dict.fromkeys([STATION_ID_COLUMN, TIME_COLUMN, *columns]))
+        data = dataset.to_table(columns=columns, filter=condition).to_pandas()
+        data = data.drop(columns="day", errors="ignore")
+        data = data.drop_duplicates([STATION_ID_COLUMN, TIME_COLUMN])
+        return data.sort_values([STATION_ID_COLUMN, TIME_COLUMN]).reset_index(drop=True)
+
+    def stored_slots(self, stations=None, start=None, end=None):
+        """Return the set of the stored ``(station_id, validity_time)``."""
+        data = self.read(stations, start, end, columns=[])
+        return set(zip(data[STATION_ID_COLUMN], data[TIME_COLUMN]))
+
+    def missing(self, stations, start, end):
+        """List the ``(station_id, time)`` slots not stored between `start` and `end`.
+
+        The expected times are every hour, or every 6 minutes,
+        depending on the frequency of the store.
+
+        Returns
+        -------
+        list[tuple[str, pd.Timestamp]]
+            the missing slots, sorted by station and time.
+        """
+        if isinstance(stations, str):
+            stations = [stations]
+        step = FREQUENCIES[self.frequency]
+        times = pd.date_range(_utc(start).ceil(step), _utc(end), freq=step)
+        stored = self.stored_slots(stations, start, end)
+        return [
+            (station_id, time)
+            for station_id in stations
+            for time in times
+            if (station_id, time) not in stored
+        ]
+
+    def append(self, data):
+        """Append observations to the store.
+
+        The rows of the slots already stored are left out.
+
+        Parameters
+        ----------
+        data : pd.DataFrame
+            the observations, with the columns ``geo_id_insee`` and ``validity_time``.
+
+        Returns
+        -------
+        int
+            the number of appended rows.
+        """
+        pa, ds = _import_pyarrow()
+        data = data.dropna(subset=[STATION_ID_COLUMN, TIME_COLUMN])
+        data = data.assign(**{
+            STATION_ID_COLUMN: data[STATION_ID_COLUMN].astype(str),
+            TIME_COLUMN: pd.to_datetime(data[TIME_COLUMN], utc=True),
+        })
+        data = data.drop_duplicates([STATION_ID_COLUMN, TIME_COLUMN])
+        # the columns without any value have no type
+        data = data.dropna(axis="columns", how="all")
+        with self._locks.lock("append"):
+            if len(data):
+                stored = self.stored_slots(
+                    data[STATION_ID_COLUMN].unique(), data[TIME_COLUMN].min(), data[TIME_COLUMN].max()
+                )
+                new = [slot not in stored for slot in zip(data[STATION_ID_COLUMN], data[TIME_COLUMN])]
+                data = data[new]
+            if not len(data):
+                return 0
+            data = data.assign(day=data[TIME_COLUMN].dt.strftime("%Y-%m-%d"))
+            ds.write_dataset(
+                pa.Table.from_pandas(data, preserve_index=False),
+                self.path,
+                format="parquet",
+                partitioning=self._partitioning(),
+                basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+                existing_data_behavior="overwrite_or_ignore",
+            )
+        logger.debug(f"appended {len(data)} observations to {self.path}")
+        return len(data)
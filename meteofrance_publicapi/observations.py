@@ -4,14 +4,31 @@ See :
 - https://portail-api.meteofrance.fr/web/fr/api/DonneesPubliquesObservation
 - https://portail-api.meteofrance.fr/web/fr/api/DonneesPubliquesPaquetObservation
 """
-from io import StringIO
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
 import logging
+import os
+from pathlib import Path
+import time
 
 import pandas as pd
 from .core import MeteoFranceAPI
 
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+except ImportError:  # the CSV files are parsed by pandas
+    pa = None
+
 logger = logging.getLogger(__name__)
 
+#: The column of the station IDs in the observations.
+STATION_ID_COLUMN = "geo_id_insee"
+#: The default number of threads used by :meth:`Observations.get_stations`.
+DEFAULT_MAX_WORKERS = 8
+#: The default number of seconds the list of stations is cached for.
+DEFAULT_STATIONS_TTL = 24 * 3600
+
 NAME_EXPLICIT_EN_COMMON = {
     "lat": "latitude",
     "lon": "longitude",
@@ -53,6 +70,93 @@ NAME_EXPLICIT_EN_HOURLY = {
 }
 
 
+#: The columns of the list of stations, and their types (see :func:`_read_csv`).
+STATIONS_SCHEMA = {
+    "Id_station": "str",
+    "Id_omm": "str",
+    "Nom_usuel": "str",
+    "Latitude": "float64",
+    "Longitude": "float64",
+    "Altitude": "float32",
+    "Date_ouverture": "datetime",
+    "Pack": "category",
+}
+
+
+def _observations_schema(names):
+    """Return the types of the columns of the observations, measured `names` included."""
+    schema = {
+        STATION_ID_COLUMN: "category",
+        "lat": "float64",
+        "lon": "float64",
+        "reference_time": "datetime",
+        "insert_time": "datetime",
+        "validity_time": "datetime",
+    }
+    for column in {**NAME_EXPLICIT_EN_COMMON, **names}:
+        schema.setdefault(column, "float32")
+    return schema
+
+
+def _read_csv(content, schema):
+    """Parse a CSV response of the API with a declared schema.
+
+    The file is parsed by the ``pyarrow`` CSV reader when it is installed,
+    by pandas otherwise.
+
+    Parameters
+    ----------
+    content : bytes
+        the content of the response.
+    schema : dict[str, str]
+        the type of the columns: "float32", "float64", "str", "category" or "datetime"
+        (converted to UTC). The other columns are inferred.
+
+    Returns
+    -------
+    pd.DataFrame
+        the parsed data.
+    """
+    if pa is not None:
+        arrow_types = {
+            "float32": pa.float32(),
+            "float64": pa.float64(),
+            "str": pa.string(),
+            "category": pa.dictionary(pa.int32(), pa.string()),
+        }
+        table = pa_csv.read_csv(
+            BytesIO(content),
+            parse_options=pa_csv.ParseOptions(delimiter=";"),
+            convert_options=pa_csv.ConvertOptions(
+                column_types={
+                    column: arrow_types[kind]
+                    for column, kind in schema.items()
+                    if kind in arrow_types
+                },
+                strings_can_be_null=True,
+            ),
+        )
+        data = table.to_pandas()
+    else:
+        data = pd.read_csv(
+            BytesIO(content),
+            sep=";",
+            dtype={
+                column: str if kind in ("str", "category") else kind
+                for column, kind in schema.items()
+                if kind != "datetime"
+            },
+        )
+        categories = [
+            column for column, kind in schema.items() if kind == "category" and column in data
+        ]
+        data[categories] = data[categories].astype("category")
+    for column, kind in schema.items():
+        if kind == "datetime" and column in data:
+            data[column] = pd.to_datetime(data[column], utc=True)
+    return data
+
+
 class Observations(MeteoFranceAPI):
     """Wrapper around the meteo-France API for the observational data.
 
@@ -75,6 +179,7 @@ class Observations(MeteoFranceAPI):
     """
 
     base_url = "https://public-api.meteofrance.fr/public/DPObs/"
+    paquet_base_url = "https://public-api.meteofrance.fr/public/DPPaquetObs/"
     version = "v1"
 
     def __init__(
@@ -82,27 +187,110 @@ class Observations(MeteoFranceAPI):
         api_key: str | None = None,
         token: str | None = None,
         application_id: str | None = None,
+        cache_dir: str | None = None,
+        stations_ttl: float = DEFAULT_STATIONS_TTL,
+        **kwargs,
     ):
-        super().__init__(api_key, token, application_id)
+        """Init the Observations object.
+
+        Parameters
+        ----------
+        cache_dir : str | None, optional
+            The path to the caching directory, by default None.
+            If None, the cache directory is set to "/tmp/cache".
+        stations_ttl : float, optional
+            The number of seconds the list of stations is cached for, by default one day.
+            Use 0 to disable the cache.
+        **kwargs
+            Additional parameters of :class:`.MeteoFranceAPI`,
+            such as `rate_limit` and `max_retries`.
 
-    def list_stations(self):
+        Note
+        ----
+        See :class:`.MeteoFranceAPI` for the parameters `api_key`, `token` and `application_id`.
+        """
+        super().__init__(api_key, token, application_id, **kwargs)
+        self.cache_dir = Path(cache_dir or "/tmp/cache")
+        self.stations_ttl = stations_ttl
+        self.station_catalog = None  # the spatial index of the stations
+
+    @property
+    def stations_cache_path(self):
+        """The path of the cached list of stations."""
+        return self.cache_dir / "stations" / "liste-stations.csv"
+
+    def list_stations(self, refresh: bool = False):
         """Liste the available stations.
 
+        The list is cached on disk for :attr:`stations_ttl` seconds.
+
+        Parameters:
+        -----------
+        refresh: bool
+            fetch the list even if the cached one is not expired.
+
         Returns:
         --------
         pd.DataFrame: a DataFrame with the list of stations.
 
         """
-        url = self.base_url + self.version + "/liste-stations"
-        logger.debug(f"GET {url}")
-        res = self._get_request(url)
-        csv_sting =  res.text
-        data = pd.read_csv(StringIO(csv_sting), sep=";", dtype=str)
-        numerical_columns = ["Latitude", "Longitude", "Altitude"]
-        data[numerical_columns] = data[numerical_columns].apply(pd.to_numeric)
-        datetime_columns = ["Date_ouverture"]
-        data[datetime_columns] = data[datetime_columns].apply(pd.to_datetime)
-        return data
+        content = None if refresh else self._cached_stations()
+        if content is None:
+            url = self.base_url + self.version + "/liste-stations"
+            logger.debug(f"GET {url}")
+            res = self._get_request(url)
+            content = res.content
+            self._store_stations(content)
+        return self._parse_stations(content)
+
+    def get_station_catalog(self, refresh: bool = False):
+        """Return the spatial index of the stations.
+
+        It is built once from :meth:`list_stations`, and kept in :attr:`station_catalog`.
+
+        Parameters:
+        -----------
+        refresh: bool
+            fetch the list of stations again.
+
+        Returns:
+        --------
+        StationCatalog: the stations, with nearest-station and bounding box queries.
+
+        """
+        from .stations import StationCatalog
+
+        if self.station_catalog is None or refresh:
+            self.station_catalog = StationCatalog(self.list_stations(refresh))
+        return self.station_catalog
+
+    def _cached_stations(self):
+        """Return the cached list of stations, if not expired."""
+        path = self.stations_cache_path
+        content = None
+        try:
+            if time.time() - path.stat().st_mtime < self.stations_ttl:
+                logger.debug("reading the list of stations from cache")
+                content = path.read_bytes()
+        except FileNotFoundError:
+            pass
+        self.instrumentation.emit("cache", "stations", hit=content is not None)
+        return content
+
+    def _store_stations(self, content):
+        """Write the list of stations to the cache."""
+        if self.stations_ttl <= 0:
+            return
+        path = self.stations_cache_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_bytes(content)
+        os.replace(tmp_path, path)
+
+    def _parse_stations(self, content):
+        """Parse the CSV list of stations."""
+        with self.instrumentation.timed("parse", "stations", nbytes=len(content)):
+            return _read_csv(content, STATIONS_SCHEMA)
 
     def get_station_horaire(self,
                             station_id: str,
@@ -124,19 +312,10 @@ class Observations(MeteoFranceAPI):
         pd.DataFrame: a DataFrame with the data.
 
         """
-        url = self.base_url + self.version + "/station/horaire"
-        params = {"id_station": station_id,
-                  "format": "csv"}
-        if datetime is not None:
-            params["datetime"] = datetime
+        url, params = self._station_request("horaire", station_id, datetime)
         logger.debug(f"GET {url}")
         req =  self._get_request(url, params=params)
-        csv_sting = req.text
-        data = pd.read_csv(StringIO(csv_sting), sep=";")
-        if rename_columns:
-            data = data.rename(columns=NAME_EXPLICIT_EN_COMMON)
-            data = data.rename(columns=NAME_EXPLICIT_EN_HOURLY)
-        return data
+        return self._parse_station_csv(req.content, NAME_EXPLICIT_EN_HOURLY, rename_columns)
 
     def get_station_6min(self,
                          station_id: str,
@@ -158,16 +337,263 @@ class Observations(MeteoFranceAPI):
         pd.DataFrame: a DataFrame with the data.
 
         """
-        url = self.base_url + self.version + "/station/infrahoraire-6m"
+        url, params = self._station_request("infrahoraire-6m", station_id, datetime)
+        logger.debug(f"GET {url}")
+        req =  self._get_request(url, params=params)
+        return self._parse_station_csv(req.content, NAME_EXPLICIT_EN_6min, rename_columns)
+
+    def get_stations(self,
+                     station_ids,
+                     datetimes=None,
+                     frequency: str = "horaire",
+                     rename_columns: bool = True,
+                     max_workers: int = DEFAULT_MAX_WORKERS):
+        """Get the data of many stations, with concurrent requests.
+
+        The requests share the rate limit of the client.
+        Prefer the ``get_paquet_*`` methods when a whole department is needed.
+
+        Parameters:
+        -----------
+        station_ids: Iterable[str]
+            the ids of the stations.
+        datetimes: str | Iterable[str | None], optional
+            the date(s) of the data, in the format ISO 8601 (YYYY-MM-DDTHH:MM:SSZ).
+            Each station is fetched at each date. By default, the latest data.
+        frequency: {"horaire", "6min"}
+            fetch the hourly or the 6min data.
+        rename_columns: bool
+            rename the columns with explicit english names.
+        max_workers: int
+            the maximum number of requests running at the same time.
+
+        Returns:
+        --------
+        pd.DataFrame: the data of all the stations, indexed by station id.
+        dict[tuple[str, str | None], Exception]: the error of each failed ``(station_id, datetime)``.
+
+        """
+        items = self._station_items(station_ids, datetimes)
+        return self._get_station_items(items, frequency, rename_columns, max_workers)
+
+    def _get_station_items(self, items, frequency, rename_columns=True, max_workers=DEFAULT_MAX_WORKERS):
+        """Fetch the ``(station_id, datetime)`` items concurrently, see :meth:`get_stations`."""
+        get_station = self._station_getter(frequency)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(get_station, station_id, datetime, rename_columns)
+                for station_id, datetime in items
+            ]
+            results = []
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    results.append(e)
+        return self._merge_stations(items, results)
+
+    def sync_store(self,
+                   store,
+                   station_ids,
+                   start,
+                   end,
+                   max_workers: int = DEFAULT_MAX_WORKERS):
+        """Fetch the observations missing in a local store, and append them to it.
+
+        Only the ``(station, time)`` slots missing in the store between `start` and `end`
+        are requested, at the frequency of the store.
+
+        Parameters:
+        -----------
+        store: ObservationStore
+            the local store.
+        station_ids: Iterable[str]
+            the ids of the stations.
+        start, end: str | pd.Timestamp
+            the first and last times to sync, in UTC.
+        max_workers: int
+            the maximum number of requests running at the same time.
+
+        Returns:
+        --------
+        dict[tuple[str, str], Exception]: the error of each failed ``(station_id, datetime)``.
+
+        """
+        items = self._missing_items(store, station_ids, start, end)
+        if not items:
+            return {}
+        data, errors = self._get_station_items(items, store.frequency, max_workers=max_workers)
+        if len(data):
+            store.append(data.reset_index(drop=True))
+        return errors
+
+    @staticmethod
+    def _missing_items(store, station_ids, start, end):
+        """List the ``(station_id, datetime)`` missing in a store, see :meth:`sync_store`."""
+        missing = store.missing(station_ids, start, end)
+        logger.debug(f"{len(missing)} slots missing in {store.path}")
+        return [
+            (station_id, slot.strftime("%Y-%m-%dT%H:%M:%SZ")) for station_id, slot in missing
+        ]
+
+    def _station_getter(self, frequency):
+        """Return the method fetching the data of a station at `frequency`."""
+        if frequency == "horaire":
+            return self.get_station_horaire
+        if frequency == "6min":
+            return self.get_station_6min
+        raise ValueError(f"Unknown frequency {frequency}, use 'horaire' or '6min'")
+
+    @staticmethod
+    def _station_items(station_ids, datetimes=None):
+        """List the ``(station_id, datetime)`` of a bulk request."""
+        if isinstance(station_ids, str):
+            station_ids = [station_ids]
+        if datetimes is None or isinstance(datetimes, str):
+            datetimes = [datetimes]
+        return [(station_id, datetime) for station_id in station_ids for datetime in datetimes]
+
+    @staticmethod
+    def _merge_stations(items, results):
+        """Concatenate the DataFrames of the stations, and collect the errors."""
+        frames = {}
+        errors = {}
+        for item, result in zip(items, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Fetching the station {item} failed: {result}")
+                errors[item] = result
+            else:
+                frames[item] = result
+        if not frames:
+            return pd.DataFrame(), errors
+        data = pd.concat(
+            frames.values(),
+            keys=[station_id for station_id, _ in frames],
+            names=["station_id", None],
+        ).droplevel(-1)
+        if STATION_ID_COLUMN in data:
+            # the categories of the frames differ: concat falls back to strings
+            data[STATION_ID_COLUMN] = data[STATION_ID_COLUMN].astype("category")
+        return data, errors
+
+    def get_paquet_horaire(self,
+                           departement: int,
+                           stations=None,
+                           rename_columns: bool = True):
+        """Get the hourly data of all the stations of a department, in one request.
+
+        Parameters:
+        -----------
+        departement: int
+            the number of the department, for instance 38.
+        stations: Iterable[str], optional
+            keep only these station IDs. By default, all the stations of the department.
+        rename_columns: bool
+            rename the columns with explicit english names.
+
+        Returns:
+        --------
+        pd.DataFrame: a DataFrame with the data of all the stations.
+
+        """
+        url, params = self._paquet_request("horaire", departement=departement)
+        logger.debug(f"GET {url}")
+        req = self._get_request(url, params=params)
+        data = self._parse_station_csv(req.content, NAME_EXPLICIT_EN_HOURLY, rename_columns)
+        return self._filter_stations(data, stations)
+
+    def get_paquet_6min(self,
+                        departement: int,
+                        stations=None,
+                        rename_columns: bool = True):
+        """Get the 6min data of all the stations of a department, in one request.
+
+        See :meth:`get_paquet_horaire` for the parameters.
+        """
+        url, params = self._paquet_request("infrahoraire-6m", departement=departement)
+        logger.debug(f"GET {url}")
+        req = self._get_request(url, params=params)
+        data = self._parse_station_csv(req.content, NAME_EXPLICIT_EN_6min, rename_columns)
+        return self._filter_stations(data, stations)
+
+    def get_paquet_stations_horaire(self,
+                                    datetime: str | None = None,
+                                    stations=None,
+                                    rename_columns: bool = True):
+        """Get the hourly data of all the stations, in one request.
+
+        Parameters:
+        -----------
+        datetime: str
+            the date of the data, in the format ISO 8601 (YYYY-MM-DDTHH:MM:SSZ).
+            By default, the latest data.
+        stations: Iterable[str], optional
+            keep only these station IDs. By default, all the stations.
+        rename_columns: bool
+            rename the columns with explicit english names.
+
+        Returns:
+        --------
+        pd.DataFrame: a DataFrame with the data of all the stations.
+
+        """
+        url, params = self._paquet_request("stations/horaire", datetime=datetime)
+        logger.debug(f"GET {url}")
+        req = self._get_request(url, params=params)
+        data = self._parse_station_csv(req.content, NAME_EXPLICIT_EN_HOURLY, rename_columns)
+        return self._filter_stations(data, stations)
+
+    def get_paquet_stations_6min(self,
+                                 datetime: str | None = None,
+                                 stations=None,
+                                 rename_columns: bool = True):
+        """Get the 6min data of all the stations, in one request.
+
+        See :meth:`get_paquet_stations_horaire` for the parameters.
+        """
+        url, params = self._paquet_request("stations/infrahoraire-6m", datetime=datetime)
+        logger.debug(f"GET {url}")
+        req = self._get_request(url, params=params)
+        data = self._parse_station_csv(req.content, NAME_EXPLICIT_EN_6min, rename_columns)
+        return self._filter_stations(data, stations)
+
+    def _paquet_request(self, resource, departement=None, datetime=None):
+        """Return the url and the parameters of a ``/paquet/*`` request."""
+        url = self.paquet_base_url + self.version + "/paquet/" + resource
+        params = {"format": "csv"}
+        if departement is not None:
+            params["id-departement"] = departement
+        if datetime is not None:
+            params["date"] = datetime
+        return url, params
+
+    @staticmethod
+    def _filter_stations(data, stations=None):
+        """Keep the rows of the given station IDs, if any."""
+        if stations is None:
+            return data
+        if isinstance(stations, str):
+            stations = [stations]
+        return data[data[STATION_ID_COLUMN].isin(stations)].reset_index(drop=True)
+
+    def _station_request(self, resource, station_id, datetime=None):
+        """Return the url and the parameters of a ``/station/*`` request."""
+        url = self.base_url + self.version + "/station/" + resource
         params = {"id_station": station_id,
                   "format": "csv"}
         if datetime is not None:
             params["datetime"] = datetime
-        logger.debug(f"GET {url}")
-        req =  self._get_request(url, params=params)
-        csv_sting = req.text
-        data = pd.read_csv(StringIO(csv_sting), sep=";")
+        return url, params
+
+    def _parse_station_csv(self, content, names, rename_columns=True):
+        """Parse the CSV data of stations.
+
+        The measurements are float32, the station IDs categorical,
+        and the times UTC datetimes.
+        If `rename_columns`, the columns are renamed with the common names and `names`.
+        """
+        with self.instrumentation.timed("parse", "observations", nbytes=len(content)):
+            data = _read_csv(content, _observations_schema(names))
         if rename_columns:
-            data = data.rename(columns=NAME_EXPLICIT_EN_COMMON)
-            data = data.rename(columns=NAME_EXPLICIT_EN_6min)
+            data = data.rename(columns={**NAME_EXPLICIT_EN_COMMON, **names})
         return data
@@ -1,23 +1,287 @@
 """Functionnalities to deal with the raster data"""
+from collections import OrderedDict
+import os
+import threading
+
+import numpy as np
 import rasterio
-import matplotlib.pyplot as plt
-import cartopy.crs as ccrs
-from cartopy import feature
+from rasterio.io import MemoryFile
+from rasterio.windows import Window, from_bounds
+
+#: The default size of the decoded rasters kept in memory, in bytes.
+DEFAULT_MEMORY_CACHE_BYTES = 512 * 2**20
+
+
+class RasterMemoryCache:
+    """LRU cache of the decoded rasters, bounded in bytes.
+
+    The rasters are keyed by their path and modification time,
+    so that a file rewritten in the cache directory is decoded again.
+
+    Parameters
+    ----------
+    max_bytes : int
+        the maximum size of the cached arrays, in bytes.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MEMORY_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(filename):
+        """The key of a file: its absolute path and modification time."""
+        stat = os.stat(filename)
+        return os.path.abspath(filename), stat.st_mtime_ns
+
+    def get(self, key):
+        """Return the cached ``(field, transform)`` of `key`, or None."""
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key, value, nbytes):
+        """Cache `value`, evicting the least recently used items if needed."""
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._items:
+                self.nbytes -= self._items.pop(key)[1]
+            self._items[key] = (value, nbytes)
+            self.nbytes += nbytes
+            while self.nbytes > self.max_bytes:
+                _, (_, evicted_nbytes) = self._items.popitem(last=False)
+                self.nbytes -= evicted_nbytes
 
+    def clear(self):
+        """Remove all the cached rasters, and reset the counts of hits and misses."""
+        with self._lock:
+            self._items.clear()
+            self.nbytes = 0
+            self.hits = 0
+            self.misses = 0
 
-def open_tiff_file(filename):
+
+#: The cache used by :func:`open_tiff_file`.
+memory_cache = RasterMemoryCache()
+
+
+def open_tiff_file(filename, use_cache: bool = True):
+    """Open a tiff file and return its first band.
+
+    The decoded bands are kept in :data:`memory_cache`,
+    so that opening the same file again does not decompress it again.
+
+    Parameters
+    ----------
+    filename : pathlib.Path
+        the tiff file.
+    use_cache : bool, optional
+        use the memory cache, by default True.
+
+    Returns
+    -------
+    field : numpy.ma.MaskedArray
+        the values of the raster. It is read-only if it comes from the cache.
+    transform : affine.Affine
+        the transform from the pixel indices to the longitude and latitude.
+    """
+    key = RasterMemoryCache.key(filename) if use_cache else None
+    if use_cache:
+        cached = memory_cache.get(key)
+        if cached is not None:
+            return cached
     with rasterio.open(filename) as src:
         field = src.read(1, masked=True)
         transform = src.transform
+    if use_cache:
+        field.setflags(write=False)
+        memory_cache.put(key, (field, transform), field.nbytes + field.mask.nbytes)
+    return field, transform
+
+
+def read_tiff_window(filename, lat, long):
+    """Read the values of a tiff file within a latitude and longitude box.
+
+    Only the blocks of the file intersecting the box are decoded,
+    unless the whole file is already in :data:`memory_cache`.
+
+    Parameters
+    ----------
+    filename : pathlib.Path
+        the tiff file.
+    lat : tuple[float]
+        the min and max latitude.
+    long : tuple[float]
+        the min and max longitude.
+
+    Returns
+    -------
+    field : numpy.ma.MaskedArray
+        the values of the raster within the box.
+    transform : affine.Affine
+        the transform of the window.
+    """
+    cached = memory_cache.get(RasterMemoryCache.key(filename))
+    if cached is not None:
+        field, transform = cached
+        window = _window(transform, field.shape, lat, long)
+        return field[window.toslices()], rasterio.windows.transform(window, transform)
+    with rasterio.open(filename) as src:
+        window = _window(src.transform, src.shape, lat, long)
+        field = src.read(1, window=window, masked=True)
+        transform = src.window_transform(window)
     return field, transform
 
+
+def _window(transform, shape, lat, long):
+    """The window of a raster covering a box, clipped to the raster."""
+    window = from_bounds(long[0], lat[0], long[1], lat[1], transform=transform)
+    window = window.round_offsets().round_lengths()
+    return window.intersection(Window(0, 0, shape[1], shape[0]))
+
+def sample_tiff_files(filenames, lat, lon, method="nearest"):
+    """Sample tiff files at many locations at once.
+
+    The locations are converted to pixel coordinates with the inverse transform
+    of the rasters, in one vectorized pass per distinct grid.
+
+    Parameters
+    ----------
+    filenames : pathlib.Path | list[pathlib.Path]
+        a tiff file, or a list of tiff files (for instance, one per forecast time).
+    lat : array_like
+        the latitudes of the N locations.
+    lon : array_like
+        the longitudes of the N locations.
+    method : {"nearest", "bilinear"}, optional
+        the interpolation method, by default "nearest".
+
+    Returns
+    -------
+    numpy.ndarray
+        the values at the locations, of shape (N,) for a single file,
+        or (len(filenames), N) for a list of files.
+        The locations outside of a raster, or on masked values, are NaN.
+    """
+    if method not in ("nearest", "bilinear"):
+        raise ValueError("The parameter method must be 'nearest' or 'bilinear'")
+    single = isinstance(filenames, (str, os.PathLike))
+    if single:
+        filenames = [filenames]
+    lat = np.asarray(lat, dtype="float64")
+    lon = np.asarray(lon, dtype="float64")
+    values = np.full((len(filenames), lat.size), np.nan)
+    weights_of_grid = {}
+    for i, filename in enumerate(filenames):
+        field, transform = open_tiff_file(filename)
+        grid = (tuple(transform), field.shape)
+        if grid not in weights_of_grid:
+            weights_of_grid[grid] = _sampling_weights(transform, field.shape, lat, lon, method)
+        rows, cols, weights = weights_of_grid[grid]
+        # only the sampled pixels are converted, not the whole raster
+        sampled = np.ma.filled(field[rows, cols].astype("float64"), np.nan)
+        values[i] = np.sum(sampled * weights, axis=0)
+    return values[0] if single else values
+
+
+def _sampling_weights(transform, shape, lat, lon, method):
+    """Return the pixel indices and the weights interpolating a raster at locations.
+
+    Returns
+    -------
+    rows, cols : numpy.ndarray
+        the indices of the pixels, of shape (K, N),
+        with K = 1 for "nearest" and K = 4 for "bilinear".
+    weights : numpy.ndarray
+        the weights of the pixels, of shape (K, N). NaN outside of the raster.
+    """
+    inverse = ~transform
+    cols = inverse.a * lon + inverse.b * lat + inverse.c
+    rows = inverse.d * lon + inverse.e * lat + inverse.f
+    height, width = shape
+    outside = (cols < 0) | (cols >= width) | (rows < 0) | (rows >= height)
+    if method == "nearest":
+        rows = np.clip(np.floor(rows), 0, height - 1).astype(int)[np.newaxis]
+        cols = np.clip(np.floor(cols), 0, width - 1).astype(int)[np.newaxis]
+        weights = np.ones(rows.shape)
+    else:
+        # the values are at the centers of the pixels
+        x = np.clip(cols - 0.5, 0, width - 1)
+        y = np.clip(rows - 0.5, 0, height - 1)
+        x0 = np.minimum(np.floor(x), max(width - 2, 0)).astype(int)
+        y0 = np.minimum(np.floor(y), max(height - 2, 0)).astype(int)
+        x1 = np.minimum(x0 + 1, width - 1)
+        y1 = np.minimum(y0 + 1, height - 1)
+        fx = x - x0
+        fy = y - y0
+        rows = np.stack([y0, y0, y1, y1])
+        cols = np.stack([x0, x1, x0, x1])
+        weights = np.stack([(1 - fx) * (1 - fy), fx * (1 - fy), (1 - fx) * fy, fx * fy])
+    weights[:, outside] = np.nan
+    return rows, cols, weights
+
+
+def crop_tiff(filename, lat, long):
+    """Crop a tiff file to a latitude and longitude box.
+
+    Parameters
+    ----------
+    filename : pathlib.Path
+        the tiff file, which extent contains the box.
+    lat : tuple[float]
+        the min and max latitude.
+    long : tuple[float]
+        the min and max longitude.
+
+    Returns
+    -------
+    bytes
+        the content of the cropped tiff file.
+    """
+    with rasterio.open(filename) as src:
+        window = from_bounds(long[0], lat[0], long[1], lat[1], transform=src.transform)
+        window = window.round_offsets().round_lengths()
+        profile = src.profile
+        profile.update(
+            width=window.width,
+            height=window.height,
+            transform=src.window_transform(window),
+            compress="deflate",
+        )
+        data = src.read(window=window)
+    with MemoryFile() as memfile:
+        with memfile.open(**profile) as dst:
+            dst.write(data)
+        return memfile.read()
+
 def plot_tiff_file(filename, data_type="temperature"):
     """Open a tiff file an plot it.
 
     .. note::
         This Function is more an "How-To" rather than a tool to use as is.
 
+    It requires the ``matplotlib`` and ``cartopy`` packages::
+
+        pip install meteofrance-publicapi[plot]
     """
+    try:
+        import matplotlib.pyplot as plt
+        import cartopy.crs as ccrs
+        from cartopy import feature
+    except ImportError as e:
+        raise ImportError(
+            "Plotting requires matplotlib and cartopy: pip install meteofrance-publicapi[plot]"
+        ) from e
     data_field, transform = open_tiff_file(filename=filename)
     # Display the source image with cartopy using the geotransform from the source dataset
     fig = plt.figure(figsize=(10, 10))
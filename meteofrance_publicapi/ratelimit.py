@@ -0,0 +1,139 @@
+"""Client-side rate limiting and retry scheduling.
+
+The meteo-France portal limits the number of requests per minute
+(50 requests per minute for the public plans).
+A :class:`RateLimiter` spaces the requests of a client so that the quota is not exceeded,
+and :func:`retry_delay` computes the waiting time before retrying a throttled
+or failed request.
+"""
+import asyncio
+import email.utils
+import random
+import threading
+import time
+
+from .const import (
+    BACKEND_ERROR_CODE,
+    INTERNAL_ERROR_CODE,
+    THROTTLED_CODE,
+    UNUVAILABLE_CODE,
+)
+
+#: The default number of requests per minute allowed by the portal.
+DEFAULT_RATE_LIMIT = 50
+#: The default number of retries of a throttled or failed request.
+DEFAULT_MAX_RETRIES = 3
+#: The default base delay of the exponential backoff, in seconds.
+DEFAULT_BACKOFF_FACTOR = 1.0
+#: The maximum delay between two retries, in seconds.
+MAX_BACKOFF = 60.0
+#: The status codes of the requests that are retried.
+RETRY_CODES = (THROTTLED_CODE, INTERNAL_ERROR_CODE, UNUVAILABLE_CODE, BACKEND_ERROR_CODE)
+
+
+class RateLimiter:
+    """A token bucket limiting the number of requests per period.
+
+    The bucket is thread-safe and can be awaited from a coroutine:
+    each request reserves a token under a lock, and then sleeps
+    (or awaits) outside of the lock until its token is available.
+    The same limiter can be shared by several clients.
+
+    Parameters
+    ----------
+    rate : float
+        the number of requests allowed per `period`.
+    period : float, optional
+        the period in seconds, by default 60 seconds.
+    burst : int | None, optional
+        the number of requests that can be made at once,
+        by default `rate`.
+    """
+
+    def __init__(self, rate: float, period: float = 60, burst: int | None = None):
+        if rate <= 0 or period <= 0:
+            raise ValueError("The parameters rate and period must be positive")
+        self.rate = rate
+        self.period = period
+        self.capacity = burst or rate
+        self._fill_rate = rate / period  # tokens per second
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        """Take a token and return the time to wait before using it, in seconds."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._last) * self._fill_rate
+            )
+            self._last = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self._fill_rate
+
+    def acquire(self):
+        """Block until a request can be made."""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """Wait, without blocking the event loop, until a request can be made."""
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+def make_rate_limiter(rate_limit):
+    """Return a :class:`RateLimiter` from the `rate_limit` parameter of a client.
+
+    Parameters
+    ----------
+    rate_limit : float | RateLimiter | None
+        the number of requests per minute, an existing limiter,
+        or None to disable the rate limiting.
+    """
+    if rate_limit is None or isinstance(rate_limit, RateLimiter):
+        return rate_limit
+    return RateLimiter(rate_limit, period=60)
+
+
+def retry_delay(res, attempt, backoff_factor=DEFAULT_BACKOFF_FACTOR):
+    """Return the time to wait before retrying a request, in seconds.
+
+    The ``Retry-After`` header is honoured if present.
+    Otherwise, the delay grows exponentially with the attempt number,
+    with a random jitter so that concurrent clients do not retry at the same time.
+
+    Parameters
+    ----------
+    res : requests.Response | httpx.Response
+        the response of the failed request
+    attempt : int
+        the number of the attempt, starting from 0
+    backoff_factor : float, optional
+        the base delay, in seconds.
+    """
+    retry_after = _parse_retry_after(res.headers.get("Retry-After"))
+    if retry_after is not None:
+        return min(retry_after, MAX_BACKOFF)
+    backoff = min(backoff_factor * 2**attempt, MAX_BACKOFF)
+    return backoff / 2 + random.uniform(0, backoff / 2)
+
+
+def _parse_retry_after(value):
+    """Parse a ``Retry-After`` header, given in seconds or as an HTTP date."""
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(date.timestamp() - time.time(), 0.0)
@@ -0,0 +1,110 @@
+"""Spatial index of the observation stations.
+
+The :class:`StationCatalog` indexes the stations listed by
+:meth:`.Observations.list_stations` in a KD-tree of their positions on the unit sphere,
+so that the nearest stations of many points are found in one vectorized query.
+It is built by :meth:`.Observations.get_station_catalog`,
+from the list of stations cached on disk.
+"""
+import numpy as np
+from scipy.spatial import cKDTree
+
+#: The mean radius of the Earth, in km.
+EARTH_RADIUS_KM = 6371.0
+
+
+def _unit_vectors(lat, lon):
+    """Return the (N, 3) positions of points on the unit sphere."""
+    lat = np.radians(np.asarray(lat, dtype="float64"))
+    lon = np.radians(np.asarray(lon, dtype="float64"))
+    cos_lat = np.cos(lat)
+    return np.stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+class StationCatalog:
+    """The stations, indexed by position.
+
+    Parameters
+    ----------
+    stations : pd.DataFrame
+        the list of stations, see :meth:`.Observations.list_stations`.
+        The stations without position are left out.
+    id_column, lat_column, lon_column : str, optional
+        the columns of the station IDs, latitudes and longitudes.
+    """
+
+    def __init__(
+        self,
+        stations,
+        id_column: str = "Id_station",
+        lat_column: str = "Latitude",
+        lon_column: str = "Longitude",
+    ):
+        stations = stations.dropna(subset=[lat_column, lon_column]).reset_index(drop=True)
+        #: the stations, with a position
+        self.stations = stations
+        #: the station IDs, in the order of :attr:`stations`
+        self.ids = stations[id_column].to_numpy()
+        self.lat = stations[lat_column].to_numpy(dtype="float64")
+        self.lon = stations[lon_column].to_numpy(dtype="float64")
+        self._tree = cKDTree(_unit_vectors(self.lat, self.lon))
+
+    def __len__(self):
+        return len(self.stations)
+
+    def nearest(self, lat, lon, k: int = 1, max_distance: float | None = None):
+        """Find the `k` nearest stations of each point.
+
+        Parameters
+        ----------
+        lat, lon : float | array_like
+            the latitudes and longitudes of the points, in degrees.
+        k : int, optional
+            the number of stations per point, by default 1.
+        max_distance : float, optional
+            the maximum distance of the stations, in km. By default, unbounded.
+
+        Returns
+        -------
+        distances : np.ndarray
+            the great-circle distances, in km, of shape ``(N, k)``,
+            or ``(N,)`` if `k` is 1, or a scalar for a single point and `k` 1.
+            ``inf`` where there are less than `k` stations within `max_distance`.
+        ids : np.ndarray
+            the IDs of the stations, of the same shape. None where the distance is ``inf``.
+        """
+        points = _unit_vectors(lat, lon)
+        upper_bound = np.inf
+        if max_distance is not None:
+            upper_bound = 2 * np.sin(min(max_distance / EARTH_RADIUS_KM, np.pi) / 2)
+        chords, indices = self._tree.query(points, k=k, distance_upper_bound=upper_bound)
+        indices = np.asarray(indices)
+        found = indices < len(self)
+        chords = np.where(found, chords, 0)
+        distances = np.where(found, 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(chords / 2, 1)), np.inf)
+        ids = np.full(indices.shape, None, dtype=object)
+        ids[found] = self.ids[indices[found]]
+        if ids.ndim == 0:
+            return distances.item(), ids.item()
+        return distances, ids
+
+    def in_bbox(self, lat, lon):
+        """Return the stations in a box.
+
+        Parameters
+        ----------
+        lat : tuple[float]
+            the min and max latitude of the box.
+        lon : tuple[float]
+            the min and max longitude of the box.
+
+        Returns
+        -------
+        pd.DataFrame
+            the stations in the box.
+        """
+        inside = (
+            (self.lat >= lat[0]) & (self.lat <= lat[1])
+            & (self.lon >= lon[0]) & (self.lon <= lon[1])
+        )
+        return self.stations[inside]
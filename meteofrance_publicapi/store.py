@@ -0,0 +1,159 @@
+"""Zarr store of the downloaded forecast runs.
+
+Instead of keeping each forecast slice as a separate tiff file,
+a :class:`ZarrRunStore` appends the slices to chunked and compressed arrays,
+one Zarr group per model run and coverage name::
+
+    path/
+        2024-03-20T06.00.00Z/
+            TEMPERATURE__SPECIFIC_HEIGHT_LEVEL_ABOVE_GROUND/
+                data    (time, height, lat, lon)
+                time    (time,)    the forecast times, in seconds
+                height  (height,)  the heights, in meters
+                lat     (lat,)     the latitudes of the centers of the pixels
+                lon     (lon,)     the longitudes of the centers of the pixels
+
+The times and heights are stored in the order of the appends.
+The groups can be opened with ``xarray.open_zarr`` (see :meth:`ZarrRunStore.open`).
+
+It requires the ``zarr`` package (version 3)::
+
+    pip install meteofrance-publicapi[store]
+"""
+import logging
+from pathlib import Path
+
+import numpy as np
+
+from .cache import KeyLocks
+from .catalog import parse_coverageid
+from .forecast import DEFAULT_CHUNK_SIZE
+from .raster import open_tiff_file
+
+logger = logging.getLogger(__name__)
+
+
+def _import_zarr():
+    try:
+        import zarr
+    except ImportError as e:
+        raise ImportError(
+            "The Zarr store requires zarr: pip install meteofrance-publicapi[store]"
+        ) from e
+    return zarr
+
+
+class ZarrRunStore:
+    """Append forecast slices to Zarr arrays, one group per run and coverage name.
+
+    The appends are locked between the threads and the processes sharing the store,
+    so that several workers can fill the same run.
+
+    Parameters
+    ----------
+    path : str | pathlib.Path
+        the directory of the store.
+    chunks : int, optional
+        the size of the spatial chunks, in pixels.
+    """
+
+    def __init__(self, path, chunks: int = DEFAULT_CHUNK_SIZE):
+        self.path = Path(path)
+        self.chunks = chunks
+        # the lock file is next to the store, not in the Zarr hierarchy
+        self._locks = KeyLocks(self.path.parent, f".{self.path.name}.lock")
+
+    def group_path(self, coverageid):
+        """Return the run and coverage name of a coverage ID, as a group path."""
+        parts = parse_coverageid(coverageid)
+        return f"{parts.run_time}/{parts.name}"
+
+    def append(self, coverageid, height, time, filename):
+        """Append a forecast slice to the store.
+
+        If the slice is already stored, it is overwritten.
+
+        Parameters
+        ----------
+        coverageid : str
+            the coverage ID of the slice.
+        height : int | None
+            the height of the slice, in meters.
+            None for the coverages without height axis, stored at the height 0.
+        time : int
+            the forecast time of the slice, in seconds.
+        filename : pathlib.Path
+            the tiff file of the slice.
+        """
+        zarr = _import_zarr()
+        height = 0 if height is None else height
+        field, transform = open_tiff_file(filename)
+        values = np.ma.filled(field.astype("float32"), np.nan)
+        group_path = self.group_path(coverageid)
+        with self._locks.lock(group_path):
+            root = zarr.open_group(self.path, mode="a")
+            if group_path in root:
+                group = root[group_path]
+                if group["data"].shape[2:] != values.shape:
+                    raise ValueError(f"The slice of {filename} is not on the grid of {group_path}")
+            else:
+                group = self._create_group(root, group_path, values.shape, transform)
+            i_time = self._index(group, "time", time)
+            i_height = self._index(group, "height", height)
+            group["data"][i_time, i_height] = values
+        logger.debug(f"stored {coverageid} {height}m {time}s in {self.path}")
+
+    def _create_group(self, root, group_path, shape, transform):
+        """Create the arrays of a run and coverage name."""
+        group = root.require_group(group_path)
+        height, width = shape
+        chunks = (1, 1, min(self.chunks, height), min(self.chunks, width))
+        group.create_array(
+            "data", shape=(0, 0, height, width), chunks=chunks, dtype="float32",
+            fill_value=np.nan, dimension_names=("time", "height", "lat", "lon"),
+        )
+        for name in ("time", "height"):
+            group.create_array(name, shape=(0,), chunks=(1024,), dtype="int64", dimension_names=(name,))
+        lon = transform.c + transform.a * (np.arange(width) + 0.5)
+        lat = transform.f + transform.e * (np.arange(height) + 0.5)
+        for name, values in (("lat", lat), ("lon", lon)):
+            array = group.create_array(
+                name, shape=values.shape, dtype="float64", dimension_names=(name,)
+            )
+            array[:] = values
+        return group
+
+    @staticmethod
+    def _index(group, axis, value):
+        """Return the index of `value` along an axis, extending the axis if needed."""
+        coordinates = group[axis][:]
+        found = np.flatnonzero(coordinates == value)
+        if found.size:
+            return int(found[0])
+        index = coordinates.size
+        group[axis].resize((index + 1,))
+        group[axis][index] = value
+        data = group["data"]
+        shape = list(data.shape)
+        shape[("time", "height").index(axis)] = index + 1
+        data.resize(tuple(shape))
+        return index
+
+    def runs(self):
+        """Return the sorted run times in the store."""
+        if not self.path.exists():
+            return []
+        zarr = _import_zarr()
+        return sorted(zarr.open_group(self.path, mode="r").group_keys())
+
+    def open(self, coverageid):
+        """Open the run and coverage name of a coverage ID with xarray.
+
+        Returns
+        -------
+        xarray.Dataset
+            the dataset, with the variable ``data`` of dimensions (time, height, lat, lon).
+        """
+        import xarray as xr
+
+        return xr.open_zarr(self.path, group=self.group_path(coverageid), consolidated=False)
@@ -0,0 +1,505 @@
+"""Local stand-in for the endpoints of the meteo-France API, for tests and benchmarks.
+
+The :class:`FakeMeteoFranceServer` answers, on ``127.0.0.1``, the requests of the clients:
+
+- the token requests,
+- the WCS ``GetCapabilities``, ``DescribeCoverage`` and ``GetCoverage`` requests of
+  :class:`.AromeForecast` and :class:`.ArpegeForecast`, with synthetic GeoTIFF rasters,
+- the CSV requests of :class:`.Observations`: the list of stations,
+  the ``/station/*`` and the ``/paquet/*`` resources.
+
+It can add latency to the responses, and throttle (429) or fail (503) a share of them,
+so that the retries and the throughput of the clients are measured without network.
+
+Usage
+-----
+
+.. code-block:: python
+
+    from meteofrance_publicapi import AromeForecast
+    from meteofrance_publicapi.testing import FakeMeteoFranceServer
+
+    with FakeMeteoFranceServer(latency=0.05, throttle_rate=0.1) as server:
+        client = server.client(AromeForecast, application_id="fake", cache_dir=tmp_dir)
+        client.get_capabilities()
+        filepaths = client.get_coverages(client.all_coverageid[:4], lat=(45, 46), long=(2, 3))
+
+The rasters are generated with ``rasterio``, which is only imported by the
+``GetCoverage`` requests.
+"""
+import json
+import logging
+import random
+import re
+import threading
+import time
+import zlib
+from collections import Counter
+from datetime import datetime, timedelta
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from .auth import MemoryTokenBackend, TokenManager
+from .const import (
+    MISSING_DATA_CODE,
+    PARTIAL_CONTENT_CODE,
+    RANGE_NOT_SATISFIABLE_CODE,
+    SUCCESS_CODE,
+    THROTTLED_CODE,
+    UNUVAILABLE_CODE,
+)
+
+logger = logging.getLogger(__name__)
+
+#: The host of the URLs of the API, replaced by the URL of the fake server.
+API_HOSTS = ("https://public-api.meteofrance.fr", "https://portail-api.meteofrance.fr")
+#: The coverage names served by default.
+DEFAULT_COVERAGE_NAMES = (
+    "TEMPERATURE__SPECIFIC_HEIGHT_LEVEL_ABOVE_GROUND",
+    "RELATIVE_HUMIDITY__SPECIFIC_HEIGHT_LEVEL_ABOVE_GROUND",
+    "WIND_SPEED__SPECIFIC_HEIGHT_LEVEL_ABOVE_GROUND",
+)
+#: The heights of the coverages, in meters.
+DEFAULT_HEIGHTS = (2, 10, 20, 50, 100)
+#: The forecast times of the coverages, in seconds.
+DEFAULT_TIMES = tuple(range(0, 49 * 3600, 3600))
+#: The box of the coverages, as ((lat min, lat max), (long min, long max)).
+DEFAULT_EXTENT = ((37.5, 55.4), (-12.0, 16.0))
+
+_SUBSET = re.compile(r"(\w+)\(([^)]*)\)")
+
+
+def _run_times(n_runs, interval_hours=3, start=datetime(2024, 1, 1)):
+    """Return `n_runs` run times, as in the coverage IDs, for instance "2024-01-01T03.00.00Z"."""
+    return [
+        (start + timedelta(hours=i * interval_hours)).strftime("%Y-%m-%dT%H.%M.%SZ")
+        for i in range(n_runs)
+    ]
+
+
+@lru_cache(maxsize=256)
+def synthetic_tiff(lat, long, resolution=0.01, seed=0):
+    """Generate a GeoTIFF of a smooth temperature field, in °C.
+
+    Parameters
+    ----------
+    lat, long : tuple[float]
+        the min and max latitude and longitude of the raster.
+    resolution : float, optional
+        the size of the pixels, in degrees.
+    seed : int, optional
+        the seed of the noise of the field.
+
+    Returns
+    -------
+    bytes
+        the content of the tiff file, DEFLATE-compressed.
+    """
+    import numpy as np
+    from rasterio.io import MemoryFile
+    from rasterio.transform import from_origin
+
+    height = max(1, round((lat[1] - lat[0]) / resolution))
+    width = max(1, round((long[1] - long[0]) / resolution))
+    lats = lat[1] - resolution * (np.arange(height) + 0.5)
+    longs = long[0] + resolution * (np.arange(width) + 0.5)
+    rng = np.random.default_rng(seed)
+    field = (
+        25 - 0.6 * (lats[:, None] - 40) + 2 * np.sin(np.radians(8 * longs))[None, :]
+        + rng.normal(0, 0.5, (height, width))
+    ).astype("float32")
+    with MemoryFile() as memfile:
+        with memfile.open(
+            driver="GTiff", height=height, width=width, count=1, dtype="float32",
+            crs="EPSG:4326", transform=from_origin(long[0], lat[1], resolution, resolution),
+            compress="DEFLATE",
+        ) as dst:
+            dst.write(field, 1)
+        return memfile.read()
+
+
+class FakeMeteoFranceServer:
+    """A local HTTP server answering the requests of the clients, in a thread.
+
+    Parameters
+    ----------
+    coverage_names : Iterable[str], optional
+        the names of the coverages of the capabilities, by default :data:`DEFAULT_COVERAGE_NAMES`.
+    n_runs : int, optional
+        the number of model runs of each coverage name, by default 8.
+    heights, times : Iterable[int], optional
+        the heights (m) and forecast times (s) of the coverages.
+    resolution : float, optional
+        the size of the pixels of the rasters, in degrees, by default 0.01.
+    n_stations : int, optional
+        the number of observation stations, by default 100.
+    latency : float, optional
+        the delay of each response, in seconds, by default 0.
+    throttle_rate : float, optional
+        the share of the requests answered with "429 Too Many Requests", by default 0.
+    failure_rate : float, optional
+        the share of the requests answered with "503 Service Unavailable", by default 0.
+    seed : int, optional
+        the seed of the throttled and failed requests, and of the synthetic data.
+
+    Attributes
+    ----------
+    requests : collections.Counter
+        the number of requests, by endpoint, such as "GetCoverage" or "token".
+    statuses : collections.Counter
+        the number of responses, by status code.
+    """
+
+    def __init__(
+        self,
+        coverage_names=DEFAULT_COVERAGE_NAMES,
+        n_runs: int = 8,
+        heights=DEFAULT_HEIGHTS,
+        times=DEFAULT_TIMES,
+        resolution: float = 0.01,
+        n_stations: int = 100,
+        latency: float = 0.0,
+        throttle_rate: float = 0.0,
+        failure_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        self.run_times = _run_times(n_runs)
+        self.coverage_ids = [
+            f"{name}___{run_time}" for name in coverage_names for run_time in self.run_times
+        ]
+        self.heights = list(heights)
+        self.times = list(times)
+        self.resolution = resolution
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.failure_rate = failure_rate
+        self.seed = seed
+        self.requests = Counter()
+        self.statuses = Counter()
+        self.stations = self._make_stations(n_stations)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._tokens = 0
+        self._httpd = None
+        self._thread = None
+
+    def _make_stations(self, n_stations):
+        """Generate the stations, spread over the first departments."""
+        rng = random.Random(self.seed)
+        stations = []
+        for i in range(n_stations):
+            departement = i % 95 + 1
+            stations.append({
+                "Id_station": f"{departement:02d}{i:03d}{rng.randrange(1000):03d}",
+                "Nom_usuel": f"STATION {i}",
+                "Latitude": round(rng.uniform(42.5, 51), 4),
+                "Longitude": round(rng.uniform(-4.5, 8), 4),
+                "Altitude": rng.randrange(0, 2000),
+            })
+        return stations
+
+    def start(self):
+        """Start the server, on a free port."""
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), _handler(self))
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        logger.debug(f"fake server listening on {self.url}")
+        return self
+
+    def stop(self):
+        """Stop the server."""
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._thread.join()
+            self._httpd = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    @property
+    def url(self):
+        """The URL of the server, such as ``http://127.0.0.1:8765``."""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def token_url(self):
+        """The URL of the token requests."""
+        return self.url + "/token"
+
+    def url_of(self, url):
+        """Replace the host of an URL of the API by the URL of the server."""
+        for host in API_HOSTS:
+            if url.startswith(host):
+                return self.url + url[len(host):]
+        return url
+
+    def client(self, cls, **kwargs):
+        """Create a client of the API requesting the server.
+
+        Parameters
+        ----------
+        cls : type
+            the class of the client, such as :class:`.AromeForecast`.
+        **kwargs
+            the parameters of the client. By default, the client requests tokens
+            with the application ID "fake", shared in memory.
+
+        Returns
+        -------
+        MeteoFranceAPI
+            an instance of a subclass of `cls`, with the URLs of the server.
+        """
+        attributes = {
+            name: self.url_of(getattr(cls, name))
+            for name in ("base_url", "paquet_base_url", "token_url")
+            if hasattr(cls, name)
+        }
+        if not {"api_key", "token", "application_id"} & set(kwargs):
+            kwargs["application_id"] = "fake"
+        if kwargs.get("application_id") is not None and "token_manager" not in kwargs:
+            kwargs["token_manager"] = TokenManager(
+                kwargs["application_id"], MemoryTokenBackend(), token_url=self.token_url
+            )
+        return type(cls.__name__, (cls,), attributes)(**kwargs)
+
+    def _draw(self):
+        """Draw whether a request is throttled or failed, or answered."""
+        with self._lock:
+            draw = self._random.random()
+        if draw < self.throttle_rate:
+            return THROTTLED_CODE
+        if draw < self.throttle_rate + self.failure_rate:
+            return UNUVAILABLE_CODE
+        return SUCCESS_CODE
+
+    def new_token(self):
+        """Return a new token, as the JSON of the token endpoint."""
+        with self._lock:
+            self._tokens += 1
+            token = f"fake-token-{self._tokens}"
+        return json.dumps({"access_token": token, "token_type": "Bearer", "expires_in": 3600})
+
+    def capabilities_xml(self):
+        """Return the GetCapabilities document, listing :attr:`coverage_ids`."""
+        summaries = "".join(
+            "<wcs:CoverageSummary>"
+            f"<wcs:CoverageId>{coverage_id}</wcs:CoverageId>"
+            "<wcs:CoverageSubtype>ReferenceableGridCoverage</wcs:CoverageSubtype>"
+            "</wcs:CoverageSummary>\n"
+            for coverage_id in self.coverage_ids
+        )
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<wcs:Capabilities xmlns:wcs="http://www.opengis.net/wcs/2.0" version="2.0.1">\n'
+            f"<wcs:Contents>\n{summaries}</wcs:Contents>\n</wcs:Capabilities>\n"
+        )
+
+    def description_xml(self, coverage_id):
+        """Return the DescribeCoverage document of a coverage.
+
+        The document gives the box of the coverage, and the coefficients of its
+        time and height axes, as the documents of the API.
+        """
+        (lat_min, lat_max), (long_min, long_max) = DEFAULT_EXTENT
+        run_time = coverage_id.rsplit("___", 1)[-1]
+        begin = run_time.replace(".", ":")
+        n_lat = round((lat_max - lat_min) / self.resolution)
+        n_long = round((long_max - long_min) / self.resolution)
+        crs = "http://www.opengis.net/def/crs/EPSG/0/4326"
+        times = " ".join(str(time) for time in self.times)
+        heights = " ".join(str(height) for height in self.heights)
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<wcs:CoverageDescriptions xmlns:wcs="http://www.opengis.net/wcs/2.0"'
+            ' xmlns:gml="http://www.opengis.net/gml/3.2"'
+            ' xmlns:gmlrgrid="http://www.opengis.net/gml/3.3/rgrid">\n'
+            f'<wcs:CoverageDescription gml:id="{coverage_id}">\n'
+            "<gml:boundedBy>"
+            f'<gml:EnvelopeWithTimePeriod srsName="{crs}" axisLabels="lat long" uomLabels="deg deg" srsDimension="2">'
+            f"<gml:lowerCorner>{lat_min} {long_min}</gml:lowerCorner>"
+            f"<gml:upperCorner>{lat_max} {long_max}</gml:upperCorner>"
+            f"<gml:beginPosition>{begin}</gml:beginPosition>"
+            "</gml:EnvelopeWithTimePeriod></gml:boundedBy>\n"
+            f"<wcs:CoverageId>{coverage_id}</wcs:CoverageId>\n"
+            "<gml:domainSet>"
+            f'<gmlrgrid:ReferenceableGridByVectors dimension="4" gml:id="grid-{coverage_id}">'
+            "<gml:limits><gml:GridEnvelope>"
+            "<gml:low>0 0 0 0</gml:low>"
+            f"<gml:high>{n_lat - 1} {n_long - 1} {len(self.times) - 1} {len(self.heights) - 1}</gml:high>"
+            "</gml:GridEnvelope></gml:limits>"
+            "<gml:axisLabels>lat long time height</gml:axisLabels>"
+            f'<gmlrgrid:origin><gml:Point gml:id="origin-{coverage_id}" srsName="{crs}">'
+            f"<gml:pos>{lat_max} {long_min} {begin} 0</gml:pos>"
+            "</gml:Point></gmlrgrid:origin>"
+            + self._grid_axis("lat", f"{-self.resolution} 0 0 0", "")
+            + self._grid_axis("long", f"0 {self.resolution} 0 0", "")
+            + self._grid_axis("time", "0 0 1 0", times)
+            + self._grid_axis("height", "0 0 0 1", heights)
+            + "</gmlrgrid:ReferenceableGridByVectors></gml:domainSet>\n"
+            "</wcs:CoverageDescription>\n</wcs:CoverageDescriptions>\n"
+        )
+
+    @staticmethod
+    def _grid_axis(label, offset, coefficients):
+        return (
+            "<gmlrgrid:generalGridAxis><gmlrgrid:GeneralGridAxis>"
+            f"<gmlrgrid:offsetVector>{offset}</gmlrgrid:offsetVector>"
+            f"<gmlrgrid:coefficients>{coefficients}</gmlrgrid:coefficients>"
+            f"<gmlrgrid:gridAxesSpanned>{label}</gmlrgrid:gridAxesSpanned>"
+            "<gmlrgrid:sequenceRule axisOrder=\"+1\">Linear</gmlrgrid:sequenceRule>"
+            "</gmlrgrid:GeneralGridAxis></gmlrgrid:generalGridAxis>"
+        )
+
+    def coverage_tiff(self, params):
+        """Return the GeoTIFF of a GetCoverage request, or None if the coverage is unknown."""
+        coverage_id = params.get("coverageid", [None])[0]
+        if coverage_id not in self.coverage_ids:
+            return None
+        subsets = {}
+        for subset in params.get("subset", []):
+            match = _SUBSET.fullmatch(subset)
+            if match:
+                subsets[match.group(1)] = [float(value) for value in match.group(2).split(",")]
+        if subsets.get("height", [2])[0] not in self.heights:
+            return None
+        if subsets.get("time", [0])[0] not in self.times:
+            return None
+        lat = tuple(subsets.get("lat", DEFAULT_EXTENT[0]))
+        long = tuple(subsets.get("long", DEFAULT_EXTENT[1]))
+        seed = zlib.crc32(f"{self.seed} {coverage_id} {subsets.get('height')} {subsets.get('time')}".encode())
+        return synthetic_tiff(lat, long, self.resolution, seed)
+
+    def stations_csv(self):
+        """Return the CSV of the list of stations."""
+        lines = ["Id_station;Id_omm;Nom_usuel;Latitude;Longitude;Altitude;Date_ouverture;Pack"]
+        for station in self.stations:
+            lines.append(
+                f"{station['Id_station']};;{station['Nom_usuel']};{station['Latitude']};"
+                f"{station['Longitude']};{station['Altitude']};2000-01-01;RADOME"
+            )
+        return "\n".join(lines) + "\n"
+
+    def observations_csv(self, stations, validity_time=None, frequency="horaire"):
+        """Return the CSV of the observations of `stations` at `validity_time`."""
+        if validity_time is None:
+            validity_time = "2024-01-01T00:00:00Z"
+        reference = validity_time[:13] + ":00:00Z"
+        lines = [
+            "geo_id_insee;lat;lon;reference_time;insert_time;validity_time;"
+            "t;td;u;dd;ff;dxi10;fxi10;rr_per"
+        ]
+        rng = random.Random(f"{self.seed} {validity_time} {frequency}")
+        for station in stations:
+            lines.append(
+                f"{station['Id_station']};{station['Latitude']};{station['Longitude']};"
+                f"{reference};{reference};{validity_time};"
+                f"{rng.uniform(270, 300):.1f};{rng.uniform(265, 285):.1f};{rng.randrange(30, 100)};"
+                f"{rng.randrange(0, 360)};{rng.uniform(0, 15):.1f};{rng.randrange(0, 360)};"
+                f"{rng.uniform(0, 25):.1f};{rng.uniform(0, 2):.1f}"
+            )
+        return "\n".join(lines) + "\n"
+
+    def route(self, method, path, params):
+        """Answer a request.
+
+        Returns
+        -------
+        tuple[str, int, str, bytes | None]
+            the endpoint, the status code, the content type and the body.
+            The body None means "404 Not Found".
+        """
+        if method == "POST":
+            if path.endswith("/token"):
+                return "token", SUCCESS_CODE, "application/json", self.new_token().encode()
+            return "unknown", MISSING_DATA_CODE, "text/plain", None
+        if path.endswith("/GetCapabilities"):
+            return "GetCapabilities", SUCCESS_CODE, "text/xml", self.capabilities_xml().encode()
+        if path.endswith("/DescribeCoverage"):
+            coverage_id = params.get("coverageid", [None])[0]
+            if coverage_id not in self.coverage_ids:
+                return "DescribeCoverage", MISSING_DATA_CODE, "text/plain", None
+            return "DescribeCoverage", SUCCESS_CODE, "text/xml", self.description_xml(coverage_id).encode()
+        if path.endswith("/GetCoverage"):
+            return "GetCoverage", SUCCESS_CODE, "image/tiff", self.coverage_tiff(params)
+        if path.endswith("/liste-stations"):
+            return "liste-stations", SUCCESS_CODE, "text/csv", self.stations_csv().encode()
+        frequency = "6min" if path.endswith("infrahoraire-6m") else "horaire"
+        validity_time = params.get("datetime", params.get("date", [None]))[0]
+        if "/station/" in path:
+            station_id = params.get("id_station", [None])[0]
+            stations = [station for station in self.stations if station["Id_station"] == station_id]
+            body = self.observations_csv(stations, validity_time, frequency).encode() if stations else None
+            return "station", SUCCESS_CODE, "text/csv", body
+        if "/paquet/" in path:
+            stations = self.stations
+            if "id-departement" in params:
+                departement = f"{int(params['id-departement'][0]):02d}"
+                stations = [station for station in stations if station["Id_station"].startswith(departement)]
+            return "paquet", SUCCESS_CODE, "text/csv", self.observations_csv(stations, validity_time, frequency).encode()
+        return "unknown", MISSING_DATA_CODE, "text/plain", None
+
+
+def _handler(server):
+    """Build the request handler of a :class:`FakeMeteoFranceServer`."""
+
+    class Handler(BaseHTTPRequestHandler):
+        # keep the connections alive, as the API does
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+        def do_GET(self):
+            self._answer("GET")
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            self.rfile.read(length)
+            self._answer("POST")
+
+        def _answer(self, method):
+            url = urlsplit(self.path)
+            endpoint, status, content_type, body = server.route(method, url.path, parse_qs(url.query))
+            if server.latency:
+                time.sleep(server.latency)
+            if endpoint != "token":
+                status = server._draw() if body is not None else MISSING_DATA_CODE
+            headers = {}
+            if status == THROTTLED_CODE:
+                body, content_type, headers = b"Too Many Requests", "text/plain", {"Retry-After": "0"}
+            elif status == UNUVAILABLE_CODE:
+                body, content_type = b"Service Unavailable", "text/plain"
+            elif body is None:
+                body, content_type = b"No data", "text/plain"
+            elif self.headers.get("Range"):
+                status, body, headers = self._range(body)
+            with server._lock:
+                server.requests[endpoint] += 1
+                server.statuses[status] += 1
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _range(self, body):
+            """Answer a ``Range: bytes=<start>-`` request."""
+            match = re.fullmatch(r"bytes=(\d+)-", self.headers["Range"].strip())
+            start = int(match.group(1)) if match else 0
+            if start >= len(body):
+                return RANGE_NOT_SATISFIABLE_CODE, b"", {"Content-Range": f"bytes */{len(body)}"}
+            return PARTIAL_CONTENT_CODE, body[start:], {
+                "Content-Range": f"bytes {start}-{len(body) - 1}/{len(body)}"
+            }
+
+    return Handler
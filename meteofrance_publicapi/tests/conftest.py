@@ -0,0 +1,39 @@
+# the fixtures shared by the tests
+import pytest
+
+CAPABILITIES = """<?xml version="1.0" encoding="UTF-8"?>
+<wcs:Capabilities xmlns:wcs="http://www.opengis.net/wcs/2.0">
+<wcs:Contents>
+<wcs:CoverageSummary><wcs:CoverageId>TEMPERATURE__SPECIFIC_HEIGHT_LEVEL_ABOVE_GROUND___2024-01-01T00.00.00Z</wcs:CoverageId></wcs:CoverageSummary>
+<wcs:CoverageSummary><wcs:CoverageId>TEMPERATURE__SPECIFIC_HEIGHT_LEVEL_ABOVE_GROUND___2024-01-01T03.00.00Z</wcs:CoverageId></wcs:CoverageSummary>
+</wcs:Contents>
+</wcs:Capabilities>
+"""
+
+
+@pytest.fixture
+def capabilities_xml():
+    """A GetCapabilities document, with two runs of the temperature."""
+    return CAPABILITIES
+
+
+@pytest.fixture
+def write_tiff():
+    """Return a function writing a raster to a tiff file.
+
+    The pixels are 1 degree wide, from 50N and 0E.
+    """
+    np = pytest.importorskip("numpy")
+    rasterio = pytest.importorskip("rasterio")
+    from rasterio.transform import from_origin
+
+    def write(filename, data, nodata=None):
+        data = np.asarray(data, dtype="float32")
+        with rasterio.open(
+            filename, "w", driver="GTiff", width=data.shape[1], height=data.shape[0], count=1,
+            dtype="float32", crs="EPSG:4326", transform=from_origin(0, 50, 1, 1), nodata=nodata,
+        ) as dst:
+            dst.write(data[np.newaxis])
+        return filename
+
+    return write
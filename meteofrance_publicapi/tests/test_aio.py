@@ -0,0 +1,164 @@
+# test the asynchronous clients, without network
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+from meteofrance_publicapi import AsyncAromeForecast
+from meteofrance_publicapi.errors import MissingDataError
+
+def make_client(tmp_path, handler, max_concurrency=2):
+    client = AsyncAromeForecast(api_key="key", cache_dir=tmp_path, max_concurrency=max_concurrency)
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client
+
+
+def test_get_coverage_concurrently(tmp_path, capabilities_xml):
+    running = 0
+    max_running = 0
+
+    async def handler(request):
+        nonlocal running, max_running
+        assert request.headers["apikey"] == "key"
+        if request.url.path.endswith("GetCapabilities"):
+            return httpx.Response(200, text=capabilities_xml)
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return httpx.Response(200, content=b"II*\x00tiff")
+
+    async def main():
+        async with make_client(tmp_path, handler) as client:
+            await client.get_capabilities()
+            return await asyncio.gather(*[client.get_coverage(time=time) for time in range(6)])
+
+    files = asyncio.run(main())
+    assert len(files) == 6
+    assert all(f.read_bytes() == b"II*\x00tiff" for f in files)
+    assert "2024-01-01T03.00.00Z" in str(files[0])
+    assert max_running == 2
+
+
+def test_error_mapping(tmp_path):
+    def handler(request):
+        return httpx.Response(404, text="not found")
+
+    async def main():
+        async with make_client(tmp_path, handler) as client:
+            await client.get_coverage(coverageid="ID")
+
+    with pytest.raises(MissingDataError):
+        asyncio.run(main())
+
+
+def test_fetch_capabilities(tmp_path, capabilities_xml):
+    def handler(request):
+        return httpx.Response(200, text=capabilities_xml)
+
+    async def main():
+        async with make_client(tmp_path, handler) as client:
+            with pytest.raises(ValueError, match="fetch_capabilities"):
+                client.capabilities
+            await client.fetch_capabilities()
+            return client
+
+    client = asyncio.run(main())
+    assert "wcs:Capabilities" in client.capabilities
+    assert len(client.all_coverageid) == 2
+
+
+def test_same_coverage_downloaded_once(tmp_path):
+    downloads = 0
+
+    async def handler(request):
+        nonlocal downloads
+        downloads += 1
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, content=b"II*\x00tiff")
+
+    async def main():
+        async with make_client(tmp_path, handler, max_concurrency=4) as client:
+            return await asyncio.gather(*[client.get_coverage(coverageid="ID") for _ in range(4)])
+
+    files = asyncio.run(main())
+    assert len(set(files)) == 1
+    assert files[0].read_bytes() == b"II*\x00tiff"
+    assert downloads == 1
+
+
+def test_get_point_values(tmp_path):
+    pytest.importorskip("rasterio")
+    from meteofrance_publicapi.testing import FakeMeteoFranceServer
+
+    async def main(server):
+        async with server.client(AsyncAromeForecast, cache_dir=tmp_path, rate_limit=None) as client:
+            await client.get_capabilities()
+            return await client.get_point_values([45.2, 46.1], [2.3, 3.7], times=[0, 3600])
+
+    with FakeMeteoFranceServer(n_runs=1) as server:
+        values = asyncio.run(main(server))
+    assert values.shape == (2, 2)
+    assert not np.isnan(values).any()
+
+
+def test_get_cube(tmp_path):
+    pytest.importorskip("dask")
+    pytest.importorskip("xarray")
+    pytest.importorskip("rasterio")
+    from meteofrance_publicapi.testing import FakeMeteoFranceServer
+
+    async def main(server):
+        async with server.client(AsyncAromeForecast, cache_dir=tmp_path, rate_limit=None) as client:
+            await client.get_capabilities()
+            return await client.get_cube(times=[0, 3600], lat=(45, 46), long=(2, 3))
+
+    with FakeMeteoFranceServer(n_runs=1) as server:
+        cube = asyncio.run(main(server))
+    assert cube.dims == ("time", "lat", "lon")
+    assert list(cube.time.values) == [0, 3600]
+    assert not np.isnan(cube.values).any()
+
+
+def test_coverage_lock_released_on_cancel(tmp_path):
+    client = make_client(tmp_path, lambda request: httpx.Response(404))
+    filepath = tmp_path / "coverage" / "2m_0Z.tiff"
+    held = threading.Event()
+    release = threading.Event()
+    reacquired = threading.Event()
+
+    def hold():
+        with client.coverage_cache.lock(filepath):
+            held.set()
+            release.wait()
+
+    def reacquire():
+        with client.coverage_cache.lock(filepath):
+            reacquired.set()
+
+    async def main():
+        async def wait_lock():
+            async with client._coverage_lock(filepath):
+                pass
+
+        task = asyncio.create_task(wait_lock())
+        await asyncio.sleep(0.1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        release.set()
+        # the thread of the cancelled task takes the lock, and gives it back
+        threading.Thread(target=reacquire, daemon=True).start()
+        return await asyncio.to_thread(reacquired.wait, 2)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    held.wait()
+    try:
+        assert asyncio.run(main())
+    finally:
+        release.set()
+        holder.join()
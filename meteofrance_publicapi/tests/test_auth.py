@@ -0,0 +1,69 @@
+# test the token manager, without network
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from meteofrance_publicapi import auth
+from meteofrance_publicapi.auth import FileTokenBackend, TokenManager
+from meteofrance_publicapi.core import MeteoFranceAPI
+
+
+def fake_token_endpoint(monkeypatch):
+    requested = []
+
+    def post(url, data=None, headers=None):
+        time.sleep(0.01)
+        requested.append(url)
+        return SimpleNamespace(
+            status_code=200,
+            json=lambda: {"access_token": f"token-{len(requested)}", "expires_in": 3600},
+        )
+
+    monkeypatch.setattr(auth.requests, "post", post)
+    return requested
+
+
+def test_shared_token(tmp_path, monkeypatch):
+    requested = fake_token_endpoint(monkeypatch)
+    backend = FileTokenBackend(tmp_path)
+
+    # concurrent requesters wait for one refresh
+    with ThreadPoolExecutor(8) as executor:
+        tokens = list(executor.map(lambda _: TokenManager("app", backend).get_token(), range(8)))
+    assert tokens == ["token-1"] * 8
+    assert len(requested) == 1
+
+    # a rejected token is replaced once
+    manager = TokenManager("app", backend)
+    assert manager.get_token(invalid_token="token-1") == "token-2"
+    assert TokenManager("app", backend).get_token(invalid_token="token-1") == "token-2"
+    assert len(requested) == 2
+
+    # the token is refreshed before it expires
+    manager = TokenManager("app", backend, refresh_margin=3600)
+    assert manager.get_token() == "token-3"
+
+
+def test_expired_token_retry(tmp_path, monkeypatch):
+    fake_token_endpoint(monkeypatch)
+    client = MeteoFranceAPI(
+        application_id="app", token_manager=TokenManager("app", FileTokenBackend(tmp_path)),
+    )
+    assert client.token == "token-1"
+    expired = SimpleNamespace(
+        status_code=401,
+        headers={"Content-Type": "application/json"},
+        json=lambda: {"code": "900901", "description": "Invalid JWT token"},
+        close=lambda: None,
+    )
+    ok = SimpleNamespace(status_code=200, headers={}, close=lambda: None)
+    responses = [expired, ok]
+    authorizations = []
+
+    def get(url, params=None, headers=None, stream=False):
+        authorizations.append(client.session.headers["Authorization"])
+        return responses.pop(0)
+
+    monkeypatch.setattr(client.session, "get", get)
+    assert client._get_request("https://example.com") is ok
+    assert authorizations == ["Bearer token-1", "Bearer token-2"]
@@ -0,0 +1,113 @@
+# test the cache of the coverages
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from meteofrance_publicapi.cache import CoverageCache, KeyLocks
+
+NAME = "TEMPERATURE__SPECIFIC_HEIGHT_LEVEL_ABOVE_GROUND"
+
+
+def test_put_get_evict(tmp_path):
+    cache = CoverageCache(tmp_path, max_bytes=25)
+    old_run = tmp_path / f"{NAME}___2024-01-01T00.00.00Z" / "2m_0Z.tiff"
+    new_run = tmp_path / f"{NAME}___2024-01-01T03.00.00Z" / "2m_0Z.tiff"
+    other = tmp_path / f"{NAME}___2024-01-01T03.00.00Z" / "2m_3600Z.tiff"
+
+    assert not cache.get(old_run)
+    cache.put(old_run, b"0" * 10)
+    cache.put(new_run, b"1" * 10)
+    assert cache.get(old_run)
+    assert old_run.read_bytes() == b"0" * 10
+    assert not list(old_run.parent.glob("*.tmp"))
+
+    # the oldest run is evicted first, even if it was used last
+    cache.put(other, b"2" * 10)
+    assert not old_run.exists()
+    assert new_run.exists() and other.exists()
+    assert cache.stats() == {"hits": 1, "misses": 1, "evictions": 1, "files": 2, "bytes": 20}
+
+
+def test_put_older_run_in_full_cache(tmp_path):
+    cache = CoverageCache(tmp_path, max_bytes=150)
+    new_runs = [tmp_path / f"{NAME}___2024-01-02T00.00.00Z" / f"2m_{time}Z.tiff" for time in (0, 3600)]
+    old_run = tmp_path / f"{NAME}___2024-01-01T00.00.00Z" / "2m_0Z.tiff"
+    for path in new_runs:
+        cache.put(path, b"1" * 60)
+
+    # the file just put is kept, a newer one is evicted instead
+    cache.put(old_run, b"0" * 60)
+    assert old_run.exists()
+    assert cache.get(old_run)
+    assert sum(path.exists() for path in new_runs) == 1
+    assert cache.stats()["bytes"] == 120
+
+
+def test_existing_files_are_adopted(tmp_path):
+    path = tmp_path / f"{NAME}___2024-01-01T00.00.00Z" / "2m_0Z.tiff"
+    os.makedirs(path.parent)
+    path.write_bytes(b"tiff")
+    cache = CoverageCache(tmp_path)
+    assert cache.get(path)
+    assert cache.stats()["files"] == 1
+    with cache.lock(path):
+        pass
+
+
+def test_crop_contained_box(tmp_path, write_tiff):
+    np = pytest.importorskip("numpy")
+    from meteofrance_publicapi.raster import crop_tiff, open_tiff_file
+
+    cache = CoverageCache(tmp_path)
+    coverageid = f"{NAME}___2024-01-01T00.00.00Z"
+    france = tmp_path / coverageid / "france.tiff"
+    france.parent.mkdir()
+    # 1 degree pixels, from 40N to 50N and 0E to 10E
+    write_tiff(france, np.arange(100).reshape(10, 10))
+    cache.register(france, coverageid, 2, 0, (40, 50), (0, 10))
+
+    assert cache.find_containing(coverageid, 2, 0, (42, 45), (1, 3)) == france
+    assert cache.find_containing(coverageid, 2, 0, (42, 55), (1, 3)) is None
+    assert cache.find_containing(coverageid, 2, 3600, (42, 45), (1, 3)) is None
+
+    city = tmp_path / coverageid / "city.tiff"
+    cache.put(city, crop_tiff(france, (42, 45), (1, 3)))
+    field, transform = open_tiff_file(city)
+    assert field.shape == (3, 2)
+    assert field[0, 0] == 51  # row of 45N, column of 1E
+    assert (transform.c, transform.f) == (1, 45)
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="the locks only hold between threads")
+def test_key_locks_between_processes(tmp_path):
+    locks = KeyLocks(tmp_path)
+    holding_a, release_a = threading.Event(), threading.Event()
+
+    def hold_a():
+        with locks.lock("a"):
+            holding_a.set()
+            release_a.wait()
+
+    thread = threading.Thread(target=hold_a)
+    thread.start()
+    try:
+        holding_a.wait()
+        # another thread takes and releases another key, while "a" is held
+        with locks.lock("b"):
+            pass
+        other_process = subprocess.Popen(
+            [sys.executable, "-c", (
+                "import sys; from meteofrance_publicapi.cache import KeyLocks; "
+                "lock = KeyLocks(sys.argv[1]).lock('a'); lock.__enter__(); print('locked')"
+            ), str(tmp_path)],
+            stdout=subprocess.PIPE, text=True,
+        )
+        with pytest.raises(subprocess.TimeoutExpired):
+            other_process.wait(timeout=1)
+    finally:
+        release_a.set()
+        thread.join()
+    assert other_process.communicate(timeout=10)[0] == "locked\n"
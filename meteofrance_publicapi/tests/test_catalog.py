@@ -0,0 +1,39 @@
+# test the catalog of coverage IDs
+import pytest
+
+from meteofrance_publicapi.catalog import CoverageCatalog, parse_coverageid
+
+TEMPERATURE = "TEMPERATURE__SPECIFIC_HEIGHT_LEVEL_ABOVE_GROUND"
+PRECIPITATION = "TOTAL_PRECIPITATION__GROUND_OR_WATER_SURFACE"
+COVERAGE_IDS = [
+    f"{TEMPERATURE}___2024-03-20T06.00.00Z",
+    f"{PRECIPITATION}___2024-03-20T03.00.00Z_PT1H",
+    f"{TEMPERATURE}___2024-03-20T03.00.00Z",
+    f"{PRECIPITATION}___2024-03-20T06.00.00Z_PT1H",
+    f"{PRECIPITATION}___2024-03-20T06.00.00Z_PT3H",
+    "TEMPERATURE__ISOBARIC_SURFACE___2024-03-20T06.00.00Z",
+]
+
+
+def test_parse_coverageid():
+    parts = parse_coverageid(COVERAGE_IDS[1])
+    assert parts.name == PRECIPITATION
+    assert parts.parameter == "TOTAL_PRECIPITATION"
+    assert parts.level_type == "GROUND_OR_WATER_SURFACE"
+    assert parts.run_time == "2024-03-20T03.00.00Z"
+    assert parts.period == "PT1H"
+
+
+def test_catalog():
+    catalog = CoverageCatalog(COVERAGE_IDS)
+    assert catalog.latest(TEMPERATURE) == COVERAGE_IDS[0]
+    assert catalog.latest(PRECIPITATION) == COVERAGE_IDS[4]
+    assert catalog.runs(TEMPERATURE) == ["2024-03-20T03.00.00Z", "2024-03-20T06.00.00Z"]
+    assert catalog.names_of_run("2024-03-20T03.00.00Z") == [TEMPERATURE, PRECIPITATION]
+    assert COVERAGE_IDS[3] in catalog
+    # the lookup by prefix matches the former linear scan
+    for prefix in [TEMPERATURE, "TEMPERATURE__", "TOTAL", f"{PRECIPITATION}___2024-03-20T06", "NONE"]:
+        expected = sorted(c for c in COVERAGE_IDS if c.startswith(prefix))
+        assert catalog.coverageids_of_name(prefix) == expected
+    with pytest.raises(ValueError):
+        catalog.latest("NONE")
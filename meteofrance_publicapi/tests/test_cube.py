@@ -0,0 +1,27 @@
+# test the lazy forecast cubes
+import numpy as np
+import pytest
+
+pytest.importorskip("rasterio")
+pytest.importorskip("xarray")
+pytest.importorskip("dask")
+from meteofrance_publicapi.cube import TiffArray, build_cube
+
+
+def test_build_cube(tmp_path, write_tiff):
+    filenames = [tmp_path / f"{time}.tiff" for time in range(3)]
+    for offset, filename in enumerate(filenames):
+        data = np.arange(100).reshape(10, 10) + offset * 100
+        data[0, 0] = -1
+        write_tiff(filename, data, nodata=-1)
+
+    array = TiffArray(filenames[0])
+    assert array[1:3, 2:4].tolist() == [[12, 13], [22, 23]]
+
+    cube = build_cube(filenames, [0, 3600, 7200], chunks=4)
+    assert cube.dims == ("time", "lat", "lon")
+    assert cube.shape == (3, 10, 10)
+    assert cube.data.chunks == ((1, 1, 1), (4, 4, 2), (4, 4, 2))
+    assert cube.lat.values[0] == 49.5 and cube.lon.values[-1] == 9.5
+    assert np.isnan(cube.isel(time=0, lat=0, lon=0).values)
+    assert cube.sel(time=7200).isel(lat=1, lon=2).values == 212
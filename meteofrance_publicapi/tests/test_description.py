@@ -0,0 +1,110 @@
+# test the parsing of the descriptions and the validation of the requests
+import pytest
+
+from meteofrance_publicapi import AromeForecast
+from meteofrance_publicapi.description import DescriptionCache, parse_description
+from meteofrance_publicapi.testing import FakeMeteoFranceServer
+
+
+def test_parse_description(tmp_path):
+    server = FakeMeteoFranceServer(heights=(10, 2), times=(0, 3600, 7200))
+    coverage_id = server.coverage_ids[0]
+    description = parse_description(server.description_xml(coverage_id))
+
+    assert description.coverage_id == coverage_id
+    assert description.crs == "EPSG:4326"
+    assert description.lat == (37.5, 55.4)
+    assert description.long == (-12.0, 16.0)
+    assert description.resolution == pytest.approx((0.01, 0.01))
+    assert description.heights == (2, 10)
+    assert description.times == (0, 3600, 7200)
+
+    cache = DescriptionCache(tmp_path)
+    cache.save(description)
+    assert cache.load(coverage_id) == description
+    assert DescriptionCache(tmp_path).load(coverage_id) == description
+    assert cache.load("missing") is None
+
+
+def test_description_cache_is_bounded(tmp_path):
+    server = FakeMeteoFranceServer(n_runs=3)
+    coverage_ids = sorted(server.coverage_ids[:3], key=lambda coverage_id: coverage_id[-20:])
+    cache = DescriptionCache(tmp_path, max_items=2)
+    for coverage_id in coverage_ids:
+        cache.save(parse_description(server.description_xml(coverage_id)))
+    assert list(cache._items) == coverage_ids[1:]
+
+    assert cache.expire(coverage_ids[-1][-20:]) == 2
+    assert list(cache._items) == coverage_ids[-1:]
+    assert cache.load(coverage_ids[0]) is None
+    assert cache.load(coverage_ids[-1]) is not None
+
+
+def test_validate():
+    server = FakeMeteoFranceServer(heights=(2, 10), times=(0, 3600, 7200))
+    description = parse_description(server.description_xml(server.coverage_ids[0]))
+
+    assert description.validate(2, 3600, (40, 50), (0, 5)) == (2, 3600, (40, 50), (0, 5))
+    with pytest.raises(ValueError, match="height 5"):
+        description.validate(5, 0, (40, 50), (0, 5))
+    with pytest.raises(ValueError, match="exceed"):
+        description.validate(2, 0, (30, 50), (0, 5))
+    with pytest.raises(ValueError, match="outside"):
+        description.validate(2, 0, (40, 50), (20, 25), clamp=True)
+    assert description.validate(7, 3000, (30, 50), (0, 20), clamp=True) == (
+        10, 3600, (37.5, 50), (0, 16.0)
+    )
+    assert description.slices(times=[0]) == [(2, 0), (10, 0)]
+    assert description.slices(2, [0, 100], clamp=True) == [(2, 0)]
+    assert len(description.slices()) == 6
+
+
+def test_client_validation(tmp_path):
+    pytest.importorskip("rasterio")
+    with FakeMeteoFranceServer(heights=(2, 10), times=(0, 3600)) as server:
+        client = server.client(AromeForecast, cache_dir=tmp_path, rate_limit=None)
+        client.get_capabilities()
+        coverage_id = server.coverage_ids[0]
+        with pytest.raises(ValueError, match="time 1800"):
+            client.get_coverage(coverage_id, 2, 1800, validate="raise")
+        filepath = client.get_coverage(coverage_id, 3, 2000, lat=(45, 60), validate="clamp")
+        filepaths = client.get_coverages(coverage_id, heights=None, times=None, lat=(45, 46))
+        # the descriptions are read from the cache directory by the other clients
+        other = server.client(AromeForecast, cache_dir=tmp_path, rate_limit=None)
+        other.describe_coverage(coverage_id)
+
+    assert filepath.name == "2m_3600Z_45-55.4_-12-16.tiff"
+    assert list(filepaths) == [
+        (coverage_id, 2, 0), (coverage_id, 2, 3600), (coverage_id, 10, 0), (coverage_id, 10, 3600),
+    ]
+    assert server.requests["DescribeCoverage"] == 1
+    # the slice (2, 3600) is cropped from the file of the clamped request
+    assert server.requests["GetCoverage"] == 4
+
+
+def test_descriptions_of_evicted_runs(tmp_path):
+    pytest.importorskip("rasterio")
+    with FakeMeteoFranceServer(n_runs=2) as server:
+        client = server.client(AromeForecast, cache_dir=tmp_path, rate_limit=None, cache_max_bytes=1)
+        client.get_capabilities()
+        old_id, new_id = client.all_coverageid_of_name("TEMPERATURE__SPECIFIC_HEIGHT_LEVEL_ABOVE_GROUND")
+        client.get_coverage(old_id, lat=(45, 46), long=(2, 3), validate="raise")
+        # the file of the old run is evicted, and then its description
+        client.get_coverage(new_id, lat=(45, 46), long=(2, 3), validate="raise")
+
+    assert client.description_cache.load(old_id) is None
+    assert client.description_cache.load(new_id) is not None
+
+
+def test_descriptions_of_each_service(tmp_path):
+    with FakeMeteoFranceServer(resolution=0.025) as server:
+        coverage_id = server.coverage_ids[0]
+        arome = server.client(AromeForecast, cache_dir=tmp_path, rate_limit=None)
+        arome_025 = server.client(AromeForecast, precision=0.025, cache_dir=tmp_path, rate_limit=None)
+        arome_025.describe_coverage(coverage_id)
+        # the same coverage ID of the other service is not read from the cache
+        arome.describe_coverage(coverage_id)
+        arome_025.describe_coverage(coverage_id)
+
+    assert server.requests["DescribeCoverage"] == 2
+    assert arome.description_cache.cache_dir != arome_025.description_cache.cache_dir
@@ -0,0 +1,202 @@
+# test the forecast clients, without network
+import sys
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+import requests
+
+from meteofrance_publicapi import AromeForecast
+from meteofrance_publicapi.capabilities import iter_coverage_summaries
+from meteofrance_publicapi.errors import MissingDataError
+from meteofrance_publicapi.forecast import _check_download
+from meteofrance_publicapi.testing import FakeMeteoFranceServer
+
+
+def test_get_coverages(tmp_path, monkeypatch):
+    client = AromeForecast(api_key="key", cache_dir=tmp_path)
+    cached = client._coverage_filepath("ID", 2, 0, (37.5, 55.4), (-12, 16))
+    cached.parent.mkdir(parents=True)
+    cached.write_bytes(b"cached")
+    requested = []
+
+    def get_request(url, params=None, headers=None, stream=False):
+        time_subset = params["subset"][1]
+        requested.append(time_subset)
+        if time_subset == "time(7200)":
+            raise MissingDataError("missing")
+        return StreamedResponse(status_code=200, headers={}, text="II*\x00tiff")
+
+    monkeypatch.setattr(client, "_get_request", get_request)
+    filepaths = client.get_coverages("ID", heights=2, times=range(0, 4 * 3600, 3600))
+
+    assert list(filepaths) == [("ID", 2, 0), ("ID", 2, 3600), ("ID", 2, 10800)]
+    assert filepaths["ID", 2, 0] == cached
+    assert filepaths["ID", 2, 3600].read_bytes() == b"II*\x00tiff"
+    assert sorted(requested) == ["time(10800)", "time(3600)", "time(7200)"]
+
+
+class StreamedResponse(SimpleNamespace):
+    def iter_content(self, chunk_size):
+        content = self.text.encode()
+        for start in range(0, len(content), chunk_size):
+            yield content[start:start + chunk_size]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+def test_iter_coverage_summaries(capabilities_xml):
+    response = StreamedResponse(text=capabilities_xml)
+    summaries = list(iter_coverage_summaries(response.iter_content(chunk_size=10)))
+    assert [summary["CoverageId"][-20:] for summary in summaries] == [
+        "2024-01-01T00.00.00Z", "2024-01-01T03.00.00Z",
+    ]
+
+
+def test_capabilities_cache(tmp_path, monkeypatch, capabilities_xml):
+    requests_headers = []
+
+    def get_request(url, params=None, headers=None, stream=False):
+        requests_headers.append(headers)
+        if headers:
+            return StreamedResponse(status_code=304, headers={})
+        return StreamedResponse(status_code=200, text=capabilities_xml, headers={"ETag": '"v1"'})
+
+    client = AromeForecast(api_key="key", cache_dir=tmp_path)
+    monkeypatch.setattr(client, "_get_request", get_request)
+    client.get_capabilities()
+    assert len(client.all_coverageid) == 2
+
+    # a new client reads the capabilities from the disk cache
+    client = AromeForecast(api_key="key", cache_dir=tmp_path)
+    monkeypatch.setattr(client, "_get_request", get_request)
+    client.get_capabilities()
+    assert client.all_coverageid[0].endswith("2024-01-01T00.00.00Z")
+    assert requests_headers == [None]
+
+    # an expired entry is revalidated
+    client.get_capabilities(refresh=True)
+    assert requests_headers[-1] == {"If-None-Match": '"v1"'}
+    assert len(client.all_coverageid) == 2
+
+
+def test_watch(tmp_path, monkeypatch):
+    runs = [["00"], None, ["00"], ["00", "03"], ["03"]]
+    downloaded = []
+
+    client = AromeForecast(api_key="key", cache_dir=tmp_path, capabilities_cache=False)
+
+    def get_capabilities(refresh=False):
+        run_times = runs.pop(0)
+        if run_times is None:
+            raise requests.exceptions.ConnectionError("connection refused")
+        client._set_coverageids([
+            f"{name}___2024-01-01T{run}.00.00Z"
+            for run in run_times
+            for name in ("TEMPERATURE__GROUND_OR_WATER_SURFACE", "WIND_SPEED__GROUND_OR_WATER_SURFACE")
+        ])
+
+    def get_coverages(coverageids, *args):
+        downloaded.extend(coverageids)
+        return {(coverageid, 2, 0): tmp_path for coverageid in coverageids}
+
+    monkeypatch.setattr(client, "get_capabilities", get_capabilities)
+    monkeypatch.setattr(client, "get_coverages", get_coverages)
+    monkeypatch.setattr("meteofrance_publicapi.forecast.sleep", lambda seconds: None)
+    batches = list(client.watch("TEMPERATURE", download=True, polls=5))
+
+    new_id = "TEMPERATURE__GROUND_OR_WATER_SURFACE___2024-01-01T03.00.00Z"
+    assert batches == [([new_id], {(new_id, 2, 0): tmp_path})]
+    assert downloaded == [new_id]
+    # the coverage IDs no longer published are forgotten
+    assert client._new_coverageids({"old", new_id}, "TEMPERATURE") == ([], {new_id})
+
+
+def test_resume_download(tmp_path, monkeypatch):
+    content = b"II*\x00" + bytes(range(256)) * 10
+    requests_headers = []
+
+    class BytesResponse(StreamedResponse):
+        def iter_content(self, chunk_size):
+            yield self.content
+            if self.interrupted:
+                raise requests.exceptions.ChunkedEncodingError("connection broken")
+
+    def get_request(url, params=None, headers=None, stream=False):
+        requests_headers.append(headers)
+        if headers is None:
+            return BytesResponse(
+                status_code=200, headers={"Content-Length": str(len(content))},
+                content=content[:1000], interrupted=True,
+            )
+        return BytesResponse(
+            status_code=206,
+            headers={"Content-Range": f"bytes 1000-{len(content) - 1}/{len(content)}"},
+            content=content[1000:], interrupted=False,
+        )
+
+    client = AromeForecast(api_key="key", cache_dir=tmp_path)
+    monkeypatch.setattr(client, "_get_request", get_request)
+    filepath = client.get_coverage("ID")
+
+    assert requests_headers == [None, {"Range": "bytes=1000-"}]
+    assert filepath.read_bytes() == content
+    assert not client.coverage_cache.part_path(filepath).exists()
+
+
+def test_invalid_download(tmp_path, monkeypatch):
+    def get_request(url, params=None, headers=None, stream=False):
+        return StreamedResponse(status_code=200, headers={}, text="<xml>error</xml>")
+
+    client = AromeForecast(api_key="key", cache_dir=tmp_path)
+    monkeypatch.setattr(client, "_get_request", get_request)
+    with pytest.raises(ValueError, match="not a valid TIFF"):
+        client.get_coverage("ID")
+    assert not list(tmp_path.glob("ID/*"))
+
+
+def test_crop_without_rasterio(tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, "rasterio", None)
+    monkeypatch.delitem(sys.modules, "meteofrance_publicapi.raster", raising=False)
+    requested = []
+
+    def get_request(url, params=None, headers=None, stream=False):
+        requested.append(params["subset"])
+        return StreamedResponse(status_code=200, headers={}, text="II*\x00tiff")
+
+    client = AromeForecast(api_key="key", cache_dir=tmp_path)
+    monkeypatch.setattr(client, "_get_request", get_request)
+    client.get_coverage("ID", lat=(40, 50), long=(0, 10))
+    # the box is within the cached raster, but it cannot be cropped
+    filepath = client.get_coverage("ID", lat=(42, 45), long=(2, 5))
+
+    assert filepath.read_bytes() == b"II*\x00tiff"
+    assert len(requested) == 2
+
+
+def test_check_short_download(tmp_path):
+    part_path = tmp_path / "coverage.tiff.part"
+    part_path.write_bytes(b"II")
+    assert not _check_download(part_path, 100, "ID")
+    assert part_path.exists()
+    with pytest.raises(ValueError, match="not a valid TIFF"):
+        _check_download(part_path, 2, "ID")
+
+
+def test_get_point_values(tmp_path):
+    pytest.importorskip("rasterio")
+    with FakeMeteoFranceServer(n_runs=1) as server:
+        client = server.client(AromeForecast, cache_dir=tmp_path, rate_limit=None)
+        client.get_capabilities()
+        values = client.get_point_values([45.21, 46.05], [2.3, 3.7], times=[0, 3600])
+
+    assert values.shape == (2, 2)
+    assert not np.isnan(values).any()
+    # only the box of the locations is fetched
+    assert {path.name for path in tmp_path.glob("*/*.tiff")} == {
+        "2m_0Z_45.11-46.15_2.2-3.8.tiff", "2m_3600Z_45.11-46.15_2.2-3.8.tiff",
+    }
@@ -3,3 +3,18 @@
 def test_import():
     import meteofrance_publicapi
     assert meteofrance_publicapi
+
+
+def test_lazy_imports():
+    import subprocess
+    import sys
+
+    code = (
+        "import sys; from meteofrance_publicapi import AromeForecast; "
+        "print(' '.join(sorted({'pandas', 'matplotlib', 'cartopy', 'rasterio', 'httpx'} & set(sys.modules))))"
+    )
+    output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True)
+    assert output.stdout.strip() == ""
+
+    import meteofrance_publicapi
+    assert meteofrance_publicapi.Observations.__name__ == "Observations"
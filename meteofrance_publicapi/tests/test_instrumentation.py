@@ -0,0 +1,105 @@
+# test the instrumentation of the clients, against the local fake server
+import pytest
+
+from meteofrance_publicapi import AromeForecast, Observations
+from meteofrance_publicapi.instrumentation import Event, Instrumentation, PrometheusExporter
+from meteofrance_publicapi.testing import FakeMeteoFranceServer
+
+pytest.importorskip("rasterio")
+
+NAME = "TEMPERATURE__SPECIFIC_HEIGHT_LEVEL_ABOVE_GROUND"
+
+
+def test_forecast_events(tmp_path):
+    events = []
+    with FakeMeteoFranceServer(throttle_rate=0.3, seed=1) as server:
+        client = server.client(
+            AromeForecast, cache_dir=tmp_path, rate_limit=None, backoff_factor=0,
+            max_retries=10, instrumentation=events.append,
+        )
+        client.get_capabilities()
+        coverageid = client.all_coverageid_of_name(NAME)[0]
+        for _ in range(2):
+            client.get_coverage(coverageid, lat=(45, 45.5), long=(2, 2.5))
+        # another client reuses the shared token, without refresh
+        server.client(AromeForecast, cache_dir=tmp_path, instrumentation=events.append)
+
+    kinds = [event.kind for event in events]
+    assert kinds.count("token") == 1
+    assert server.requests["token"] == 1
+    requests = [event for event in events if event.kind == "request"]
+    assert len(requests) == sum(server.requests.values()) - 1  # without the token request
+    assert {event.status for event in requests} == {200, 429}
+    assert kinds.count("retry") == server.statuses[429]
+    coverage = [event for event in requests if event.name.endswith("/GetCoverage") and event.status == 200]
+    assert coverage[0].nbytes > 0 and coverage[0].duration > 0
+    assert [(event.name, event.hit) for event in events if event.kind == "cache"] == [
+        ("capabilities", False), ("coverage", False), ("coverage", True),
+    ]
+    download, = [event for event in events if event.kind == "download"]
+    assert download.name == NAME
+    assert download.nbytes == coverage[0].nbytes
+    assert [event.name for event in events if event.kind == "parse"] == ["capabilities"]
+
+
+def test_bulk_lookups_counted_once(tmp_path):
+    events = []
+    with FakeMeteoFranceServer() as server:
+        client = server.client(
+            AromeForecast, cache_dir=tmp_path, rate_limit=None, instrumentation=events.append,
+        )
+        client.get_capabilities()
+        coverageid = client.all_coverageid_of_name(NAME)[0]
+        for _ in range(2):
+            client.get_coverages(coverageid, times=[0, 3600], lat=(45, 45.5), long=(2, 2.5))
+
+    assert client.coverage_cache.stats()["misses"] == 2
+    assert client.coverage_cache.stats()["hits"] == 2
+    assert [event.hit for event in events if event.kind == "cache" and event.name == "coverage"] == [
+        False, False, True, True,
+    ]
+
+
+def test_shared_instrumentation_and_failing_callback(tmp_path):
+    def fail(event):
+        raise RuntimeError("broken callback")
+
+    events = []
+    instrumentation = Instrumentation([fail, events.append])
+    with FakeMeteoFranceServer(n_stations=10) as server:
+        client = server.client(
+            Observations, cache_dir=tmp_path, rate_limit=None, instrumentation=instrumentation,
+        )
+        other = server.client(
+            Observations, cache_dir=tmp_path, rate_limit=None, instrumentation=instrumentation,
+        )
+        client.list_stations()
+        other.list_stations()
+
+    assert other.instrumentation is client.instrumentation
+    assert [(event.kind, event.name, event.hit) for event in events if event.kind != "token"] == [
+        ("cache", "stations", False),
+        ("request", "v1/liste-stations", None),
+        ("parse", "stations", None),
+        ("cache", "stations", True),
+        ("parse", "stations", None),
+    ]
+
+
+def test_prometheus_exporter():
+    prometheus_client = pytest.importorskip("prometheus_client")
+    registry = prometheus_client.CollectorRegistry()
+    exporter = PrometheusExporter(registry)
+    endpoint = "MF-NWP-HIGHRES-AROME-001-FRANCE-WCS/GetCoverage"
+    exporter(Event("request", endpoint, duration=0.5, status=200, nbytes=100, attempt=0))
+    exporter(Event("retry", endpoint, duration=1, status=429, attempt=0))
+    exporter(Event("cache", "coverage", hit=True))
+
+    def value(name, **labels):
+        return registry.get_sample_value(name, labels)
+
+    assert value("meteofrance_requests_total", endpoint=endpoint, status="200") == 1
+    assert value("meteofrance_request_duration_seconds_sum", endpoint=endpoint) == 0.5
+    assert value("meteofrance_received_bytes_total", endpoint=endpoint) == 100
+    assert value("meteofrance_retries_total", endpoint=endpoint, status="429") == 1
+    assert value("meteofrance_cache_lookups_total", cache="coverage", result="hit") == 1
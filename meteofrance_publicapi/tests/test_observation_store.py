@@ -0,0 +1,77 @@
+# test the local store of the observations
+import asyncio
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+from meteofrance_publicapi import AsyncObservations, Observations
+from meteofrance_publicapi.observation_store import ObservationStore
+
+STATION_CSV = """geo_id_insee;lat;lon;validity_time;t
+{station};46.2;5.3;{datetime};275.1
+"""
+
+
+def test_sync_store(tmp_path, monkeypatch):
+    requested = []
+
+    def get_request(url, params=None):
+        requested.append((params["id_station"], params["datetime"]))
+        return SimpleNamespace(content=STATION_CSV.format(
+            station=params["id_station"], datetime=params["datetime"],
+        ).encode())
+
+    client = Observations(api_key="key", cache_dir=tmp_path)
+    monkeypatch.setattr(client, "_get_request", get_request)
+    store = ObservationStore(tmp_path / "observations")
+    stations = ["01014002", "01089001"]
+
+    errors = client.sync_store(store, stations, "2024-01-01T22:00", "2024-01-02T01:00")
+    assert errors == {}
+    assert len(requested) == 8
+    assert sorted(path.name for path in store.path.glob("geo_id_insee=01014002/*")) == [
+        "day=2024-01-01", "day=2024-01-02",
+    ]
+
+    # only the new slots are fetched
+    requested.clear()
+    client.sync_store(store, stations, "2024-01-02T00:00", "2024-01-02T02:00")
+    assert sorted(requested) == [
+        ("01014002", "2024-01-02T02:00:00Z"), ("01089001", "2024-01-02T02:00:00Z"),
+    ]
+
+    data = store.read("01089001", start="2024-01-02", columns=["temperature_K"])
+    assert data["validity_time"].tolist() == list(
+        pd.date_range("2024-01-02", periods=3, freq="1h", tz="UTC")
+    )
+    assert data["geo_id_insee"].unique().tolist() == ["01089001"]
+    assert data["temperature_K"].tolist() == pytest.approx([275.1] * 3)
+    assert store.missing(stations, "2024-01-01T23:00", "2024-01-02T03:00") == [
+        ("01014002", pd.Timestamp("2024-01-02T03:00", tz="UTC")),
+        ("01089001", pd.Timestamp("2024-01-02T03:00", tz="UTC")),
+    ]
+
+
+def test_async_sync_store(tmp_path, monkeypatch):
+    pytest.importorskip("httpx")
+    requested = []
+
+    async def get_request(url, params=None):
+        requested.append((params["id_station"], params["datetime"]))
+        await asyncio.sleep(0)
+        return SimpleNamespace(content=STATION_CSV.format(
+            station=params["id_station"], datetime=params["datetime"],
+        ).encode())
+
+    async def main():
+        async with AsyncObservations(api_key="key", cache_dir=tmp_path) as client:
+            monkeypatch.setattr(client, "_get_request", get_request)
+            return await client.sync_store(store, stations, "2024-01-01T22:00", "2024-01-02T01:00")
+
+    store = ObservationStore(tmp_path / "observations")
+    stations = ["01014002", "01089001"]
+    assert asyncio.run(main()) == {}
+    assert len(requested) == 8
+    assert store.missing(stations, "2024-01-01T22:00", "2024-01-02T01:00") == []
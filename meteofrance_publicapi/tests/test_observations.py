@@ -0,0 +1,89 @@
+# test the observation clients, without network
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from meteofrance_publicapi import Observations
+from meteofrance_publicapi.errors import MissingDataError
+
+PAQUET_CSV = """geo_id_insee;lat;lon;reference_time;insert_time;validity_time;t;u
+01014002;46.2;5.3;2024-01-01T01:00:00Z;2024-01-01T01:10:00Z;2024-01-01T00:00:00Z;275.1;90
+01027003;46.0;5.0;2024-01-01T01:00:00Z;2024-01-01T01:10:00Z;2024-01-01T00:00:00Z;276.3;85
+01089001;45.8;5.7;2024-01-01T01:00:00Z;2024-01-01T01:10:00Z;2024-01-01T00:00:00Z;274.8;93
+"""
+
+
+def test_get_paquet_horaire(monkeypatch):
+    requests = []
+
+    def get_request(url, params=None):
+        requests.append((url, params))
+        return SimpleNamespace(content=PAQUET_CSV.encode())
+
+    client = Observations(api_key="key")
+    monkeypatch.setattr(client, "_get_request", get_request)
+    data = client.get_paquet_horaire(1, stations=["01014002", "01089001"])
+
+    assert requests == [(
+        "https://public-api.meteofrance.fr/public/DPPaquetObs/v1/paquet/horaire",
+        {"format": "csv", "id-departement": 1},
+    )]
+    assert data["geo_id_insee"].tolist() == ["01014002", "01089001"]
+    assert data["temperature_K"].dtype == "float32"
+    assert data["temperature_K"].tolist() == pytest.approx([275.1, 274.8])
+    assert data["geo_id_insee"].dtype == "category"
+    assert data["validity_time"].dt.tz is not None
+
+
+STATION_CSV = """geo_id_insee;lat;lon;validity_time;t
+{station};46.2;5.3;{datetime};275.1
+"""
+
+
+def test_get_stations(monkeypatch):
+    def get_request(url, params=None):
+        if params["id_station"] == "missing":
+            raise MissingDataError("no data")
+        return SimpleNamespace(content=STATION_CSV.format(
+            station=params["id_station"], datetime=params["datetime"],
+        ).encode())
+
+    client = Observations(api_key="key")
+    monkeypatch.setattr(client, "_get_request", get_request)
+    datetimes = ["2024-01-01T00:00:00Z", "2024-01-01T01:00:00Z"]
+    data, errors = client.get_stations(["01014002", "missing", "01089001"], datetimes)
+
+    assert data.index.tolist() == ["01014002", "01014002", "01089001", "01089001"]
+    assert data["validity_time"].tolist() == [pd.Timestamp(datetime) for datetime in datetimes * 2]
+    assert list(errors) == [("missing", datetimes[0]), ("missing", datetimes[1])]
+    assert isinstance(errors["missing", datetimes[0]], MissingDataError)
+
+
+STATIONS_CSV = b"""Id_station;Id_omm;Nom_usuel;Latitude;Longitude;Altitude;Date_ouverture;Pack
+01014002;;ARBENT;46.278;5.669;534;2003-10-01;RADOME
+01027003;07481;AMBERIEU;45.977;5.329;250;1922-01-01;RADOME
+"""
+
+
+def test_parse_stations():
+    stations = Observations(api_key="key")._parse_stations(STATIONS_CSV)
+    assert stations["Id_station"].tolist() == ["01014002", "01027003"]
+    assert stations["Id_omm"].tolist()[1] == "07481"
+    assert stations["Altitude"].dtype == "float32"
+    assert stations["Date_ouverture"].tolist()[0] == pd.Timestamp("2003-10-01", tz="UTC")
+
+
+def test_list_stations_cache(tmp_path, monkeypatch):
+    requests = []
+
+    def get_request(url, params=None):
+        requests.append(url)
+        return SimpleNamespace(content=STATIONS_CSV)
+
+    client = Observations(api_key="key", cache_dir=tmp_path)
+    monkeypatch.setattr(client, "_get_request", get_request)
+    client.list_stations()
+    catalog = Observations(api_key="key", cache_dir=tmp_path).get_station_catalog()
+    assert len(requests) == 1
+    assert catalog.nearest(46.0, 5.3)[1] == "01027003"
@@ -0,0 +1,49 @@
+# test the raster functions on a synthetic file
+import numpy as np
+import pytest
+
+pytest.importorskip("rasterio")
+
+from meteofrance_publicapi import raster
+
+
+@pytest.fixture
+def tiff_file(tmp_path, write_tiff):
+    # 1 degree pixels, from 40N to 50N and 0E to 10E
+    return write_tiff(tmp_path / "2m_0Z.tiff", np.arange(100).reshape(10, 10))
+
+
+def test_open_tiff_file_memory_cache(tiff_file):
+    raster.memory_cache.clear()
+    field, _ = raster.open_tiff_file(tiff_file)
+    again, _ = raster.open_tiff_file(tiff_file)
+    assert again is field
+    assert not field.flags.writeable
+    assert raster.memory_cache.hits == 1
+    assert raster.memory_cache.misses == 1
+    raster.memory_cache.clear()
+    assert (raster.memory_cache.hits, raster.memory_cache.misses) == (0, 0)
+
+
+def test_read_tiff_window(tiff_file):
+    raster.memory_cache.clear()
+    field, transform = raster.read_tiff_window(tiff_file, lat=(42, 45), long=(1, 3))
+    assert field.shape == (3, 2)
+    assert field[0, 0] == 51
+    assert (transform.c, transform.f) == (1, 45)
+    # the same window is sliced from the cached raster
+    raster.open_tiff_file(tiff_file)
+    cached_field, cached_transform = raster.read_tiff_window(tiff_file, lat=(42, 45), long=(1, 3))
+    np.testing.assert_array_equal(cached_field, field)
+    assert cached_transform == transform
+
+
+def test_sample_tiff_files(tiff_file):
+    lat = np.array([49.5, 49.0, 45.5, 30.0])
+    lon = np.array([0.5, 1.0, 2.5, 5.0])
+    nearest = raster.sample_tiff_files(tiff_file, lat, lon)
+    np.testing.assert_array_equal(nearest, [0, 11, 42, np.nan])
+    # at the corner between the centers of the pixels 0, 1, 10 and 11
+    bilinear = raster.sample_tiff_files([tiff_file, tiff_file], lat, lon, method="bilinear")
+    assert bilinear.shape == (2, 4)
+    np.testing.assert_allclose(bilinear[0], [0, 5.5, 42, np.nan])
@@ -0,0 +1,40 @@
+# test the rate limiter and the retries, without network
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from meteofrance_publicapi.core import MeteoFranceAPI
+from meteofrance_publicapi.errors import ThrottledError
+from meteofrance_publicapi.ratelimit import RateLimiter, retry_delay
+
+
+def test_rate_limiter_spaces_requests():
+    limiter = RateLimiter(rate=10, period=1, burst=2)
+    start = time.monotonic()
+    for _ in range(4):
+        limiter.acquire()
+    # 2 requests in the burst, then 2 more at 10 requests per second
+    assert time.monotonic() - start == pytest.approx(0.2, abs=0.05)
+
+
+def test_retry_delay():
+    throttled = SimpleNamespace(headers={"Retry-After": "3"})
+    assert retry_delay(throttled, attempt=0) == 3
+    failed = SimpleNamespace(headers={})
+    assert 2 <= retry_delay(failed, attempt=2, backoff_factor=1) <= 4
+
+
+def make_response(status_code, headers=None):
+    return SimpleNamespace(status_code=status_code, headers=headers or {}, text="", close=lambda: None)
+
+
+def test_retry_throttled_requests(monkeypatch):
+    client = MeteoFranceAPI(api_key="key", rate_limit=None, max_retries=2, backoff_factor=0)
+    responses = [make_response(429, {"Retry-After": "0"}), make_response(503), make_response(200)]
+    monkeypatch.setattr(client.session, "get", lambda url, **kwargs: responses.pop(0))
+    assert client._get_request("url").status_code == 200
+
+    responses = [make_response(429)] * 3
+    with pytest.raises(ThrottledError):
+        client._get_request("url")
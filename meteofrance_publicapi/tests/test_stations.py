@@ -0,0 +1,34 @@
+# test the spatial index of the stations
+import numpy as np
+import pandas as pd
+import pytest
+
+from meteofrance_publicapi.stations import StationCatalog
+
+STATIONS = pd.DataFrame({
+    "Id_station": ["75114001", "69029001", "13054001", "38999999"],
+    "Latitude": [48.82, 45.73, 43.44, np.nan],
+    "Longitude": [2.34, 5.08, 5.22, 5.5],
+})
+
+
+def test_nearest():
+    catalog = StationCatalog(STATIONS)
+    assert len(catalog) == 3
+
+    distances, ids = catalog.nearest([48.85, 43.3], [2.35, 5.4])
+    assert ids.tolist() == ["75114001", "13054001"]
+    assert distances[0] == pytest.approx(3.4, abs=0.1)
+
+    distances, ids = catalog.nearest([45.76], [4.84], k=2, max_distance=100)
+    assert ids.tolist() == [["69029001", None]]
+    assert np.isinf(distances[0, 1])
+
+    distance, station_id = catalog.nearest(45.76, 4.84)
+    assert station_id == "69029001"
+
+
+def test_in_bbox():
+    catalog = StationCatalog(STATIONS)
+    stations = catalog.in_bbox(lat=(43, 46), lon=(4, 6))
+    assert stations["Id_station"].tolist() == ["69029001", "13054001"]
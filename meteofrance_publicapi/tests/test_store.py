@@ -0,0 +1,29 @@
+# test the Zarr store of the forecast runs
+import numpy as np
+import pytest
+
+pytest.importorskip("rasterio")
+pytest.importorskip("zarr", minversion="3")
+
+from meteofrance_publicapi.store import ZarrRunStore
+
+COVERAGEID = "TEMPERATURE__SPECIFIC_HEIGHT_LEVEL_ABOVE_GROUND___2024-01-01T00.00.00Z"
+
+
+def test_append(tmp_path, write_tiff):
+    store = ZarrRunStore(tmp_path / "store", chunks=2)
+    for time in (0, 3600):
+        for height in (2, 10):
+            filename = tmp_path / f"{height}m_{time}Z.tiff"
+            write_tiff(filename, np.full((3, 4), time + height))
+            store.append(COVERAGEID, height, time, filename)
+
+    assert store.runs() == ["2024-01-01T00.00.00Z"]
+    assert (tmp_path / ".store.lock").exists()
+    assert not list((tmp_path / "store").glob("*.lock"))
+    dataset = store.open(COVERAGEID)
+    assert dataset["data"].dims == ("time", "height", "lat", "lon")
+    assert dataset["time"].values.tolist() == [0, 3600]
+    assert dataset["height"].values.tolist() == [2, 10]
+    assert float(dataset["data"].sel(time=3600, height=10).mean()) == 3610
+    assert dataset["lat"].values.tolist() == [49.5, 48.5, 47.5]
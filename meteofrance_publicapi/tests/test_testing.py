@@ -0,0 +1,49 @@
+# test the clients against the local fake server
+import pytest
+import requests
+
+from meteofrance_publicapi import AromeForecast, Observations
+from meteofrance_publicapi.testing import FakeMeteoFranceServer
+
+pytest.importorskip("rasterio")
+
+
+def test_get_coverages_with_throttling(tmp_path):
+    with FakeMeteoFranceServer(throttle_rate=0.3, failure_rate=0.1, seed=1) as server:
+        client = server.client(
+            AromeForecast, cache_dir=tmp_path, rate_limit=None, backoff_factor=0, max_retries=10,
+        )
+        client.get_capabilities()
+        coverage_ids = client.all_coverageid_of_name("TEMPERATURE__SPECIFIC_HEIGHT_LEVEL_ABOVE_GROUND")
+        filepaths = client.get_coverages(coverage_ids[:2], times=[0, 3600], lat=(45, 45.5), long=(2, 2.5))
+
+    assert len(coverage_ids) == len(server.run_times)
+    assert all(filepath.exists() for filepath in filepaths.values())
+    assert server.requests["token"] == 1
+    assert server.statuses[429] > 0
+
+
+def test_range_requests():
+    with FakeMeteoFranceServer() as server:
+        client = server.client(AromeForecast, api_key="key")
+        url, params = client._coverage_request(server.coverage_ids[0], 2, 0, (45, 45.5), (2, 2.5))
+        content = requests.get(url, params=params).content
+        partial = requests.get(url, params=params, headers={"Range": "bytes=10-"})
+        beyond = requests.get(url, params=params, headers={"Range": f"bytes={len(content)}-"})
+
+    assert content.startswith(b"II*\x00")
+    assert partial.status_code == 206
+    assert partial.content == content[10:]
+    assert beyond.status_code == 416
+    assert server.statuses == {200: 1, 206: 1, 416: 1}
+
+
+def test_observations(tmp_path):
+    with FakeMeteoFranceServer(n_stations=200) as server:
+        client = server.client(Observations, cache_dir=tmp_path, rate_limit=None)
+        stations = client.list_stations()
+        data = client.get_paquet_horaire(1)
+
+    assert len(stations) == 200
+    assert len(data) == sum(station_id.startswith("01") for station_id in stations["Id_station"])
+    assert data["temperature_K"].dtype == "float32"
@@ -0,0 +1,47 @@
+# test the verification of the forecasts against the observations
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("rasterio")
+
+from meteofrance_publicapi.verification import ErrorStats, group_runs, verify_runs
+
+NAME = "TEMPERATURE__SPECIFIC_HEIGHT_LEVEL_ABOVE_GROUND"
+RUN = "2024-01-01T00.00.00Z"
+
+
+def test_error_stats():
+    stats = ErrorStats().update([1, 2, np.nan], [0, 4, 1])
+    stats.merge(ErrorStats().update([3], [3]))
+    assert stats.as_dict() == pytest.approx(
+        {"count": 3, "bias": -1 / 3, "rmse": np.sqrt(5 / 3), "mae": 1}
+    )
+
+
+def test_verify_runs(tmp_path, write_tiff):
+    filepaths = {}
+    for height, offset in ((2, 0), (10, 1)):
+        for time, value in ((0, 10), (3600, 12)):
+            filepath = tmp_path / f"{height}_{time}.tiff"
+            filepaths[f"{NAME}___{RUN}", height, time] = filepath
+            write_tiff(filepath, np.full((3, 4), value + offset))
+    observations = pd.DataFrame({
+        "geo_id_insee": ["A", "B", "A", "B", "A"],
+        "validity_time": pd.to_datetime([
+            "2024-01-01T00:00Z", "2024-01-01T00:00Z", "2024-01-01T01:00Z",
+            "2024-01-01T01:00Z", "2024-01-01T02:00Z",
+        ]),
+        "temperature_K": [284.15, 282.15, 285.15, np.nan, 200.0],
+    })
+
+    scores = verify_runs(
+        group_runs(filepaths), ["A", "B", "C"], [48.5, 47.5, 0.0], [0.5, 2.5, 0.0],
+        observations, max_workers=2,
+    )
+    # the files of the two heights are verified apart
+    assert scores.index.tolist() == [(NAME, 2, RUN), (NAME, 10, RUN)]
+    assert scores["count"].tolist() == [3, 3]
+    assert scores.loc[(NAME, 2, RUN), "bias"] == pytest.approx(0)
+    assert scores.loc[(NAME, 2, RUN), "mae"] == pytest.approx(2 / 3)
+    assert scores.loc[(NAME, 10, RUN), "bias"] == pytest.approx(1)
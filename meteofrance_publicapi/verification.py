@@ -0,0 +1,241 @@
+"""Verification of the forecasts against the observations of the stations.
+
+The forecast rasters of a run are sampled at all the stations in one vectorized pass
+(see :func:`.raster.sample_tiff_files`), aligned with the observations at the same
+validity times, and reduced to error statistics (bias, RMSE and MAE) by
+:class:`ErrorStats`, so that only the statistics are kept from one run to the next.
+The runs are verified in parallel by a pool of processes.
+
+Usage
+-----
+
+.. code-block:: python
+
+    import pandas as pd
+    from meteofrance_publicapi import AromeForecast, Observations
+    from meteofrance_publicapi.observation_store import ObservationStore
+    from meteofrance_publicapi.verification import group_runs, verify_runs
+
+    APPLICATION_ID = "..."  # see "How to get the API key" in the README
+    end = pd.Timestamp.now(tz="UTC").floor("h")
+    start = end - pd.Timedelta(days=2)
+
+    observation_client = Observations(application_id=APPLICATION_ID)
+    stations = observation_client.list_stations().head(50)
+    store = ObservationStore("observations")
+    observation_client.sync_store(store, stations["Id_station"], start, end)
+    observations = store.read(start=start)
+
+    forecast_client = AromeForecast(application_id=APPLICATION_ID)
+    forecast_client.get_capabilities()
+    coverage_ids = forecast_client.all_coverageid_of_name(
+        "TEMPERATURE__SPECIFIC_HEIGHT_LEVEL_ABOVE_GROUND"
+    )[-4:]  # the latest runs
+    filepaths = forecast_client.get_coverages(coverage_ids, times=range(0, 24 * 3600, 3600))
+    scores = verify_runs(
+        group_runs(filepaths), stations["Id_station"], stations["Latitude"],
+        stations["Longitude"], observations,
+    )
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .catalog import parse_coverageid
+from .observations import STATION_ID_COLUMN
+
+#: The temperature of 0°C, in Kelvin.
+KELVIN = 273.15
+
+
+class ErrorStats:
+    """Streaming statistics of the errors of a forecast.
+
+    The errors are accumulated by :meth:`update`, without keeping them.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.0
+        self.sum_squares = 0.0
+        self.sum_abs = 0.0
+
+    def update(self, forecast, observed):
+        """Add the errors ``forecast - observed``, where both are defined."""
+        errors = np.asarray(forecast, dtype="float64") - np.asarray(observed, dtype="float64")
+        errors = errors[np.isfinite(errors)]
+        self.count += errors.size
+        self.sum += errors.sum()
+        self.sum_squares += np.square(errors).sum()
+        self.sum_abs += np.abs(errors).sum()
+        return self
+
+    def merge(self, other):
+        """Add the errors accumulated by `other`."""
+        self.count += other.count
+        self.sum += other.sum
+        self.sum_squares += other.sum_squares
+        self.sum_abs += other.sum_abs
+        return self
+
+    @property
+    def bias(self):
+        """The mean error."""
+        return self.sum / self.count if self.count else np.nan
+
+    @property
+    def rmse(self):
+        """The root mean square error."""
+        return np.sqrt(self.sum_squares / self.count) if self.count else np.nan
+
+    @property
+    def mae(self):
+        """The mean absolute error."""
+        return self.sum_abs / self.count if self.count else np.nan
+
+    def as_dict(self):
+        """Return the ``count``, ``bias``, ``rmse`` and ``mae``."""
+        return {"count": self.count, "bias": self.bias, "rmse": self.rmse, "mae": self.mae}
+
+
+def _run_timestamp(run_time):
+    """Convert a run time, such as "2024-03-20T06.00.00Z", to a UTC timestamp."""
+    if isinstance(run_time, str):
+        date, _, hour = run_time.partition("T")
+        run_time = f"{date}T{hour.replace('.', ':')}"
+    run_time = pd.Timestamp(run_time)
+    return run_time.tz_localize("UTC") if run_time.tzinfo is None else run_time.tz_convert("UTC")
+
+
+def group_runs(filepaths):
+    """Group the files fetched by :meth:`.AromeForecast.get_coverages` by run.
+
+    Parameters
+    ----------
+    filepaths : dict[tuple[str, int, int], pathlib.Path]
+        the file of each ``(coverageid, height, time)``.
+
+    Returns
+    -------
+    dict[tuple[str, int, str], dict[int, pathlib.Path]]
+        the files of each ``(name, height, run_time)``, by forecast time in seconds.
+    """
+    runs = {}
+    for (coverageid, height, time), filepath in filepaths.items():
+        coverage = parse_coverageid(coverageid)
+        runs.setdefault((coverage.name, height, coverage.run_time), {})[time] = filepath
+    return runs
+
+
+def align_observations(observations, station_ids, times, column,
+                       id_column=STATION_ID_COLUMN, time_column="validity_time"):
+    """Return the observations of the stations at the given times.
+
+    Parameters
+    ----------
+    observations : pd.DataFrame
+        the observations, with the station IDs, the times and the observed values.
+    station_ids : array_like
+        the IDs of the N stations.
+    times : pd.DatetimeIndex
+        the T times, in UTC.
+    column : str
+        the column of the observed values.
+
+    Returns
+    -------
+    numpy.ndarray
+        the values, of shape (T, N). NaN where there is no observation.
+    """
+    station_ids = np.asarray(station_ids, dtype=object)
+    values = np.full((len(times), station_ids.size), np.nan)
+    data = observations[[id_column, time_column, column]].dropna()
+    if not len(data):
+        return values
+    i_time = pd.Index(times).get_indexer(pd.to_datetime(data[time_column], utc=True))
+    i_station = pd.Index(station_ids).get_indexer(data[id_column].astype(str))
+    found = (i_time >= 0) & (i_station >= 0)
+    values[i_time[found], i_station[found]] = data[column].to_numpy(dtype="float64")[found]
+    return values
+
+
+def verify_run(run_time, files, station_ids, lat, lon, observations,
+               column="temperature_K", kelvin_to_celsius=True, method="nearest"):
+    """Compute the error statistics of a run.
+
+    Parameters
+    ----------
+    run_time : str | pd.Timestamp
+        the run time of the model, for instance "2024-03-20T06.00.00Z".
+    files : dict[int, pathlib.Path]
+        the tiff file of each forecast time, in seconds.
+    station_ids, lat, lon : array_like
+        the IDs, latitudes and longitudes of the N stations.
+    observations : pd.DataFrame
+        the observations, see :func:`align_observations`.
+    column : str, optional
+        the column of the observed values, by default "temperature_K".
+    kelvin_to_celsius : bool, optional
+        convert the observations from Kelvin to Celsius, the unit of the
+        temperature of the models. By default True.
+    method : {"nearest", "bilinear"}, optional
+        the interpolation of the rasters, by default "nearest".
+
+    Returns
+    -------
+    ErrorStats
+        the statistics of the errors of the run.
+    """
+    from .raster import sample_tiff_files
+
+    stats = ErrorStats()
+    if not files:
+        return stats
+    lead_times = sorted(files)
+    times = _run_timestamp(run_time) + pd.to_timedelta(lead_times, unit="s")
+    observed = align_observations(observations, station_ids, times, column)
+    if kelvin_to_celsius:
+        observed -= KELVIN
+    forecast = sample_tiff_files([files[time] for time in lead_times], lat, lon, method=method)
+    return stats.update(forecast, observed)
+
+
+def verify_runs(runs, station_ids, lat, lon, observations, column="temperature_K",
+                kelvin_to_celsius=True, method="nearest", max_workers=None):
+    """Compute the error statistics of many runs, in a pool of processes.
+
+    Each process receives only the observations of the validity times of its run.
+
+    Parameters
+    ----------
+    runs : dict[tuple[str, int, str], dict[int, pathlib.Path]]
+        the files of each ``(name, height, run_time)``, see :func:`group_runs`.
+    max_workers : int, optional
+        the number of processes. By default, the number of processors.
+
+    See :func:`verify_run` for the other parameters.
+
+    Returns
+    -------
+    pd.DataFrame
+        the ``count``, ``bias``, ``rmse`` and ``mae`` of each run,
+        indexed by name, height and run time.
+    """
+    station_ids = np.asarray(station_ids, dtype=object)
+    lat = np.asarray(lat, dtype="float64")
+    lon = np.asarray(lon, dtype="float64")
+    observation_times = pd.to_datetime(observations["validity_time"], utc=True)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {}
+        for run, files in runs.items():
+            run_time = run[-1]
+            start = _run_timestamp(run_time) + pd.Timedelta(seconds=min(files, default=0))
+            end = _run_timestamp(run_time) + pd.Timedelta(seconds=max(files, default=0))
+            run_observations = observations[(observation_times >= start) & (observation_times <= end)]
+            futures[run] = executor.submit(
+                verify_run, run_time, files, station_ids, lat, lon, run_observations,
+                column, kelvin_to_celsius, method,
+            )
+        scores = {run: future.result().as_dict() for run, future in futures.items()}
+    return pd.DataFrame.from_dict(scores, orient="index").rename_axis(["name", "height", "run_time"])